@@ -0,0 +1,143 @@
+"""
+Benchmark: crawling a generated documentation site with tools.crawler
+
+Starts a local HTTP server for a docs site of --pages pages behind a fixed
+latency: section indexes, pages linking to their neighbours and back to
+their section, relative and ../ links, fragment and tracking-parameter
+variants of the same URLs, links out of the docs prefix, and a section
+that robots.txt disallows. Crawls it with one worker and with a few
+concurrency settings (no politeness delay, so the runs measure the
+crawler). Checks that every run fetches every allowed page exactly once
+and nothing else, and reports pages/sec.
+
+Run: python benchmarks/bench_crawl.py [--pages 2000] [--latency-ms 20]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+# Measure the network path: cached responses would make every run after the first free
+os.environ.setdefault("MISSION_CONTROL_HTTP_CACHE", "0")
+
+from tools.crawler import crawl
+
+logging.basicConfig(level=logging.WARNING)
+
+SECTION_PAGES = 50
+ROBOTS = b"User-agent: *\nDisallow: /docs/internal/\n"
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    latency = 0.02
+    pages = 2000
+    requests = Counter()
+    lock = threading.Lock()
+    
+    def in_section(self, n: int, section: int) -> bool:
+        return 0 <= n < self.pages and n // SECTION_PAGES == section
+    
+    def page(self, n: int) -> str:
+        section = n // SECTION_PAGES
+        links = [f"p{m}.html" for m in (n - 1, n + 1, n + 7) if self.in_section(m, section)]
+        if self.in_section(n + 1, section):
+            links.append(f"p{n + 1}.html?utm_source=nav#intro")
+        links += [f"../s{section}/#top", "../../about.html", "../internal/secret.html",
+                  f"https://example.invalid/ref/{n}"]
+        anchors = "".join(f"<a href='{href}'>link</a> " for href in links)
+        return (f"<html><head><title>Page {n}</title></head><body><nav><a href='/docs/'>Home</a></nav>"
+                f"<h1>Page {n}</h1><p>Section {section}, page {n}. {'text ' * 150}</p>{anchors}</body></html>")
+    
+    def home(self) -> str:
+        sections = (self.pages + SECTION_PAGES - 1) // SECTION_PAGES
+        anchors = "".join(f"<a href='s{s}/'>Section {s}</a> " for s in range(sections))
+        return f"<html><head><title>Docs</title></head><body>{anchors}</body></html>"
+    
+    def section(self, section: int) -> str:
+        first = section * SECTION_PAGES
+        anchors = "".join(f"<a href='p{n}.html'>Page {n}</a> " for n in range(first, min(first + 5, self.pages)))
+        return f"<html><head><title>Section {section}</title></head><body>{anchors}</body></html>"
+    
+    def do_GET(self):
+        with SiteHandler.lock:
+            SiteHandler.requests[self.path] += 1
+        parts = self.path.strip("/").split("/")
+        body, content_type = None, "text/html; charset=utf-8"
+        if self.path == "/robots.txt":
+            body, content_type = ROBOTS, "text/plain"
+        elif self.path == "/docs/":
+            body = self.home()
+        elif len(parts) >= 2 and parts[0] == "docs" and parts[1].startswith("s") and parts[1][1:].isdigit():
+            section = int(parts[1][1:])
+            if len(parts) == 2:
+                body = self.section(section)
+            elif parts[2].startswith("p") and parts[2].endswith(".html") and parts[2][1:-5].isdigit():
+                if self.in_section(int(parts[2][1:-5]), section):
+                    body = self.page(int(parts[2][1:-5]))
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        time.sleep(self.latency)
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000, help="Pages in the generated site")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Server response latency")
+    args = parser.parse_args()
+    
+    SiteHandler.latency = args.latency_ms / 1000
+    SiteHandler.pages = args.pages
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    start = f"http://127.0.0.1:{server.server_port}/docs/"
+    sections = (args.pages + SECTION_PAGES - 1) // SECTION_PAGES
+    expected = 1 + sections + args.pages
+    print(f"Site: {args.pages} pages in {sections} sections, {args.latency_ms:.0f} ms latency, {expected} allowed URLs")
+    
+    runs = [("serial", 1, 1), ("8 / 4 per host", 8, 4), ("16 / 8 per host", 16, 8), ("32 / 16 per host", 32, 16)]
+    print(f"\n  {'workers':<20}{'seconds':>10}{'pages/sec':>11}{'speedup':>10}{'depth':>7}{'blocked':>9}")
+    serial_seconds, failed = None, False
+    for label, concurrency, per_host in runs:
+        SiteHandler.requests.clear()
+        started = time.perf_counter()
+        result = crawl(start, max_pages=expected + 100, max_depth=1000, concurrency=concurrency,
+                       per_host=per_host, delay=0, include_content=False)
+        seconds = time.perf_counter() - started
+        serial_seconds = serial_seconds or seconds
+        fetched = {path: count for path, count in SiteHandler.requests.items() if path != "/robots.txt"}
+        ok = (result["pages_fetched"] == expected and result["pages_failed"] == 0
+              and len(fetched) == expected and max(fetched.values()) == 1
+              and not any(path.startswith("/docs/internal/") for path in fetched))
+        failed = failed or not ok
+        print(f"  {label:<20}{seconds:>10.2f}{result['pages_fetched'] / seconds:>11.1f}"
+              f"{serial_seconds / seconds:>9.2f}x{result['max_depth_reached']:>7}"
+              f"{len(result['blocked_by_robots']):>9}{'' if ok else '  WRONG PAGE SET'}")
+    
+    server.shutdown()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
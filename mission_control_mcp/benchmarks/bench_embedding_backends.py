@@ -0,0 +1,106 @@
+"""
+Benchmark: embedding backends (PyTorch vs ONNX vs int8 ONNX) on CPU
+
+First checks that every ONNX backend agrees with the PyTorch
+sentence-transformers model (per-text cosine similarity between the two
+embeddings of the same text) and exits non-zero if the agreement is
+below the threshold. Then reports encode throughput in docs/sec for each
+backend at several batch sizes.
+
+The ONNX model is exported (and quantized) on first use into
+MISSION_CONTROL_ONNX_DIR, which needs torch, onnxruntime and tokenizers.
+
+Run: python benchmarks/bench_embedding_backends.py [--docs 1024] [--batch-sizes 1,32,256] [--threads 4]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+
+import numpy as np
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+
+from utils.embedding_models import ModelRegistry, MODEL_NAME, BACKENDS
+
+logging.basicConfig(level=logging.WARNING)
+
+# Minimum per-text cosine agreement with the PyTorch backend
+MIN_COSINE = {"onnx": 0.999, "onnx_int8": 0.98}
+
+WORDS = (
+    "mission control telemetry anomaly report satellite orbit battery thermal downlink "
+    "schedule operator incident ground station antenna payload firmware update latency "
+    "power budget attitude sensor calibration invoice customer refund shipment delay"
+).split()
+
+
+def make_texts(count: int, seed: int = 0) -> list:
+    """Sentences of 4 to 120 words, roughly the length mix of real chunks"""
+    rng = np.random.default_rng(seed)
+    lengths = np.clip(rng.lognormal(3.0, 0.8, count).astype(int), 4, 120)
+    return [" ".join(rng.choice(WORDS, length)) + "." for length in lengths]
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Cosine similarity between matching rows of two embedding matrices"""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return (reference * candidate).sum(axis=1)
+
+
+def throughput(registry: ModelRegistry, backend: str, texts: list, batch_size: int) -> float:
+    """Encode all texts once (after a warm-up pass) and return docs/sec"""
+    registry.configure(batch_size=batch_size)
+    registry.encode(texts[:batch_size], MODEL_NAME, backend)
+    started = time.perf_counter()
+    registry.encode(texts, MODEL_NAME, backend)
+    return len(texts) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1024, help="Texts encoded per measurement")
+    parser.add_argument("--batch-sizes", default="1,32,256", help="Comma-separated batch sizes")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated backends")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for torch and onnxruntime")
+    args = parser.parse_args()
+    
+    backends = args.backends.split(",")
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    texts = make_texts(args.docs)
+    registry = ModelRegistry(threads=args.threads)
+    
+    print(f"Model: {MODEL_NAME}, {len(texts)} texts, threads: {args.threads or 'default'}")
+    
+    print("\nEquivalence with the torch backend (per-text cosine similarity)")
+    sample = texts[:256]
+    reference = registry.encode(sample, MODEL_NAME, "torch")
+    failed = False
+    for backend in backends:
+        if backend == "torch":
+            continue
+        agreement = cosine_agreement(reference, registry.encode(sample, MODEL_NAME, backend))
+        ok = agreement.min() >= MIN_COSINE[backend]
+        failed = failed or not ok
+        print(f"  {backend:<10} mean {agreement.mean():.5f}  min {agreement.min():.5f}  "
+              f"(threshold {MIN_COSINE[backend]})  {'OK' if ok else 'FAIL'}")
+    
+    print("\nThroughput (docs/sec)")
+    print(f"  {'backend':<10}" + "".join(f"{f'batch {size}':>12}" for size in batch_sizes))
+    for backend in backends:
+        rates = [throughput(registry, backend, texts, size) for size in batch_sizes]
+        print(f"  {backend:<10}" + "".join(f"{rate:>12.1f}" for rate in rates))
+    
+    for key, stats in registry.stats()["models"].items():
+        print(f"\n{key}: loaded in {stats['load_seconds']:.2f}s")
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
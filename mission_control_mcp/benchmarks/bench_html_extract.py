@@ -0,0 +1,136 @@
+"""
+Benchmark: HTML text extraction engines (utils.html_text)
+
+Generates a fixed synthetic corpus (same seed every run) of pages from tens
+of kilobytes to a few megabytes: header, nav and footer, inline scripts and
+styles, articles with links, entities, lists, tables, comments and <pre>
+blocks, plus the usual sloppy markup (unclosed <p> and <li>, stray end
+tags). Or pass --dir to use the .html files of a directory instead.
+Every page is extracted with each installed engine; the report gives
+ms/page, MB/sec and the share of pages whose title, links and content are
+identical to the BeautifulSoup reference ('bs4').
+
+Install the optional engine with: pip install lxml
+
+Run: python benchmarks/bench_html_extract.py [--pages 30] [--min-kb 20] [--max-kb 4000] [--dir DIR]
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+import warnings
+from pathlib import Path
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+
+from utils.html_text import ENGINES, available_engines, extract_html
+
+WORDS = ("mission control fetch latency pool socket host page server client request response "
+         "parser token stream element attribute markup entity document tree").split()
+ENTITIES = ["&amp;", "&lt;", "&gt;", "&nbsp;", "&copy;", "&#8212;", "&#x2019;", "&eacute;"]
+
+
+def words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) if rng.random() > 0.03 else rng.choice(ENTITIES) for _ in range(n))
+
+
+def section(rng: random.Random, i: int) -> str:
+    """One article section, sometimes with sloppy markup"""
+    parts = [f"<section id='s{i}'><h2>{words(rng, 4)}</h2>"]
+    for p in range(rng.randint(2, 6)):
+        inline = f" <a href='/doc/{i}/{p}'>{words(rng, 2)}</a> <b>{words(rng, 3)}</b> <em>{words(rng, 2)}</em>"
+        close = "</p>" if rng.random() > 0.2 else ""
+        parts.append(f"\n  <p class='body'>{words(rng, rng.randint(20, 80))}{inline} {words(rng, 10)}{close}")
+    items = "".join(f"<li><a href='{'#' if rng.random() < 0.3 else '/item/'}{i}-{n}'>{words(rng, 3)}</a>"
+                    + ("</li>" if rng.random() > 0.3 else "") for n in range(rng.randint(3, 10)))
+    parts.append(f"\n  <ul>{items}</ul>")
+    if rng.random() < 0.3:
+        rows = "".join(f"<tr><td>{words(rng, 2)}</td><td>{rng.randint(0, 10**6)}</td></tr>" for _ in range(8))
+        parts.append(f"<table>{rows}</table>")
+    if rng.random() < 0.2:
+        parts.append(f"<pre>  {words(rng, 6)}\n    {words(rng, 6)}  </pre>")
+    if rng.random() < 0.3:
+        parts.append(f"<!-- {words(rng, 5)} --><script>var s{i} = '<p>{words(rng, 3)}</p>';</script>")
+    if rng.random() < 0.1:
+        parts.append("</div><br></br><img src='x.png'></img>")
+    parts.append("</section>\n")
+    return "".join(parts)
+
+
+def make_page(rng: random.Random, size: int) -> str:
+    """Generated page of about `size` characters"""
+    head = (f"<!DOCTYPE html>\n<html><head><meta charset='utf-8'><title>{words(rng, 5)}</title>"
+            f"<style>body {{ font: 14px sans-serif }} .body {{ margin: 0 }}</style>"
+            f"<script>window.config = {{ page: {rng.randint(0, 999)} }};</script></head>\n<body>"
+            f"<header><h1>{words(rng, 4)}</h1></header>"
+            f"<nav>{''.join(f'<a href=/nav/{n}>{words(rng, 1)}</a>' for n in range(12))}</nav>\n<main>")
+    tail = f"</main><footer>{words(rng, 12)} <a href='/about'>about</a></footer></body></html>"
+    sections = []
+    length = len(head) + len(tail)
+    while length < size:
+        sections.append(section(rng, len(sections)))
+        length += len(sections[-1])
+    return head + "".join(sections) + tail
+
+
+def load_corpus(args) -> list:
+    if args.dir:
+        return [(path.name, path.read_text(encoding="utf-8", errors="replace"))
+                for path in sorted(Path(args.dir).rglob("*.htm*"))]
+    rng = random.Random(0)
+    corpus = []
+    for n in range(args.pages):
+        # Sizes spread evenly on a log scale
+        size = int(args.min_kb * 1024 * (args.max_kb / args.min_kb) ** rng.random())
+        corpus.append((f"page_{n:03d}", make_page(rng, size)))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=30, help="Generated pages")
+    parser.add_argument("--min-kb", type=float, default=20, help="Smallest generated page")
+    parser.add_argument("--max-kb", type=float, default=4000, help="Largest generated page")
+    parser.add_argument("--dir", help="Use the .html files under this directory instead")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")  # bs4 warnings about odd markup, same for every engine
+    
+    corpus = load_corpus(args)
+    total_mb = sum(len(html) for _, html in corpus) / 1e6
+    sizes = sorted(len(html) for _, html in corpus)
+    print(f"Corpus: {len(corpus)} pages, {total_mb:.1f} MB "
+          f"({sizes[0] / 1024:.0f} KB to {sizes[-1] / 1024:.0f} KB)")
+    installed = available_engines()
+    missing = [engine for engine in ENGINES if engine not in installed]
+    if missing:
+        print(f"Not installed (skipped): {', '.join(missing)}")
+    
+    results = {}
+    for engine in ["bs4"] + [engine for engine in installed if engine != "bs4"]:
+        outputs, timings = [], []
+        for _, html in corpus:
+            started = time.perf_counter()
+            outputs.append(extract_html(html, engine))
+            timings.append(time.perf_counter() - started)
+        results[engine] = (outputs, timings)
+    
+    reference = results["bs4"][0]
+    print(f"\n  {'engine':<12}{'ms/page':>10}{'median ms':>11}{'MB/sec':>9}{'speedup':>10}{'identical':>11}")
+    bs4_seconds = sum(results["bs4"][1])
+    failed = False
+    for engine, (outputs, timings) in results.items():
+        seconds = sum(timings)
+        identical = sum(a == b for a, b in zip(outputs, reference)) / len(reference)
+        # The default engine promises the reference output exactly
+        failed = failed or (engine == "htmlparser" and identical < 1)
+        print(f"  {engine:<12}{seconds / len(timings) * 1000:>10.1f}{sorted(timings)[len(timings) // 2] * 1000:>11.1f}"
+              f"{total_mb / seconds:>9.2f}{bs4_seconds / seconds:>9.2f}x{identical:>10.0%}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
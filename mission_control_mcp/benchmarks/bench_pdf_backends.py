@@ -0,0 +1,97 @@
+"""
+Benchmark: PDF text extraction backends (utils.pdf_backends)
+
+Generates a fixed synthetic corpus (same seed every run), then extracts
+every page with each installed backend in a fresh process, serially and
+without the extracted-text cache. Reports pages/sec, peak resident
+memory of the process, and the share of pages whose words match the
+PyPDF2 reference (whitespace differences are ignored).
+
+Backends that are not installed are listed and skipped. Install the
+optional ones with: pip install pypdfium2 pdfminer.six pypdf
+
+Run: python benchmarks/bench_pdf_backends.py [--docs 20] [--pages 100] [--lines 40]
+"""
+
+import sys
+import os
+import json
+import time
+import zlib
+import argparse
+import resource
+import subprocess
+import tempfile
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+
+from bench_pdf_extract import write_text_pdf
+from utils.pdf_backends import BACKENDS, available_backends, backend_version, open_document
+
+
+def run_backend(backend: str, paths: list) -> dict:
+    """Child process: extract the corpus with one backend"""
+    from tools.pdf_reader import _extract_page
+    
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    pages = 0
+    fingerprints = []
+    for path in paths:
+        with open_document(path, backend) as document:
+            for page_num in range(1, document.page_count + 1):
+                text = _extract_page(document, page_num) or ""
+                fingerprints.append(zlib.crc32(" ".join(text.split()).encode("utf-8")))
+                pages += 1
+    seconds = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"pages": pages, "seconds": seconds, "peak_mb": peak_kb / 1024,
+            "growth_mb": (peak_kb - baseline_kb) / 1024, "fingerprints": fingerprints}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20, help="PDFs in the corpus")
+    parser.add_argument("--pages", type=int, default=100, help="Pages per PDF")
+    parser.add_argument("--lines", type=int, default=40, help="Text lines per page")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(run_backend(args.child, args.paths)))
+        return
+    
+    installed = available_backends()
+    missing = [backend for backend in BACKENDS if backend not in installed]
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for doc in range(args.docs):
+            paths.append(os.path.join(tmp, f"doc_{doc:03d}.pdf"))
+            write_text_pdf(paths[-1], args.pages, args.lines, seed=doc)
+        total_mb = sum(os.path.getsize(path) for path in paths) / 1e6
+        print(f"Corpus: {args.docs} PDFs x {args.pages} pages ({total_mb:.1f} MB)")
+        if missing:
+            print(f"Not installed (skipped): {', '.join(missing)}")
+        
+        results = {}
+        env = dict(os.environ, MISSION_CONTROL_PDF_CACHE="0")
+        for backend in installed:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", backend, "--paths", *paths],
+                                    env=env, capture_output=True, text=True, check=True).stdout
+            results[backend] = json.loads(output.strip().splitlines()[-1])
+    
+    reference = results["pypdf2"]["fingerprints"]
+    print(f"\n  {'backend':<26}{'pages/sec':>11}{'peak MB':>10}{'growth MB':>11}{'same words':>12}")
+    for backend, result in results.items():
+        same = sum(a == b for a, b in zip(result["fingerprints"], reference)) / max(len(reference), 1)
+        label = f"{backend} {backend_version(backend)}"
+        print(f"  {label:<26}{result['pages'] / result['seconds']:>11.1f}{result['peak_mb']:>10.1f}"
+              f"{result['growth_mb']:>11.1f}{same:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: serial vs parallel page extraction in read_pdf
+
+Generates a large text-only PDF (written directly, no PDF library
+needed), extracts it with the serial path and with process pools of
+several sizes, checks that every run returns the same text and reports
+pages/sec and speedup over serial.
+
+Speedup is bounded by the number of CPU cores. Each pool size runs once
+untimed first, so worker start-up is not counted.
+
+Run: python benchmarks/bench_pdf_extract.py [--pages 1500] [--workers 2,4,8] [--lines 40]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+import tempfile
+
+import numpy as np
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+# Measure extraction: the text cache would turn every run after the first into a cache read
+os.environ.setdefault("MISSION_CONTROL_PDF_CACHE", "0")
+
+from tools.pdf_reader import read_pdf
+
+logging.basicConfig(level=logging.WARNING)
+
+WORDS = (
+    "agreement party contractor clause liability termination notice payment schedule "
+    "warranty indemnity confidential obligation delivery acceptance invoice amendment "
+    "governing law jurisdiction force majeure breach remedy assignment subcontractor"
+).split()
+
+
+def write_text_pdf(path: str, pages: int, lines_per_page: int = 40, seed: int = 0) -> None:
+    """
+    Write a minimal PDF with lines of text in Helvetica on every page.
+    
+    Args:
+        path: Output file
+        pages: Number of pages
+        lines_per_page: Text lines per page
+        seed: Seed for the generated words
+    """
+    rng = np.random.default_rng(seed)
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a page and its content stream per page
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for page in range(pages):
+        page_obj, content_obj = 4 + 2 * page, 5 + 2 * page
+        kids.append(f"{page_obj} 0 R")
+        lines = [f"BT /F1 10 Tf 50 {760 - 18 * i} Td ({page + 1}.{i + 1} "
+                 f"{' '.join(rng.choice(WORDS, 9))}) Tj ET" for i in range(lines_per_page)]
+        stream = "\n".join(lines).encode("latin-1")
+        objects[page_obj] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                             f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_obj} 0 R >>").encode()
+        objects[content_obj] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+    
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = {}
+        for number in sorted(objects):
+            offsets[number] = f.tell()
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, objects[number]))
+        xref = f.tell()
+        count = len(objects) + 1
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+        for number in range(1, count):
+            f.write(b"%010d 00000 n \n" % offsets[number])
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref))
+
+
+def timed_read(path: str, workers: int) -> tuple:
+    started = time.perf_counter()
+    result = read_pdf(path, workers=workers)
+    return time.perf_counter() - started, result["text"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1500, help="Pages in the generated PDF")
+    parser.add_argument("--lines", type=int, default=40, help="Text lines per page")
+    parser.add_argument("--workers", default="2,4,8", help="Comma-separated worker counts")
+    args = parser.parse_args()
+    
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.pdf")
+        write_text_pdf(path, args.pages, args.lines)
+        print(f"Generated {args.pages} pages ({os.path.getsize(path) / 1e6:.1f} MB), "
+              f"{os.cpu_count()} CPUs")
+        
+        serial_seconds, reference = timed_read(path, workers=1)
+        print(f"\n  {'mode':<12}{'seconds':>10}{'pages/sec':>12}{'speedup':>10}")
+        print(f"  {'serial':<12}{serial_seconds:>10.2f}{args.pages / serial_seconds:>12.1f}{1.0:>9.2f}x")
+        
+        failed = False
+        for workers in worker_counts:
+            timed_read(path, workers)  # start the pool outside the measurement
+            seconds, text = timed_read(path, workers)
+            same = text == reference
+            failed = failed or not same
+            print(f"  {f'{workers} workers':<12}{seconds:>10.2f}{args.pages / seconds:>12.1f}"
+                  f"{serial_seconds / seconds:>9.2f}x{'' if same else '  TEXT MISMATCH'}")
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
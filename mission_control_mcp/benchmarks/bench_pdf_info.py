@@ -0,0 +1,85 @@
+"""
+Benchmark: metadata-only PDF inspection vs a full page-tree parse
+
+Generates a directory of PDFs, then times triage three ways: opening each
+file with PdfReader and counting reader.pages (the old get_pdf_info),
+get_pdf_info (trailer, xref and Info only) serially, and
+inspect_pdf_directory with a process pool. Page counts of every method
+must agree.
+
+Run: python benchmarks/bench_pdf_info.py [--files 1000] [--pages 200] [--workers 4]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+import tempfile
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+
+from bench_pdf_extract import write_text_pdf
+from tools.pdf_reader import get_pdf_info, inspect_pdf_directory
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def full_parse_counts(paths: list) -> list:
+    from PyPDF2 import PdfReader
+    
+    return [len(PdfReader(path).pages) for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000, help="PDFs in the generated directory")
+    parser.add_argument("--pages", type=int, default=200, help="Pages per PDF")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes for the directory scan")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # One generated file copied under many names: generation is slower than inspection
+        template = os.path.join(tmp, "template.pdf")
+        write_text_pdf(template, args.pages, lines_per_page=2)
+        with open(template, "rb") as f:
+            data = f.read()
+        os.remove(template)
+        paths = []
+        for i in range(args.files):
+            paths.append(os.path.join(tmp, f"upload_{i:05d}.pdf"))
+            with open(paths[-1], "wb") as f:
+                f.write(data)
+        print(f"Generated {args.files} PDFs of {args.pages} pages, {os.cpu_count()} CPUs")
+        
+        started = time.perf_counter()
+        reference = full_parse_counts(paths)
+        full_seconds = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        serial = [get_pdf_info(path)["page_count"] for path in paths]
+        serial_seconds = time.perf_counter() - started
+        
+        inspect_pdf_directory(tmp, workers=args.workers)  # start the pool outside the measurement
+        started = time.perf_counter()
+        scan = inspect_pdf_directory(tmp, workers=args.workers)
+        scan_seconds = time.perf_counter() - started
+        parallel = [info["page_count"] for info in scan["files"]]
+        
+        print(f"\n  {'method':<28}{'seconds':>10}{'files/sec':>12}")
+        for label, seconds in (("full parse (reader.pages)", full_seconds),
+                               ("get_pdf_info, serial", serial_seconds),
+                               (f"directory, {args.workers} workers", scan_seconds)):
+            print(f"  {label:<28}{seconds:>10.2f}{args.files / seconds:>12.1f}")
+    
+    same = serial == reference and parallel == reference
+    if not same:
+        print("\nPAGE COUNT MISMATCH")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: recall vs latency of approximate RAG index modes
+
+Builds a flat (exact) store and IVF-Flat, IVF-PQ and HNSW stores over the
+same synthetic clustered embeddings, then reports recall@k against the
+flat results and mean query latency for a sweep of nprobe / efSearch
+values. Use the output to pick an index_type and search setting.
+
+Run: python benchmarks/bench_rag_ann.py [--docs 100000] [--queries 500] [--dim 384] [--top-k 10]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+
+import numpy as np
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+
+from utils.rag_utils import SimpleRAGStore
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def make_corpus(docs: int, queries: int, dim: int, clusters: int = 200, seed: int = 0):
+    """Clustered unit vectors, closer to sentence embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, clusters, docs + queries)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((docs + queries, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors[:docs], vectors[docs:]
+
+
+def build(index_type: str, corpus: np.ndarray, batch: int = 10_000, **options) -> tuple:
+    """Build a store in batches, as ingestion would, and return (store, seconds)"""
+    store = SimpleRAGStore(use_cache=False, index_type=index_type, **options)
+    started = time.perf_counter()
+    for start in range(0, len(corpus), batch):
+        block = corpus[start:start + batch]
+        store.add_embeddings([""] * len(block), block)
+    return store, time.perf_counter() - started
+
+
+def measure(store: SimpleRAGStore, queries: np.ndarray, top_k: int, truth: np.ndarray = None,
+            **search_options) -> tuple:
+    """Return (recall@k, ms per query, indices) searching one query at a time"""
+    found = np.empty((len(queries), top_k), dtype=np.int64)
+    started = time.perf_counter()
+    for i in range(len(queries)):
+        _, indices = store.search_embeddings(queries[i:i + 1], top_k, **search_options)
+        found[i] = indices[0]
+    ms_per_query = (time.perf_counter() - started) * 1000 / len(queries)
+    
+    if truth is None:
+        return 1.0, ms_per_query, found
+    hits = sum(len(set(found[i]) & set(truth[i])) for i in range(len(queries)))
+    return hits / truth.size, ms_per_query, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark approximate RAG index modes")
+    parser.add_argument("--docs", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours per query")
+    args = parser.parse_args()
+    
+    corpus, queries = make_corpus(args.docs, args.queries, args.dim)
+    threshold = min(10_000, args.docs)
+    
+    print(f"Corpus: {args.docs:,} x {args.dim}  queries: {args.queries}  top_k: {args.top_k}\n")
+    print(f"{'index':<10} {'setting':<14} {'build s':>8} {'recall@k':>9} {'ms/query':>9} {'speedup':>8}")
+    print("-" * 62)
+    
+    flat, flat_build = build("flat", corpus)
+    _, flat_ms, truth = measure(flat, queries, args.top_k)
+    print(f"{'flat':<10} {'exact':<14} {flat_build:8.2f} {1.0:9.3f} {flat_ms:9.3f} {1.0:7.1f}x")
+    
+    sweeps = [
+        ("ivf_flat", "nprobe", [1, 4, 8, 16, 64]),
+        ("ivf_pq", "nprobe", [1, 4, 8, 16, 64]),
+        ("hnsw", "ef_search", [16, 32, 64, 128, 256]),
+    ]
+    for index_type, knob, values in sweeps:
+        store, build_s = build(index_type, corpus, train_threshold=threshold)
+        for value in values:
+            recall, ms, _ = measure(store, queries, args.top_k, truth, **{knob: value})
+            setting = f"{knob}={value}"
+            print(f"{index_type:<10} {setting:<14} {build_s:8.2f} {recall:9.3f} {ms:9.3f} {flat_ms / ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
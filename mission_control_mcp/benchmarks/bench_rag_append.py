@@ -0,0 +1,105 @@
+"""
+Benchmark: incremental appends to SimpleRAGStore
+
+Appends 100k documents in batches of 1k using precomputed random
+embeddings (no model load) and reports per-batch latency. With the
+incremental append path the latency should stay flat as the store grows.
+
+Each batch is then saved the way add_to_collection does (an incremental
+save into one directory, which writes an append segment until the store
+is due for a full rewrite), and the last batches are also timed with full
+saves for comparison.
+
+Run: python benchmarks/bench_rag_append.py [--total 100000] [--batch 1000] [--dim 384] [--no-save]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+import shutil
+import statistics
+import tempfile
+
+import numpy as np
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+
+from utils.rag_utils import SimpleRAGStore
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SimpleRAGStore appends")
+    parser.add_argument("--total", type=int, default=100_000, help="Total documents to append")
+    parser.add_argument("--batch", type=int, default=1_000, help="Documents per append call")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--no-save", action="store_true", help="Only time the in-memory appends")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    store = SimpleRAGStore(use_cache=False)
+    latencies = []
+    save_latencies = []
+    full_saves = 0
+    directory = tempfile.mkdtemp(prefix="bench_rag_append_")
+    path = os.path.join(directory, "store")
+    
+    for start in range(0, args.total, args.batch):
+        count = min(args.batch, args.total - start)
+        documents = [f"document {start + i}" for i in range(count)]
+        embeddings = rng.standard_normal((count, args.dim), dtype=np.float32)
+        
+        t0 = time.perf_counter()
+        store.add_embeddings(documents, embeddings)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        
+        if not args.no_save:
+            t0 = time.perf_counter()
+            store.save(path, incremental=True)
+            save_latencies.append((time.perf_counter() - t0) * 1000)
+            if not os.path.isdir(os.path.join(path, "appends")):
+                full_saves += 1
+    
+    full_save_latencies = []
+    if not args.no_save:
+        # The cost every save had before append segments: rewrite the whole store
+        for _ in range(3):
+            t0 = time.perf_counter()
+            store.save(path)
+            full_save_latencies.append((time.perf_counter() - t0) * 1000)
+        shutil.rmtree(directory)
+    
+    batches = len(latencies)
+    tenth = max(batches // 10, 1)
+    first = statistics.median(latencies[:tenth])
+    last = statistics.median(latencies[-tenth:])
+    
+    print(f"Appended {len(store.documents):,} documents in {batches} batches of {args.batch}")
+    print(f"Index size:             {store.index.ntotal:,} vectors")
+    print(f"Total time:             {sum(latencies):.1f} ms")
+    print(f"Median batch latency:   {statistics.median(latencies):.3f} ms")
+    print(f"First 10% median:       {first:.3f} ms")
+    print(f"Last 10% median:        {last:.3f} ms")
+    print(f"Last / first ratio:     {last / first:.2f}x")
+    if save_latencies:
+        print()
+        print(f"Incremental saves:      {sum(save_latencies):.1f} ms total, "
+              f"{full_saves} of {batches} rewrote the store")
+        print(f"Median save latency:    {statistics.median(save_latencies):.3f} ms")
+        print(f"Last 10% save median:   {statistics.median(save_latencies[-tenth:]):.3f} ms")
+        print(f"Full save of the store: {statistics.median(full_save_latencies):.3f} ms "
+              f"(~{statistics.median(full_save_latencies) * batches / 1000:.1f} s if every batch rewrote it)")
+    print()
+    print("Per-batch latency (every 10th batch):")
+    for i in range(0, batches, 10):
+        saved = f"  save {save_latencies[i]:8.3f} ms" if save_latencies else ""
+        print(f"  batch {i + 1:4d}  docs {(i + 1) * args.batch:7,d}  {latencies[i]:8.3f} ms{saved}")
+
+
+if __name__ == "__main__":
+    main()
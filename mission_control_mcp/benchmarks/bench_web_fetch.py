@@ -0,0 +1,107 @@
+"""
+Benchmark: serial vs concurrent URL fetching in web_fetcher
+
+Starts several local HTTP servers (each one stands in for a host) that
+answer every request with a generated HTML page after a fixed latency,
+then fetches the same URL list one at a time and with fetch_multiple_urls
+at a few concurrency settings. Checks that every run returns the same
+results in input order and reports URLs/sec and the number of TCP
+connections the servers accepted (keep-alive reuses them).
+
+Run: python benchmarks/bench_web_fetch.py [--urls 200] [--hosts 4] [--latency-ms 50]
+"""
+
+import sys
+import os
+import time
+import argparse
+import logging
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Setup paths
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+# Measure the network path: cached parse results would speed up every run after the first
+os.environ.setdefault("MISSION_CONTROL_HTTP_CACHE", "0")
+
+from tools.web_fetcher import fetch_multiple_urls
+
+logging.basicConfig(level=logging.WARNING)
+
+WORDS = "mission control fetch latency pool socket host page server client request response".split()
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    latency = 0.05
+    connections = 0
+    lock = threading.Lock()
+    
+    def setup(self):
+        super().setup()
+        with PageHandler.lock:
+            PageHandler.connections += 1
+    
+    def do_GET(self):
+        time.sleep(self.latency)
+        rng = np.random.default_rng(zlib.crc32(self.path.encode()))
+        paragraphs = "".join(f"<p>{' '.join(rng.choice(WORDS, 60))}</p>" for _ in range(20))
+        body = (f"<html><head><title>Page {self.path}</title></head><body><h1>{self.path}</h1>"
+                f"{paragraphs}<a href='/next{self.path}'>next</a></body></html>").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+def strip_volatile(results: list) -> list:
+    """Results without per-request fields (timestamps, Date headers)"""
+    return [(r["index"], r["success"], r["title"], r["content"], r["links"]) for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=200, help="URLs to fetch")
+    parser.add_argument("--hosts", type=int, default=4, help="Local servers the URLs are spread over")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Server response latency")
+    args = parser.parse_args()
+    
+    PageHandler.latency = args.latency_ms / 1000
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), PageHandler) for _ in range(args.hosts)]
+    for server in servers:
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{servers[i % args.hosts].server_port}/page/{i}" for i in range(args.urls)]
+    print(f"{args.urls} URLs over {args.hosts} local hosts, {args.latency_ms:.0f} ms latency")
+    
+    runs = [("serial", 1, 1), ("8 / 2 per host", 8, 2), ("16 / 4 per host", 16, 4), ("32 / 8 per host", 32, 8)]
+    print(f"\n  {'concurrency':<18}{'seconds':>10}{'URLs/sec':>11}{'speedup':>10}{'connections':>13}")
+    reference, serial_seconds, failed = None, None, False
+    for label, concurrency, per_host in runs:
+        PageHandler.connections = 0
+        started = time.perf_counter()
+        results = fetch_multiple_urls(urls, concurrency=concurrency, per_host=per_host)
+        seconds = time.perf_counter() - started
+        comparable = strip_volatile(results)
+        if reference is None:
+            reference, serial_seconds = comparable, seconds
+        same = comparable == reference and all(r["success"] for r in results)
+        failed = failed or not same
+        print(f"  {label:<18}{seconds:>10.2f}{args.urls / seconds:>11.1f}{serial_seconds / seconds:>9.2f}x"
+              f"{PageHandler.connections:>13}{'' if same else '  RESULT MISMATCH'}")
+    
+    for server in servers:
+        server.shutdown()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
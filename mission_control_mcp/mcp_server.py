@@ -15,10 +15,29 @@ from mcp.server import Server
 from mcp.types import Tool, TextContent
 
 # Import tool functions
-from tools.pdf_reader import read_pdf
+from tools.pdf_reader import (
+    read_pdf,
+    get_pdf_info,
+    inspect_pdf_directory,
+    get_pdf_cache_stats,
+    DEFAULT_RESPONSE_CHARS
+)
 from tools.text_extractor import extract_text
-from tools.web_fetcher import fetch_web_content
-from tools.rag_search import search_documents
+from tools.web_fetcher import fetch_web_content, fetch_urls_async, get_web_cache_stats
+from tools.rag_search import (
+    search_documents,
+    multi_query_search,
+    build_knowledge_base,
+    add_to_knowledge_base,
+    search_knowledge_base,
+    list_knowledge_bases,
+    get_embedding_cache_stats,
+    get_embedding_model_stats,
+    get_memory_report
+)
+from utils.embedding_models import get_model_registry, WARM_UP_ON_START
+from tools.ingest import ingest
+from tools.crawler import crawl_async
 from tools.data_visualizer import visualize_data
 from tools.file_converter import convert_file
 from tools.email_intent_classifier import classify_email_intent
@@ -36,18 +55,76 @@ app = Server("mission-control-mcp")
 TOOLS = [
     Tool(
         name="pdf_reader",
-        description="Extract text and metadata from PDF files. Reads all pages and extracts document information.",
+        description="Extract text and metadata from PDF files. Returns up to max_chars of text per call; when next_cursor is set, call again with that cursor to read the following pages.",
         inputSchema={
             "type": "object",
             "properties": {
                 "file_path": {
                     "type": "string",
                     "description": "Path to the PDF file to read"
+                },
+                "workers": {
+                    "type": "integer",
+                    "description": "Worker processes for page extraction of large PDFs (1 = serial; default: server setting)"
+                },
+                "page_start": {
+                    "type": "integer",
+                    "description": "First page to read (1-based)",
+                    "default": 1
+                },
+                "page_end": {
+                    "type": "integer",
+                    "description": "Last page to read, inclusive (default: last page)"
+                },
+                "max_chars": {
+                    "type": "integer",
+                    "description": "Maximum characters of text to return",
+                    "default": 100000
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "next_cursor from a previous call, to continue where it stopped"
+                },
+                "backend": {
+                    "type": "string",
+                    "description": "Text extraction library (default: server setting, 'auto' = fastest installed)",
+                    "enum": ["auto", "pypdfium2", "pdfminer", "pypdf", "pypdf2"]
                 }
             },
             "required": ["file_path"]
         }
     ),
+    Tool(
+        name="pdf_info",
+        description="Inspect a PDF, or every PDF in a directory, without extracting text: page count, PDF version, encryption and document metadata. Reads only the trailer, cross-reference table and Info dictionary, so thousands of files can be triaged quickly.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "PDF file or directory of PDFs"
+                },
+                "recursive": {
+                    "type": "boolean",
+                    "description": "For a directory, include subdirectories",
+                    "default": True
+                },
+                "workers": {
+                    "type": "integer",
+                    "description": "Worker processes for inspecting a directory (1 = serial; default: server setting)"
+                }
+            },
+            "required": ["path"]
+        }
+    ),
+    Tool(
+        name="pdf_cache_stats",
+        description="Report extracted-text cache hits, misses, hit rate and bytes saved for PDF reads in this server process.",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
     Tool(
         name="text_extractor",
         description="Process and extract information from text. Supports cleaning, summarization, chunking, and keyword extraction.",
@@ -87,11 +164,125 @@ TOOLS = [
                     "type": "boolean",
                     "description": "Extract only text content (removes HTML)",
                     "default": True
+                },
+                "use_cache": {
+                    "type": "boolean",
+                    "description": "Serve from the HTTP cache when allowed (False always downloads)",
+                    "default": True
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": "Stop reading the body after this many bytes (default: server setting, 10 MB)"
                 }
             },
             "required": ["url"]
         }
     ),
+    Tool(
+        name="web_cache_stats",
+        description="Report HTTP cache hits, 304 revalidations, misses, parsed-text hits and bytes saved for web fetches in this server process.",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
+    Tool(
+        name="web_fetch_batch",
+        description="Fetch many web URLs concurrently over pooled keep-alive connections. Returns one web_fetcher result per URL, in input order, with success/error per URL.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "urls": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "URLs to fetch"
+                },
+                "extract_text_only": {
+                    "type": "boolean",
+                    "description": "Extract only text content (removes HTML)",
+                    "default": True
+                },
+                "concurrency": {
+                    "type": "integer",
+                    "description": "Requests in flight at once (default: server setting, 16)"
+                },
+                "per_host": {
+                    "type": "integer",
+                    "description": "Requests in flight to one host (default: server setting, 4)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Request timeout in seconds, per URL",
+                    "default": 30
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": "Stop reading a body after this many bytes (default: server setting, 10 MB)"
+                }
+            },
+            "required": ["urls"]
+        }
+    ),
+    Tool(
+        name="crawl",
+        description="Crawl a web site breadth-first from one or more start URLs, following links up to a page and depth budget. Honours robots.txt (including Crawl-delay) and spaces requests to each host. With a collection_id, pages are ingested into a RAG collection while the crawl runs.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "start_urls": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "URLs to start from"
+                },
+                "max_pages": {
+                    "type": "integer",
+                    "description": "Most pages to fetch",
+                    "default": 100
+                },
+                "max_depth": {
+                    "type": "integer",
+                    "description": "Most link hops from a start URL",
+                    "default": 3
+                },
+                "scope": {
+                    "type": "string",
+                    "description": "Links to follow: below the start URL's directory, on the same host, on the domain and its subdomains, or any",
+                    "enum": ["prefix", "host", "domain", "any"],
+                    "default": "prefix"
+                },
+                "delay": {
+                    "type": "number",
+                    "description": "Seconds between requests to one host (default: server setting, 0.25)"
+                },
+                "concurrency": {
+                    "type": "integer",
+                    "description": "Pages fetched at once (default: server setting, 16)"
+                },
+                "per_host": {
+                    "type": "integer",
+                    "description": "Pages fetched at once from one host (default: server setting, 4)"
+                },
+                "respect_robots": {
+                    "type": "boolean",
+                    "description": "Skip URLs disallowed by robots.txt",
+                    "default": True
+                },
+                "collection_id": {
+                    "type": "string",
+                    "description": "RAG collection to ingest the pages into (created if missing)"
+                },
+                "include_content": {
+                    "type": "boolean",
+                    "description": "Return the text of each page (default: only without a collection_id)"
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": "Stop reading a page after this many bytes (default: server setting, 10 MB)"
+                }
+            },
+            "required": ["start_urls"]
+        }
+    ),
     Tool(
         name="rag_search",
         description="Semantic search using RAG (Retrieval Augmented Generation). Finds relevant documents using vector embeddings.",
@@ -111,11 +302,335 @@ TOOLS = [
                     "type": "integer",
                     "description": "Number of top results to return",
                     "default": 3
+                },
+                "retrieval": {
+                    "type": "string",
+                    "description": "'dense' (embeddings), 'sparse' (BM25 keywords/exact ids, no model load) or 'hybrid' (both, reciprocal-rank fused)",
+                    "enum": ["dense", "sparse", "hybrid"],
+                    "default": "dense"
+                },
+                "metric": {
+                    "type": "string",
+                    "description": "'l2' (score = 1/(1+distance)) or 'cosine' (normalized embeddings, score = cosine similarity)",
+                    "enum": ["l2", "cosine"],
+                    "default": "l2"
+                },
+                "min_score": {
+                    "type": "number",
+                    "description": "Only return results scoring at least this value (pruned inside the index)"
+                },
+                "dedup_threshold": {
+                    "type": "number",
+                    "description": "Skip near-duplicate documents (estimated Jaccard similarity of word 3-grams at or above this value, e.g. 0.85) before embedding"
+                },
+                "mmr_lambda": {
+                    "type": "number",
+                    "description": "Diversify results with maximal marginal relevance: 1.0 = relevance only, lower values favour results unlike those already returned (e.g. 0.5)"
                 }
             },
             "required": ["query", "documents"]
         }
     ),
+    Tool(
+        name="rag_multi_search",
+        description="Run many semantic search queries in one batch over documents or a persistent collection. All queries are embedded together and searched in a single index call.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "queries": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Search queries"
+                },
+                "documents": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Documents to search (omit when using collection_id)"
+                },
+                "collection_id": {
+                    "type": "string",
+                    "description": "Persistent collection to search instead of documents"
+                },
+                "top_k": {
+                    "type": "integer",
+                    "description": "Number of top results per query",
+                    "default": 3
+                },
+                "retrieval": {
+                    "type": "string",
+                    "description": "'dense' (embeddings), 'sparse' (BM25 keywords/exact ids, no model load) or 'hybrid' (both, reciprocal-rank fused)",
+                    "enum": ["dense", "sparse", "hybrid"],
+                    "default": "dense"
+                },
+                "metric": {
+                    "type": "string",
+                    "description": "Scoring for ad-hoc documents: 'l2' or 'cosine'",
+                    "enum": ["l2", "cosine"],
+                    "default": "l2"
+                },
+                "min_score": {
+                    "type": "number",
+                    "description": "Only return results scoring at least this value"
+                }
+            },
+            "required": ["queries"]
+        }
+    ),
+    Tool(
+        name="rag_create_collection",
+        description="Create a persistent, named RAG collection. Documents are embedded once and saved to disk so later queries do not re-index them.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "documents": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Documents to index"
+                },
+                "metadata": {
+                    "type": "array",
+                    "items": {"type": "object"},
+                    "description": "Optional provenance per document: source, page, start, end, ingested_at"
+                },
+                "collection_id": {
+                    "type": "string",
+                    "description": "Collection name (letters, digits, '_', '-', '.'); generated if omitted"
+                },
+                "overwrite": {
+                    "type": "boolean",
+                    "description": "Replace an existing collection with the same id",
+                    "default": False
+                },
+                "index_type": {
+                    "type": "string",
+                    "description": "Vector index: exact 'flat', or approximate 'ivf_flat', 'ivf_pq', 'hnsw' for large corpora",
+                    "enum": ["flat", "ivf_flat", "ivf_pq", "hnsw"],
+                    "default": "flat"
+                },
+                "storage": {
+                    "type": "string",
+                    "description": "Embedding storage: 'float32', or a single quantized copy in the index with 'float16' / 'int8' for large corpora",
+                    "enum": ["float32", "float16", "int8"],
+                    "default": "float32"
+                },
+                "backend": {
+                    "type": "string",
+                    "description": "Embedding backend: 'torch', or the same model on CPU via onnxruntime with 'onnx' / 'onnx_int8' (faster indexing). Defaults to the server setting",
+                    "enum": ["torch", "onnx", "onnx_int8"]
+                },
+                "dedup_threshold": {
+                    "type": "number",
+                    "description": "Skip near-duplicate documents (estimated Jaccard similarity of word 3-grams at or above this value, e.g. 0.85) before embedding"
+                },
+                "retrieval": {
+                    "type": "string",
+                    "description": "'dense' (embeddings), 'sparse' (BM25 keywords/exact ids, no model load) or 'hybrid' (both, reciprocal-rank fused)",
+                    "enum": ["dense", "sparse", "hybrid"],
+                    "default": "dense"
+                },
+                "metric": {
+                    "type": "string",
+                    "description": "'l2' (score = 1/(1+distance)) or 'cosine' (normalized embeddings, score = cosine similarity)",
+                    "enum": ["l2", "cosine"],
+                    "default": "l2"
+                },
+                "train_threshold": {
+                    "type": "integer",
+                    "description": "Corpus size at which IVF indexes are trained (exact search below it)",
+                    "default": 10000
+                },
+                "nprobe": {
+                    "type": "integer",
+                    "description": "Default IVF clusters visited per query",
+                    "default": 8
+                },
+                "ef_search": {
+                    "type": "integer",
+                    "description": "Default HNSW candidate list size per query",
+                    "default": 64
+                }
+            },
+            "required": ["documents"]
+        }
+    ),
+    Tool(
+        name="rag_add_documents",
+        description="Append documents to an existing RAG collection. Only the new documents are embedded.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "collection_id": {
+                    "type": "string",
+                    "description": "Collection name"
+                },
+                "documents": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Documents to append"
+                },
+                "metadata": {
+                    "type": "array",
+                    "items": {"type": "object"},
+                    "description": "Optional provenance per document: source, page, start, end, ingested_at"
+                }
+            },
+            "required": ["collection_id", "documents"]
+        }
+    ),
+    Tool(
+        name="rag_query_collection",
+        description="Semantic search over a persistent RAG collection by id.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "collection_id": {
+                    "type": "string",
+                    "description": "Collection name"
+                },
+                "query": {
+                    "type": "string",
+                    "description": "Search query"
+                },
+                "top_k": {
+                    "type": "integer",
+                    "description": "Number of top results to return",
+                    "default": 3
+                },
+                "nprobe": {
+                    "type": "integer",
+                    "description": "Override IVF clusters visited (higher = better recall, slower)"
+                },
+                "ef_search": {
+                    "type": "integer",
+                    "description": "Override HNSW candidate list size (higher = better recall, slower)"
+                },
+                "min_score": {
+                    "type": "number",
+                    "description": "Only return results scoring at least this value (pruned inside the index)"
+                },
+                "mmr_lambda": {
+                    "type": "number",
+                    "description": "Diversify results with maximal marginal relevance: 1.0 = relevance only, lower values favour results unlike those already returned (e.g. 0.5)"
+                },
+                "filters": {
+                    "type": "object",
+                    "description": "Only search documents matching these metadata conditions",
+                    "properties": {
+                        "source": {
+                            "type": ["string", "array"],
+                            "items": {"type": "string"},
+                            "description": "Exact source path/URL, or a list of them"
+                        },
+                        "source_prefix": {"type": "string", "description": "Source prefix, e.g. a directory or site"},
+                        "page_min": {"type": "integer", "description": "Lowest page number (inclusive)"},
+                        "page_max": {"type": "integer", "description": "Highest page number (inclusive)"},
+                        "ingested_after": {"type": "string", "description": "Earliest ingest time (ISO-8601)"},
+                        "ingested_before": {"type": "string", "description": "Latest ingest time (ISO-8601)"}
+                    }
+                }
+            },
+            "required": ["collection_id", "query"]
+        }
+    ),
+    Tool(
+        name="rag_list_collections",
+        description="List persistent RAG collections and their document counts.",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
+    Tool(
+        name="rag_cache_stats",
+        description="Report embedding cache hits, misses and hit rate for RAG tools in this server process.",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
+    Tool(
+        name="ingest",
+        description="Ingest PDF/text/HTML files, directories or URLs into a persistent RAG collection: extraction, sentence-aware chunking and batched embedding run as a pipeline. Re-running resumes after an interruption and skips sources already ingested. Query the result with rag_query_collection.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "sources": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "File paths, directories or http(s) URLs"
+                },
+                "collection_id": {
+                    "type": "string",
+                    "description": "Collection to write to (created if missing)"
+                },
+                "recursive": {
+                    "type": "boolean",
+                    "description": "Descend into sub-directories",
+                    "default": True
+                },
+                "max_tokens": {
+                    "type": "integer",
+                    "description": "Token budget per chunk (default 200, fixed per collection)"
+                },
+                "overlap_tokens": {
+                    "type": "integer",
+                    "description": "Tokens of overlap between consecutive chunks (default 30, fixed per collection)"
+                },
+                "resume": {
+                    "type": "boolean",
+                    "description": "Skip sources and chunks already ingested into the collection (False is refused for a non-empty collection)",
+                    "default": True
+                },
+                "overwrite": {
+                    "type": "boolean",
+                    "description": "Replace the collection with a new, empty one first, e.g. after sources changed",
+                    "default": False
+                },
+                "index_type": {
+                    "type": "string",
+                    "description": "Vector index for a new collection",
+                    "enum": ["flat", "ivf_flat", "ivf_pq", "hnsw"]
+                },
+                "storage": {
+                    "type": "string",
+                    "description": "Embedding storage for a new collection",
+                    "enum": ["float32", "float16", "int8"]
+                },
+                "retrieval": {
+                    "type": "string",
+                    "description": "Retrieval mode for a new collection",
+                    "enum": ["dense", "sparse", "hybrid"]
+                },
+                "dedup_threshold": {
+                    "type": "number",
+                    "description": "For a new collection: skip chunks that nearly duplicate an indexed one (estimated Jaccard similarity of word 3-grams, e.g. 0.85)"
+                }
+            },
+            "required": ["sources", "collection_id"]
+        }
+    ),
+    Tool(
+        name="rag_model_stats",
+        description="Report embedding model load time, warm-up time, encode batch size, threads and throughput for RAG tools in this server process.",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
+    Tool(
+        name="rag_memory_report",
+        description="Report memory used by a RAG collection (bytes per document) and estimates for float32, float16 and int8 storage.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "collection_id": {
+                    "type": "string",
+                    "description": "Collection name"
+                }
+            },
+            "required": ["collection_id"]
+        }
+    ),
     Tool(
         name="data_visualizer",
         description="Create data visualizations and charts. Supports bar, line, pie, and scatter charts from JSON or CSV data.",
@@ -236,7 +751,28 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         result = None
         
         if name == "pdf_reader":
-            result = read_pdf(arguments["file_path"])
+            result = read_pdf(
+                arguments["file_path"],
+                workers=arguments.get("workers"),
+                page_start=arguments.get("page_start"),
+                page_end=arguments.get("page_end"),
+                max_chars=arguments.get("max_chars", DEFAULT_RESPONSE_CHARS),
+                cursor=arguments.get("cursor"),
+                backend=arguments.get("backend")
+            )
+            
+        elif name == "pdf_info":
+            if os.path.isdir(arguments["path"]):
+                result = inspect_pdf_directory(
+                    arguments["path"],
+                    recursive=arguments.get("recursive", True),
+                    workers=arguments.get("workers")
+                )
+            else:
+                result = get_pdf_info(arguments["path"])
+            
+        elif name == "pdf_cache_stats":
+            result = get_pdf_cache_stats()
             
         elif name == "text_extractor":
             result = extract_text(
@@ -248,16 +784,127 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         elif name == "web_fetcher":
             result = fetch_web_content(
                 url=arguments["url"],
-                extract_text_only=arguments.get("extract_text_only", True)
+                extract_text_only=arguments.get("extract_text_only", True),
+                use_cache=arguments.get("use_cache", True),
+                max_bytes=arguments.get("max_bytes")
             )
             
+        elif name == "web_cache_stats":
+            result = get_web_cache_stats()
+            
+        elif name == "web_fetch_batch":
+            # Awaited, so the server keeps serving other requests while the batch runs
+            result = await fetch_urls_async(
+                arguments["urls"],
+                extract_text_only=arguments.get("extract_text_only", True),
+                timeout=arguments.get("timeout", 30),
+                concurrency=arguments.get("concurrency"),
+                per_host=arguments.get("per_host"),
+                max_bytes=arguments.get("max_bytes")
+            )
+        
+        elif name == "crawl":
+            result = await crawl_async(
+                arguments["start_urls"],
+                max_pages=arguments.get("max_pages", 100),
+                max_depth=arguments.get("max_depth", 3),
+                scope=arguments.get("scope", "prefix"),
+                delay=arguments.get("delay"),
+                concurrency=arguments.get("concurrency"),
+                per_host=arguments.get("per_host"),
+                respect_robots=arguments.get("respect_robots", True),
+                collection_id=arguments.get("collection_id"),
+                include_content=arguments.get("include_content"),
+                max_bytes=arguments.get("max_bytes")
+            )
+        
         elif name == "rag_search":
             result = search_documents(
                 query=arguments["query"],
                 documents=arguments["documents"],
-                top_k=arguments.get("top_k", 3)
+                top_k=arguments.get("top_k", 3),
+                metric=arguments.get("metric", "l2"),
+                min_score=arguments.get("min_score"),
+                retrieval=arguments.get("retrieval", "dense"),
+                dedup_threshold=arguments.get("dedup_threshold"),
+                mmr_lambda=arguments.get("mmr_lambda")
+            )
+            
+        elif name == "rag_multi_search":
+            result = multi_query_search(
+                queries=arguments["queries"],
+                documents=arguments.get("documents"),
+                top_k=arguments.get("top_k", 3),
+                collection_id=arguments.get("collection_id"),
+                metric=arguments.get("metric", "l2"),
+                min_score=arguments.get("min_score"),
+                retrieval=arguments.get("retrieval", "dense")
+            )
+            
+        elif name == "rag_create_collection":
+            result = build_knowledge_base(
+                documents=arguments["documents"],
+                collection_id=arguments.get("collection_id"),
+                overwrite=arguments.get("overwrite", False),
+                index_type=arguments.get("index_type", "flat"),
+                metric=arguments.get("metric", "l2"),
+                retrieval=arguments.get("retrieval", "dense"),
+                storage=arguments.get("storage", "float32"),
+                train_threshold=arguments.get("train_threshold"),
+                nprobe=arguments.get("nprobe"),
+                ef_search=arguments.get("ef_search"),
+                backend=arguments.get("backend"),
+                dedup_threshold=arguments.get("dedup_threshold"),
+                metadata=arguments.get("metadata")
             )
             
+        elif name == "rag_add_documents":
+            result = add_to_knowledge_base(
+                collection_id=arguments["collection_id"],
+                documents=arguments["documents"],
+                metadata=arguments.get("metadata")
+            )
+            
+        elif name == "rag_query_collection":
+            result = search_knowledge_base(
+                collection_id=arguments["collection_id"],
+                query=arguments["query"],
+                top_k=arguments.get("top_k", 3),
+                nprobe=arguments.get("nprobe"),
+                ef_search=arguments.get("ef_search"),
+                min_score=arguments.get("min_score"),
+                filters=arguments.get("filters"),
+                mmr_lambda=arguments.get("mmr_lambda")
+            )
+            
+        elif name == "rag_list_collections":
+            result = list_knowledge_bases()
+            
+        elif name == "rag_cache_stats":
+            result = get_embedding_cache_stats()
+            
+        elif name == "ingest":
+            store_options = {
+                key: arguments[key] for key in ("index_type", "storage", "retrieval", "dedup_threshold")
+                if key in arguments
+            }
+            result = ingest(
+                sources=arguments["sources"],
+                collection_id=arguments["collection_id"],
+                recursive=arguments.get("recursive", True),
+                max_tokens=arguments.get("max_tokens"),
+                overlap_tokens=arguments.get("overlap_tokens"),
+                resume=arguments.get("resume", True),
+                overwrite=arguments.get("overwrite", False),
+                **store_options
+            )
+            
+        elif name == "rag_model_stats":
+            result = get_embedding_model_stats()
+            
+        elif name == "rag_memory_report":
+            result = get_memory_report(arguments["collection_id"])
+            
         elif name == "data_visualizer":
             result = visualize_data(
                 data=arguments["data"],
@@ -298,10 +945,22 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         return [TextContent(type="text", text=error_msg)]
 
 
+def _warm_up_model():
+    try:
+        get_model_registry().warm_up()
+    except Exception as e:
+        logger.warning(f"Embedding model warm-up failed: {e}")
+
+
 async def main():
     """Main entry point for the MCP server"""
     from mcp.server.stdio import stdio_server
     
+    if WARM_UP_ON_START:
+        # Load the embedding model in the background; early RAG calls wait for it
+        import threading
+        threading.Thread(target=_warm_up_model, name="embedding-warm-up", daemon=True).start()
+    
     async with stdio_server() as (read_stream, write_stream):
         logger.info("MissionControlMCP server starting...")
         await app.run(
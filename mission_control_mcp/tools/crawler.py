@@ -0,0 +1,477 @@
+"""
+Crawler Tool - Breadth-first crawl of a web site within a page and depth budget
+"""
+import time
+import queue
+import logging
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.web_fetcher import _get_session, _fetch_indexed, _run_coroutine, DEFAULT_CONCURRENCY, DEFAULT_PER_HOST
+from tools.ingest import ingest_texts, PAGE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PAGES = 100
+DEFAULT_MAX_DEPTH = 3
+# Seconds between request starts on one host; a longer robots.txt Crawl-delay wins (MISSION_CONTROL_CRAWL_DELAY)
+DEFAULT_DELAY = float(os.environ.get("MISSION_CONTROL_CRAWL_DELAY", "0.25"))
+# prefix: below the start URL's directory, host: same host, domain: host and its subdomains, any: no limit
+SCOPES = ("prefix", "host", "domain", "any")
+# robots.txt rules are reused for this long, across crawls
+ROBOTS_TTL_SECONDS = 3600
+ROBOTS_MAX_BYTES = 512 * 1024
+# Product token matched against robots.txt User-agent lines
+ROBOTS_AGENT = "MissionControlMCP"
+# Query parameters that only say where a visitor came from
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+# Links to these are not followed: they are not pages, and the fetcher skips binary bodies anyway
+SKIP_EXTENSIONS = (".pdf", ".zip", ".gz", ".tgz", ".tar", ".bz2", ".xz", ".7z", ".rar", ".exe", ".dmg",
+                   ".whl", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".bmp", ".mp3",
+                   ".mp4", ".webm", ".avi", ".mov", ".wav", ".ogg", ".css", ".js", ".woff", ".woff2",
+                   ".ttf", ".eot")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _remove_dot_segments(path: str) -> str:
+    """RFC 3986 section 5.2.4, keeping empty segments and the trailing slash"""
+    output = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    if path.endswith(("/.", "/..")):
+        output.append("")
+    return "/".join(output)
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Canonical form of a link, so that each page is crawled once.
+    
+    Resolves the link against base, drops the fragment, credentials and
+    tracking parameters, lowercases scheme and host, removes the default
+    port and dot segments, and sorts the query parameters.
+    
+    Args:
+        url: Link as found in a page, or an absolute URL
+        base: URL of the page the link is on
+    
+    Returns:
+        Normalized URL, or None if it is not an http(s) URL
+    """
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = parts.hostname
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    
+    netloc = f"[{host}]" if ":" in host else host
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc += f":{port}"
+    path = _remove_dot_segments(parts.path) or "/"
+    params = [param for param in parts.query.split("&")
+              if param and not param.split("=", 1)[0].lower().startswith(TRACKING_PARAMS)]
+    return urlunsplit((scheme, netloc, path, "&".join(sorted(params)), ""))
+
+
+def _in_scope(url: str, roots: List[str], scope: str) -> bool:
+    """Whether url is inside the crawl that started at roots"""
+    if scope == "any":
+        return True
+    parts = urlsplit(url)
+    for root in roots:
+        root_parts = urlsplit(root)
+        if scope == "prefix":
+            # /docs/intro.html and /docs/ cover /docs/..., /docs covers /docs...
+            path = root_parts.path
+            directory = path[:path.rfind("/") + 1] if path.count("/") > 1 else path
+            if parts.netloc == root_parts.netloc and parts.path.startswith(directory):
+                return True
+        elif scope == "host":
+            if parts.netloc == root_parts.netloc:
+                return True
+        else:
+            domain = root_parts.hostname
+            if domain.startswith("www."):
+                domain = domain[4:]
+            if parts.hostname == domain or parts.hostname.endswith("." + domain):
+                return True
+    return False
+
+
+class RobotsCache:
+    """robots.txt rules per origin, fetched once per ROBOTS_TTL_SECONDS and shared by all crawls"""
+    
+    def __init__(self, ttl: float = ROBOTS_TTL_SECONDS, timeout: float = 10):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._rules: Dict[str, Tuple[float, RobotFileParser]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+    
+    def rules(self, url: str) -> RobotFileParser:
+        """Rules of the site url belongs to; blocks while robots.txt is fetched"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            origin_lock = self._locks.setdefault(origin, threading.Lock())
+        # One fetch per origin, however many workers ask at once
+        with origin_lock:
+            entry = self._rules.get(origin)
+            if entry is not None and entry[0] > time.time():
+                return entry[1]
+            parser = self._fetch(origin)
+            self._rules[origin] = (time.time() + self.ttl, parser)
+            return parser
+    
+    def _fetch(self, origin: str) -> RobotFileParser:
+        import requests
+        
+        parser = RobotFileParser(origin + "/robots.txt")
+        self.fetches += 1
+        try:
+            with _get_session().get(parser.url, timeout=self.timeout, stream=True) as response:
+                # RFC 9309: no robots.txt (4xx) allows everything, an unreachable one (5xx) nothing
+                if response.status_code >= 500:
+                    parser.disallow_all = True
+                elif response.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    body = response.raw.read(ROBOTS_MAX_BYTES, decode_content=True)
+                    parser.parse(body.decode("utf-8", errors="replace").splitlines())
+        except requests.RequestException as e:
+            logger.warning(f"Could not fetch {parser.url} ({e}), not crawling {origin}")
+            parser.disallow_all = True
+        return parser
+
+
+_robots = RobotsCache()
+
+
+class _Host:
+    """Politeness state of one host: request slots and the earliest time of the next request"""
+    
+    def __init__(self, per_host: int):
+        self.slots = asyncio.Semaphore(per_host)
+        self.lock = asyncio.Lock()
+        self.next_time = 0.0
+
+
+class _Crawler:
+    """
+    One crawl: a frontier of (depth, order, url) served shallowest first, so
+    the page budget goes to the levels closest to the start URLs, and a set
+    of URLs ever queued, so each page is fetched once.
+    """
+    
+    def __init__(self, roots: List[str], max_pages: int, max_depth: int, scope: str,
+                 workers: int, per_host: int, delay: float, respect_robots: bool,
+                 fetch_options: Tuple, on_page=None):
+        self.roots = roots
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.scope = scope
+        self.workers = workers
+        self.per_host = per_host
+        self.delay = delay
+        self.respect_robots = respect_robots
+        self.fetch_options = fetch_options
+        self.on_page = on_page
+        
+        self.seen = set(roots)
+        # Where fetched pages ended up after redirects
+        self.landed = set()
+        self.hosts: Dict[str, _Host] = {}
+        self.started = 0
+        self.pages: List[Dict[str, Any]] = []
+        self.blocked: List[str] = []
+        self.skipped = 0
+        self.frontier: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        for order, url in enumerate(roots):
+            self.frontier.put_nowait((0, order, url))
+        self.queued = len(roots)
+    
+    async def run(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="crawl")
+        tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        try:
+            await self.frontier.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Without waiting: a cancelled crawl must not block the event loop on fetches in flight
+            self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def _work(self) -> None:
+        while True:
+            depth, _, url = await self.frontier.get()
+            try:
+                if self.started < self.max_pages:
+                    await self._visit(url, depth)
+                else:
+                    self.skipped += 1
+            except Exception as e:
+                logger.error(f"Error crawling {url}: {e}")
+            finally:
+                self.frontier.task_done()
+    
+    async def _visit(self, url: str, depth: int) -> None:
+        delay = self.delay
+        if self.respect_robots:
+            rules = await self.loop.run_in_executor(self.executor, _robots.rules, url)
+            if not rules.can_fetch(ROBOTS_AGENT, url):
+                self.blocked.append(url)
+                return
+            delay = max(delay, rules.crawl_delay(ROBOTS_AGENT) or 0)
+        # Budget checked again: other workers may have used it up during the robots.txt wait
+        if self.started >= self.max_pages:
+            self.skipped += 1
+            return
+        self.started += 1
+        
+        host = self.hosts.setdefault(urlsplit(url).netloc, _Host(self.per_host))
+        async with host.slots:
+            async with host.lock:
+                wait = host.next_time - self.loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                host.next_time = self.loop.time() + delay
+            result = await self.loop.run_in_executor(self.executor, _fetch_indexed, len(self.pages), url,
+                                                     True, *self.fetch_options)
+        
+        links = result.get("links") or []
+        queued = 0
+        duplicate = None
+        if result["success"]:
+            # Relative links are relative to where redirects led
+            base = normalize_url(result["metadata"]["final_url"]) or url
+            if base != url and base in self.landed:
+                duplicate, links = base, []
+            self.landed.add(base)
+            self.seen.add(base)
+        if result["success"] and depth < self.max_depth:
+            for href in links:
+                link = normalize_url(href, base)
+                if (link is None or link in self.seen or urlsplit(link).path.lower().endswith(SKIP_EXTENSIONS)
+                        or not _in_scope(link, self.roots, self.scope)):
+                    continue
+                self.seen.add(link)
+                self.frontier.put_nowait((depth + 1, self.queued, link))
+                self.queued += 1
+                queued += 1
+        
+        page = {
+            "url": url,
+            "depth": depth,
+            "success": result["success"],
+            "status_code": result["status_code"],
+            "title": result.get("title"),
+            "content_length": len(result["content"]),
+            "links_found": len(links),
+            "links_queued": queued,
+            "content": result["content"]
+        }
+        if not result["success"]:
+            page["error"] = result["error"]
+        elif duplicate is not None:
+            page["redirected_to"] = duplicate
+            page["duplicate"] = True
+        elif result["metadata"]["truncated"]:
+            page["truncated"] = result["metadata"]["truncation_reason"]
+        self.pages.append(page)
+        if self.on_page is not None and result["success"] and duplicate is None and result["content"]:
+            await self.on_page(url, result["content"])
+
+
+def _put(texts: queue.Queue, item, ingestion) -> None:
+    """Hand a page to the ingest thread, giving up if ingestion has stopped"""
+    while not ingestion.done():
+        try:
+            texts.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+async def crawl_async(start_urls: Union[str, List[str]], max_pages: int = DEFAULT_MAX_PAGES,
+                      max_depth: int = DEFAULT_MAX_DEPTH, scope: str = "prefix",
+                      concurrency: Optional[int] = None, per_host: Optional[int] = None,
+                      delay: Optional[float] = None, respect_robots: bool = True,
+                      collection_id: Optional[str] = None, include_content: Optional[bool] = None,
+                      timeout: int = 30, use_cache: bool = True, max_bytes: Optional[int] = None,
+                      **ingest_options: Any) -> Dict[str, Any]:
+    """
+    Crawl a site breadth-first, within a page and depth budget.
+    
+    Workers take the shallowest queued URL, wait for the host's politeness
+    delay and a host slot, and fetch it with fetch_web_content (shared
+    keep-alive session, HTTP cache, download limits). Links of each page are
+    normalized (see normalize_url), kept if in scope and not seen before, and
+    queued one level deeper. robots.txt is honoured, including Crawl-delay,
+    and cached per origin. With a collection_id every page is streamed into
+    the RAG collection (see ingest_texts) while the crawl goes on.
+    
+    Args:
+        start_urls: URL or URLs to start from (depth 0)
+        max_pages: Most pages to fetch
+        max_depth: Most link hops from a start URL
+        scope: Which links to follow: 'prefix' (below the start URL's directory),
+            'host', 'domain' (host and subdomains) or 'any'
+        concurrency: Pages fetched at once (default: MISSION_CONTROL_FETCH_CONCURRENCY or 16)
+        per_host: Pages fetched at once from one host (default: MISSION_CONTROL_FETCH_PER_HOST or 4)
+        delay: Seconds between requests to one host (default: MISSION_CONTROL_CRAWL_DELAY or 0.25)
+        respect_robots: Skip URLs robots.txt disallows and honour its Crawl-delay
+        collection_id: RAG collection to ingest the pages into, created if needed
+        include_content: Return page texts (default: only without a collection_id)
+        timeout: Request timeout in seconds, per page
+        use_cache: Read and update the HTTP cache
+        max_bytes: Most body bytes to read per page (default: MISSION_CONTROL_FETCH_MAX_MB, 10 MB)
+        **ingest_options: max_tokens, overlap_tokens and collection settings for ingest_texts
+    
+    Returns:
+        Dictionary with the pages (in fetch order), crawl counts, the URLs blocked
+        by robots.txt and, with a collection_id, the ingest result (or ingest_error
+        if ingestion failed, which stops the crawl)
+    """
+    if isinstance(start_urls, str):
+        start_urls = [start_urls]
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown scope: {scope} (expected one of {', '.join(SCOPES)})")
+    if max_pages < 1 or max_depth < 0:
+        raise ValueError("max_pages must be at least 1 and max_depth at least 0")
+    roots = []
+    for url in start_urls:
+        root = normalize_url(url)
+        if root is None:
+            raise ValueError(f"Invalid start URL: {url}")
+        if root not in roots:
+            roots.append(root)
+    if include_content is None:
+        include_content = collection_id is None
+    
+    crawler = _Crawler(roots, max_pages, max_depth, scope, concurrency or DEFAULT_CONCURRENCY,
+                       per_host or DEFAULT_PER_HOST, DEFAULT_DELAY if delay is None else delay,
+                       respect_robots, (timeout, use_cache, max_bytes))
+    started = time.perf_counter()
+    ingested, ingest_error = None, None
+    
+    if collection_id is None:
+        await crawler.run()
+    else:
+        texts: queue.Queue = queue.Queue(PAGE_QUEUE_SIZE)
+        done = object()
+        stop = threading.Event()
+        
+        def pages():
+            # Timed waits, so the ingest thread cannot outlive a failed ingestion or crawl
+            while not stop.is_set():
+                try:
+                    item = texts.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is done:
+                    return
+                yield item
+        
+        loop = asyncio.get_running_loop()
+        ingestion = loop.run_in_executor(None, lambda: ingest_texts(pages(), collection_id, **ingest_options))
+        
+        async def on_page(url: str, content: str) -> None:
+            await asyncio.to_thread(_put, texts, (url, content), ingestion)
+        
+        crawler.on_page = on_page
+        crawling = asyncio.create_task(crawler.run())
+        try:
+            # Ingestion only ends before the crawl when it failed; then stop crawling at once
+            await asyncio.wait((crawling, ingestion), return_when=asyncio.FIRST_COMPLETED)
+            if crawling.done():
+                crawling.result()
+                await asyncio.to_thread(_put, texts, done, ingestion)
+            else:
+                crawling.cancel()
+                await asyncio.gather(crawling, return_exceptions=True)
+            try:
+                ingested = await ingestion
+            except Exception as e:
+                # Keep the crawl results; the pages fetched so far are listed
+                logger.error(f"Ingesting the crawl into {collection_id} failed, crawl stopped: {e}")
+                ingest_error = str(e)
+        finally:
+            crawling.cancel()
+            stop.set()
+    
+    elapsed = time.perf_counter() - started
+    fetched = len(crawler.pages)
+    failed = sum(not page["success"] for page in crawler.pages)
+    if not include_content:
+        for page in crawler.pages:
+            del page["content"]
+    logger.info(f"Crawled {fetched} pages from {', '.join(roots)} in {elapsed:.1f}s ({failed} failed)")
+    
+    result = {
+        "start_urls": roots,
+        "scope": scope,
+        "pages_fetched": fetched,
+        "pages_failed": failed,
+        "max_depth_reached": max((page["depth"] for page in crawler.pages), default=0),
+        "urls_discovered": len(crawler.seen),
+        "urls_not_fetched": crawler.skipped + crawler.frontier.qsize(),
+        "blocked_by_robots": crawler.blocked,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(fetched / elapsed, 2) if elapsed else 0.0,
+        "pages": crawler.pages
+    }
+    if ingested is not None:
+        result["ingest"] = ingested
+    if ingest_error is not None:
+        result["ingest_error"] = ingest_error
+    return result
+
+
+def crawl(start_urls: Union[str, List[str]], max_pages: int = DEFAULT_MAX_PAGES,
+          max_depth: int = DEFAULT_MAX_DEPTH, scope: str = "prefix", **options: Any) -> Dict[str, Any]:
+    """
+    Crawl a site breadth-first, within a page and depth budget.
+    
+    Args:
+        start_urls: URL or URLs to start from
+        max_pages: Most pages to fetch
+        max_depth: Most link hops from a start URL
+        scope: 'prefix', 'host', 'domain' or 'any'
+        **options: Other crawl_async arguments (concurrency, delay, collection_id, ...)
+    
+    Returns:
+        Dictionary as for crawl_async
+    """
+    try:
+        return _run_coroutine(crawl_async(start_urls, max_pages, max_depth, scope, **options))
+    except Exception as e:
+        logger.error(f"Error crawling {start_urls}: {e}")
+        raise
+
+
+def get_robots_cache_stats() -> Dict[str, Any]:
+    """Origins whose robots.txt rules are cached, and robots.txt fetches so far"""
+    return {"origins": len(_robots._rules), "fetches": _robots.fetches, "ttl_seconds": _robots.ttl}
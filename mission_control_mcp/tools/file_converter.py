@@ -77,24 +77,19 @@ def convert_file(input_path: str, output_format: str, output_path: str = None) -
 
 
 def _pdf_to_txt(input_path: str, output_path: str) -> tuple:
-    """Convert PDF to TXT"""
+    """Convert PDF to TXT (through the PDF reader's extracted-text cache)"""
     try:
-        from PyPDF2 import PdfReader
+        from tools.pdf_reader import extract_pages
         
-        reader = PdfReader(input_path)
-        text_parts = []
-        
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                text_parts.append(text)
+        pages = extract_pages(input_path)
+        text_parts = [text for text in pages if text]
         
         full_text = "\n\n".join(text_parts)
         
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(full_text)
         
-        return True, f"Successfully converted PDF to TXT ({len(reader.pages)} pages)"
+        return True, f"Successfully converted PDF to TXT ({len(pages)} pages)"
         
     except Exception as e:
         logger.error(f"PDF to TXT conversion error: {e}")
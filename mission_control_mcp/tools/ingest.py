@@ -0,0 +1,550 @@
+"""
+Ingest Tool - Extract, chunk, embed and index files, directories and URLs into a RAG collection
+"""
+import logging
+import queue
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple, Callable
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.pdf_reader import iter_pdf_pages
+from tools.web_fetcher import fetch_web_content
+from utils.html_text import extract_html
+from utils.chunking import (
+    iter_chunks,
+    token_counter,
+    estimate_tokens,
+    DEFAULT_MAX_TOKENS,
+    DEFAULT_OVERLAP_TOKENS,
+    MODEL_MAX_TOKENS,
+    MODEL_SPECIAL_TOKENS
+)
+from utils.rag_utils import STREAM_BATCH_SIZE
+from utils.rag_collections import (
+    collection_exists,
+    create_collection,
+    get_collection,
+    save_collection
+)
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = {".txt", ".md", ".rst", ".csv", ".log", ".json"}
+HTML_EXTENSIONS = {".html", ".htm"}
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS | HTML_EXTENSIONS | {".pdf"}
+
+# Queue bounds between the pipeline stages: extracted pages and chunks awaiting embedding
+PAGE_QUEUE_SIZE = 16
+CHUNK_QUEUE_BATCHES = 4
+# Save the collection (and the resume manifest) after this many new chunks
+CHECKPOINT_CHUNKS = 5000
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Raised inside pipeline threads once the pipeline is closed"""
+
+
+class _Unsupported(Exception):
+    """Raised by extraction for a source without text to ingest, e.g. a URL serving a PDF or an image"""
+
+
+def _is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def _expand_sources(sources: List[str], recursive: bool) -> List[str]:
+    """Resolve directories to the supported files they contain; URLs are kept as given"""
+    expanded = []
+    for source in sources:
+        if _is_url(source):
+            expanded.append(source)
+            continue
+        path = Path(source).expanduser().resolve()
+        if path.is_dir():
+            files = path.rglob("*") if recursive else path.glob("*")
+            expanded.extend(
+                str(f) for f in sorted(files)
+                if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS
+            )
+        elif path.is_file():
+            expanded.append(str(path))
+        else:
+            raise FileNotFoundError(f"Source not found: {source}")
+    return list(dict.fromkeys(expanded))
+
+
+def _fingerprint(source: str) -> Optional[str]:
+    """Size and modification time of a file, so edited files are not mistaken for ingested ones"""
+    if _is_url(source):
+        return None
+    stat = Path(source).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _iter_pages(source: str) -> Iterator[Tuple[int, str]]:
+    """Extract (page number, text) pairs; non-PDF sources are a single page"""
+    if _is_url(source):
+        result = fetch_web_content(source)
+        metadata = result["metadata"]
+        if metadata["truncation_reason"] == "binary":
+            # The fetcher does not download binary bodies, so there is no text to index
+            raise _Unsupported(f"binary content ({metadata['content_type'] or 'unknown type'}) is not "
+                               f"ingested from URLs; download the file and ingest it instead")
+        yield 1, result["content"]
+        return
+    
+    suffix = Path(source).suffix.lower()
+    if suffix == ".pdf":
+        yield from iter_pdf_pages(source)
+    elif suffix in HTML_EXTENSIONS:
+        # Same page text as fetched web pages: no script/style/nav/header/footer
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            yield 1, extract_html(f.read())["content"]
+    else:
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            yield 1, f.read()
+
+
+class _Pipeline:
+    """
+    Three-stage producer/consumer pipeline.
+    
+    An extraction thread puts pages on a bounded queue, a chunking thread
+    turns each source's pages into chunks on a second bounded queue, and
+    the caller's thread embeds and indexes chunks in batches. Extraction
+    and chunking of later sources overlap with embedding of earlier ones,
+    and memory stays bounded by the queue sizes.
+    """
+    
+    def __init__(self, sources: Iterable[str], skip_chunks: Dict[str, int], max_tokens: int,
+                 overlap_tokens: int, batch_size: int,
+                 extract: Optional[Callable[[str], Iterator[Tuple[int, str]]]] = None,
+                 count_tokens: Callable[[str], int] = estimate_tokens):
+        self.sources = sources
+        self.extract = extract or _iter_pages
+        self.skip_chunks = skip_chunks
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens
+        self.pages: queue.Queue = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+        self.chunks: queue.Queue = queue.Queue(maxsize=batch_size * CHUNK_QUEUE_BATCHES)
+        self.stop = threading.Event()
+        # Exception raised by the sources iterable itself (e.g. a caller's generator)
+        self.error: Optional[BaseException] = None
+        self.source_end: Optional[tuple] = None
+        self.page_starts: List[int] = []  # offset of each page of the current source
+        self._threads = [
+            threading.Thread(target=self._extract, name="ingest-extract", daemon=True),
+            threading.Thread(target=self._chunk, name="ingest-chunk", daemon=True)
+        ]
+    
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+    
+    def close(self) -> None:
+        """Stop the worker threads, e.g. after the consumer failed"""
+        self.stop.set()
+        for q in (self.pages, self.chunks):
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+        for thread in self._threads:
+            thread.join(timeout=5)
+    
+    def _put(self, q: queue.Queue, item) -> None:
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise _Stopped()
+    
+    def _get(self, q: queue.Queue):
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise _Stopped()
+    
+    def _extract(self) -> None:
+        try:
+            for source in self.sources:
+                pages, error, unsupported = 0, None, None
+                try:
+                    for _, text in self.extract(source):
+                        pages += 1
+                        self._put(self.pages, (source, text))
+                except _Stopped:
+                    raise
+                except _Unsupported as e:
+                    logger.info(f"Skipping {source}: {e}")
+                    unsupported = str(e)
+                except Exception as e:
+                    logger.warning(f"Failed to extract {source}: {e}")
+                    error = str(e)
+                self._put(self.pages, (source, (_DONE, pages, error, unsupported)))
+        except _Stopped:
+            pass
+        except Exception as e:
+            logger.error(f"Failed to read the sources to ingest: {e}")
+            self.error = e
+        finally:
+            # Also after a failing sources iterable, so the consumers do not wait forever
+            try:
+                self._put(self.pages, _DONE)
+            except _Stopped:
+                pass
+    
+    def _source_pages(self, first) -> Iterator[str]:
+        """Page texts of the current source, read from the page queue until its end marker"""
+        item = first
+        offset = 0
+        while True:
+            source, payload = item
+            if isinstance(payload, tuple):
+                self.source_end = payload
+                return
+            self.page_starts.append(offset)
+            # Keep page boundaries apart so the last and first sentences do not run together
+            text = payload + "\n\n"
+            offset += len(text)
+            yield text
+            item = self._get(self.pages)
+    
+    def _chunk(self) -> None:
+        try:
+            while True:
+                item = self._get(self.pages)
+                if item is _DONE:
+                    self._put(self.chunks, _DONE)
+                    return
+                source = item[0]
+                self.source_end = None
+                self.page_starts = []
+                skip = self.skip_chunks.get(source, 0)
+                error = None
+                try:
+                    chunks = iter_chunks(self._source_pages(item), self.max_tokens, self.overlap_tokens,
+                                         self.count_tokens)
+                    for number, chunk in enumerate(chunks):
+                        if number >= skip:
+                            row = {"source": source, "page": bisect_right(self.page_starts, chunk.start),
+                                   "start": chunk.start, "end": chunk.end}
+                            self._put(self.chunks, (source, chunk.text, row))
+                except _Stopped:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Failed to chunk {source}: {e}")
+                    error = str(e)
+                # Drain the rest of this source if chunking stopped early
+                while self.source_end is None:
+                    for _ in self._source_pages(self._get(self.pages)):
+                        pass
+                _, pages, extract_error, unsupported = self.source_end
+                self._put(self.chunks, (source, _DONE, (pages, extract_error or error, unsupported)))
+        except _Stopped:
+            pass
+
+
+def _open_collection(collection_id: str, resume: bool, overwrite: bool, max_tokens: Optional[int],
+                     overlap_tokens: Optional[int], store_options: Dict[str, Any]):
+    """Writable store and ingest manifest of a collection, created (or replaced) if needed"""
+    limit = MODEL_MAX_TOKENS - MODEL_SPECIAL_TOKENS
+    if max_tokens is not None and not 1 <= max_tokens <= limit:
+        # The model would silently drop the end of longer chunks
+        raise ValueError(f"max_tokens must be between 1 and {limit} (the embedding model reads "
+                         f"{MODEL_MAX_TOKENS} tokens including {MODEL_SPECIAL_TOKENS} special tokens)")
+    if collection_exists(collection_id) and not overwrite:
+        store = get_collection(collection_id, read_only=False)
+        # Stores cannot delete rows, so indexing the same sources again would duplicate them
+        if not resume and store.documents:
+            raise ValueError(
+                f"Collection {collection_id} already holds {len(store.documents)} documents; "
+                f"resume=False would index them a second time. Use overwrite=True to rebuild it "
+                f"or ingest into a new collection"
+            )
+    else:
+        store = create_collection(collection_id, [], overwrite=overwrite, **store_options)
+    
+    manifest = store.attributes.get("ingest") if resume else None
+    if manifest is None:
+        manifest = {"max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
+                    "overlap_tokens": overlap_tokens if overlap_tokens is not None else DEFAULT_OVERLAP_TOKENS,
+                    "sources": {}}
+    for key, value in (("max_tokens", max_tokens), ("overlap_tokens", overlap_tokens)):
+        if value is not None and value != manifest[key]:
+            raise ValueError(
+                f"Collection {collection_id} was ingested with {key}={manifest[key]}; "
+                f"use the same value, a new collection or overwrite=True"
+            )
+    return store, manifest
+
+
+def _new_entry(fingerprint: Optional[str]) -> Dict[str, Any]:
+    return {"fingerprint": fingerprint, "chunks": 0, "pages": 0, "done": False, "error": None,
+            "unsupported": None}
+
+
+def _run_pipeline(collection_id: str, store, manifest: Dict[str, Any], pipeline: _Pipeline,
+                  batch_size: int) -> Dict[str, Any]:
+    """
+    Embed and index the pipeline's chunks in the calling thread, checkpointing as it goes.
+    
+    Returns:
+        Dictionary of pages, chunks, duplicates (skipped near-duplicate chunks) and
+        sources (the sources that finished, in order)
+    """
+    stats = {"pages": 0, "chunks": 0, "duplicates": 0, "sources": []}
+    
+    def entry(source: str) -> Dict[str, Any]:
+        # Streamed sources get their manifest entry here, in the one thread that writes the manifest
+        return manifest["sources"].setdefault(source, _new_entry(None))
+    
+    def checkpoint():
+        store.attributes["ingest"] = manifest
+        save_collection(collection_id, store)
+    
+    def flush(batch: List[Tuple[str, str, Dict[str, Any]]]):
+        added = store.add_documents([text for _, text, _ in batch], metadata=[row for _, _, row in batch])
+        # Skipped duplicates still count as processed chunks for resuming
+        for source, _, _ in batch:
+            entry(source)["chunks"] += 1
+        stats["chunks"] += len(batch)
+        stats["duplicates"] += len(batch) - added
+    
+    pipeline.start()
+    batch: List[Tuple[str, str, Dict[str, Any]]] = []
+    since_checkpoint = 0
+    try:
+        while True:
+            item = pipeline.chunks.get()
+            if item is _DONE:
+                break
+            source, payload, extra = item
+            if payload is _DONE:
+                # A source finished: index its remaining chunks before marking it done
+                if batch:
+                    flush(batch)
+                    since_checkpoint += len(batch)
+                    batch = []
+                pages, error, unsupported = extra
+                entry(source).update(pages=pages, done=error is None, error=error, unsupported=unsupported)
+                stats["pages"] += pages
+                stats["sources"].append(source)
+                if since_checkpoint >= CHECKPOINT_CHUNKS:
+                    checkpoint()
+                    since_checkpoint = 0
+                continue
+            batch.append(item)
+            if len(batch) >= batch_size:
+                flush(batch)
+                since_checkpoint += len(batch)
+                batch = []
+                if since_checkpoint >= CHECKPOINT_CHUNKS:
+                    checkpoint()
+                    since_checkpoint = 0
+        if pipeline.error is not None:
+            # The chunks of the sources read before the failure are indexed and checkpointed
+            raise pipeline.error
+    finally:
+        pipeline.close()
+        # Keep whatever was indexed, so a failed run can be resumed
+        checkpoint()
+    return stats
+
+
+def ingest(sources: List[str], collection_id: str, recursive: bool = True,
+           max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None,
+           batch_size: int = STREAM_BATCH_SIZE, resume: bool = True, overwrite: bool = False,
+           **store_options: Any) -> Dict[str, Any]:
+    """
+    Ingest files, directories and URLs into a persistent RAG collection.
+    
+    Text is extracted (PDF pages, HTML, plain text, web pages), split into
+    sentence-aligned chunks and embedded in batches, with the three stages
+    running concurrently. Progress is checkpointed in the collection, so
+    an interrupted run picks up where it stopped when called again. Every
+    chunk records its source, page and character offsets as metadata, which
+    search results return and search filters can select on.
+    
+    Args:
+        sources: File paths, directories or http(s) URLs
+        collection_id: Collection to write to; created if it does not exist
+        recursive: Descend into sub-directories
+        max_tokens: Token budget per chunk (default 200, at most 254; fixed for a collection once set)
+        overlap_tokens: Overlap between consecutive chunks (default 30; fixed once set)
+        batch_size: Chunks embedded per batch
+        resume: Skip sources (and chunks of partially ingested sources) already in the collection;
+            False is refused for a collection that already holds documents
+        overwrite: Replace the collection with a new, empty one first (e.g. after sources changed)
+        **store_options: Settings for a new collection (index_type, storage, retrieval,
+            dedup_threshold to skip near-duplicate chunks, ...)
+    
+    Returns:
+        Dictionary with per-source status and throughput figures; sources_unsupported
+        lists sources with no text to ingest (URLs serving PDFs, images, ...)
+    """
+    try:
+        if not sources:
+            raise ValueError("Sources list cannot be empty")
+        
+        store, manifest = _open_collection(collection_id, resume, overwrite, max_tokens, overlap_tokens,
+                                           store_options)
+        
+        expanded = _expand_sources(sources, recursive)
+        pending, skip_chunks, skipped, changed = [], {}, [], []
+        fresh: Dict[str, Dict[str, Any]] = {}
+        for source in expanded:
+            fingerprint = _fingerprint(source)
+            entry = manifest["sources"].get(source)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                if entry["done"]:
+                    skipped.append(source)
+                    continue
+                skip_chunks[source] = entry["chunks"]
+            elif entry is not None and entry["chunks"]:
+                changed.append(source)
+            if source not in skip_chunks:
+                fresh[source] = _new_entry(fingerprint)
+            pending.append(source)
+        if changed:
+            # Their old chunks cannot be removed from the store, and a second copy would skew search
+            raise ValueError(
+                f"{len(changed)} source(s) changed since they were ingested into {collection_id} "
+                f"(e.g. {changed[0]}); use overwrite=True to rebuild the collection or ingest into a new one"
+            )
+        manifest["sources"].update(fresh)
+        
+        started = time.perf_counter()
+        # Exact counts from the model's tokenizer: the model is loaded for embedding anyway
+        pipeline = _Pipeline(pending, skip_chunks, manifest["max_tokens"], manifest["overlap_tokens"], batch_size,
+                             count_tokens=token_counter(store.backend))
+        stats = _run_pipeline(collection_id, store, manifest, pipeline, batch_size)
+        
+        elapsed = time.perf_counter() - started
+        failed = {source: manifest["sources"][source]["error"]
+                  for source in pending if manifest["sources"][source]["error"]}
+        unsupported = {source: manifest["sources"][source]["unsupported"]
+                       for source in pending if manifest["sources"][source]["unsupported"]}
+        ingested = len(pending) - len(failed) - len(unsupported)
+        logger.info(
+            f"Ingested {ingested} sources into '{collection_id}': "
+            f"{stats['pages']} pages, {stats['chunks']} chunks in {elapsed:.1f}s"
+        )
+        
+        return {
+            "success": not failed,
+            "collection_id": collection_id,
+            "sources_found": len(expanded),
+            "sources_ingested": ingested,
+            "sources_skipped": len(skipped),
+            "sources_failed": failed,
+            "sources_unsupported": unsupported,
+            "pages": stats["pages"],
+            "chunks": stats["chunks"],
+            "duplicates_skipped": stats["duplicates"],
+            "seconds": round(elapsed, 3),
+            "pages_per_sec": round(stats["pages"] / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_sec": round(stats["chunks"] / elapsed, 2) if elapsed else 0.0,
+            "document_count": len(store.documents)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error ingesting into {collection_id}: {e}")
+        raise
+
+
+def ingest_texts(pages: Iterable[Tuple[str, str]], collection_id: str,
+                 max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None,
+                 batch_size: int = STREAM_BATCH_SIZE, resume: bool = True, overwrite: bool = False,
+                 **store_options: Any) -> Dict[str, Any]:
+    """
+    Ingest already extracted texts into a persistent RAG collection as they arrive.
+    
+    Same pipeline, manifest and chunk metadata as ingest, for callers that
+    produce the text themselves (e.g. the crawler): pages may be a generator
+    that blocks until the next text is ready, and each one is chunked and
+    embedded while later ones are still being produced.
+    
+    Args:
+        pages: Iterable of (source, text); the source (e.g. a URL) names the text in
+            chunk metadata and in the resume manifest
+        collection_id: Collection to write to; created if it does not exist
+        max_tokens: Token budget per chunk (default 200, at most 254; fixed for a collection once set)
+        overlap_tokens: Overlap between consecutive chunks (default 30; fixed once set)
+        batch_size: Chunks embedded per batch
+        resume: Skip sources already ingested into the collection (see ingest)
+        overwrite: Replace the collection with a new, empty one first
+        **store_options: Settings for a new collection (see ingest)
+    
+    Returns:
+        Dictionary with the same fields as ingest (sources_found counts the texts received)
+    """
+    try:
+        store, manifest = _open_collection(collection_id, resume, overwrite, max_tokens, overlap_tokens,
+                                           store_options)
+        texts: Dict[str, str] = {}
+        skip_chunks: Dict[str, int] = {}
+        received, skipped = [], []
+        
+        def sources() -> Iterator[str]:
+            # Runs in the extraction thread; it only reads the manifest
+            for source, text in pages:
+                received.append(source)
+                entry = manifest["sources"].get(source)
+                if entry is not None and entry["done"]:
+                    skipped.append(source)
+                    continue
+                if entry is not None:
+                    skip_chunks[source] = entry["chunks"]
+                texts[source] = text
+                yield source
+        
+        started = time.perf_counter()
+        pipeline = _Pipeline(sources(), skip_chunks, manifest["max_tokens"], manifest["overlap_tokens"],
+                             batch_size, extract=lambda source: iter([(1, texts.pop(source))]),
+                             count_tokens=token_counter(store.backend))
+        stats = _run_pipeline(collection_id, store, manifest, pipeline, batch_size)
+        
+        elapsed = time.perf_counter() - started
+        failed = {source: manifest["sources"][source]["error"]
+                  for source in stats["sources"] if manifest["sources"][source]["error"]}
+        logger.info(
+            f"Ingested {len(stats['sources']) - len(failed)} texts into '{collection_id}': "
+            f"{stats['chunks']} chunks in {elapsed:.1f}s"
+        )
+        
+        return {
+            "success": not failed,
+            "collection_id": collection_id,
+            "sources_found": len(received),
+            "sources_ingested": len(stats["sources"]) - len(failed),
+            "sources_skipped": len(skipped),
+            "sources_failed": failed,
+            "sources_unsupported": {},
+            "pages": stats["pages"],
+            "chunks": stats["chunks"],
+            "duplicates_skipped": stats["duplicates"],
+            "seconds": round(elapsed, 3),
+            "pages_per_sec": round(stats["pages"] / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_sec": round(stats["chunks"] / elapsed, 2) if elapsed else 0.0,
+            "document_count": len(store.documents)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error ingesting texts into {collection_id}: {e}")
+        raise
@@ -1,93 +1,469 @@
 """
 PDF Reader Tool - Extract text and metadata from PDF files
 """
+import os
+import re
 import logging
-from typing import Dict, Any
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, Tuple, List, Optional, Sequence
 from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_cache import get_pdf_cache
+from utils.pdf_backends import open_document, resolve_backend, backend_version, document_metadata
 
 logger = logging.getLogger(__name__)
 
+# Worker processes for page extraction (MISSION_CONTROL_PDF_WORKERS, 1 = always serial)
+DEFAULT_WORKERS = int(os.environ.get("MISSION_CONTROL_PDF_WORKERS", "0")) or min(os.cpu_count() or 1, 8)
+# Below this many pages the serial path is faster than starting work in the pool
+PARALLEL_MIN_PAGES = 64
+# Page ranges queued per worker, so ranges of slow pages do not leave workers idle
+RANGES_PER_WORKER = 4
+# Below this many files inspect_pdfs runs serially
+PARALLEL_MIN_FILES = 32
+# max_chars the MCP pdf_reader tool applies when the client sets none; longer text is paged by cursor
+DEFAULT_RESPONSE_CHARS = 100_000
+# Bump when page extraction changes, so cached text from the old code is not reused
+EXTRACTOR_REVISION = 1
+
+_CURSOR = re.compile(r'^(\d+):(\d+)$')
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _extract_page(document, page_num: int) -> Optional[str]:
+    """Text of one page ("" if it has none), or None if extraction failed"""
+    try:
+        return document.page_text(page_num) or ""
+    except Exception as e:
+        logger.warning(f"Failed to extract text from page {page_num}: {e}")
+        return None
+
+
+def _extract_range(file_path: str, backend: str, page_nums: List[int]) -> List[Optional[str]]:
+    """Pool worker: open the document itself and extract the given pages (1-based)"""
+    with open_document(file_path, backend) as document:
+        return [_extract_page(document, n) for n in page_nums]
+
 
-def read_pdf(file_path: str) -> Dict[str, Any]:
+def _extractor_id(backend: str) -> str:
+    """Extractor name and version, part of the text cache key"""
+    return f"{backend}-{backend_version(backend)}/{EXTRACTOR_REVISION}"
+
+
+class _PdfSource:
+    """
+    A PDF being read, answering from the extracted-text cache where it can.
+    
+    The document is only opened when something is not cached, so a
+    fully cached document is served without parsing the PDF at all.
+    Freshly extracted pages are written back to the cache; failed pages
+    are not, so they are retried next time.
+    """
+    
+    def __init__(self, file_path: str, backend: Optional[str] = None):
+        self.file_path = str(file_path)
+        self.backend = resolve_backend(backend)
+        self._document = None
+        cache = get_pdf_cache()
+        self.cached = cache.open(self.file_path, _extractor_id(self.backend)) if cache is not None else None
+        info = self.cached.info if self.cached is not None else None
+        if info is None:
+            info = {"pages": self.document.page_count, "metadata": self.document.metadata()}
+            if self.cached is not None:
+                self.cached.set_info(info)
+        self.page_count: int = info["pages"]
+        self.metadata: Dict[str, Any] = info["metadata"]
+    
+    @property
+    def document(self):
+        if self._document is None:
+            self._document = open_document(self.file_path, self.backend)
+        return self._document
+    
+    def close(self) -> None:
+        if self._document is not None:
+            self._document.close()
+            self._document = None
+    
+    def page(self, page_num: int) -> Optional[str]:
+        """Text of one page (1-based), or None if extraction failed"""
+        if self.cached is not None:
+            text = self.cached.get_page(page_num)
+            if text is not None:
+                return text
+        text = _extract_page(self.document, page_num)
+        if text is not None and self.cached is not None:
+            self.cached.put_page(page_num, text)
+        return text
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by all calls, recreated when the worker count changes"""
+    global _pool, _pool_workers
+    
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawned (not forked) workers: the server process runs threads and native libraries
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def extract_pages(file_path: str, workers: Optional[int] = None, backend: Optional[str] = None,
+                  page_start: int = 1, page_end: Optional[int] = None) -> List[Optional[str]]:
+    """
+    Extract the text of a range of pages, splitting large ranges across processes.
+    
+    Pages already in the extracted-text cache are read from it. When at
+    least PARALLEL_MIN_PAGES pages remain, they are cut into contiguous
+    runs that a process pool extracts concurrently, each worker opening
+    the document itself; results are reassembled in page order. Fewer pages, or
+    workers=1, use the serial path.
+    
+    Args:
+        file_path: Path to the PDF file
+        workers: Worker processes (default: MISSION_CONTROL_PDF_WORKERS or the CPU count, max 8)
+        backend: Extraction library, see utils.pdf_backends (default: MISSION_CONTROL_PDF_BACKEND,
+            'auto' = the fastest installed one)
+        page_start: First page to extract (1-based)
+        page_end: Last page to extract, inclusive (default: last page)
+    
+    Returns:
+        Text per page in page order; None for pages that failed to extract
+    """
+    source = _PdfSource(file_path, backend)
+    try:
+        return _extract_source_pages(source, workers, page_start, page_end)
+    finally:
+        source.close()
+
+
+def _extract_source_pages(source: _PdfSource, workers: Optional[int], page_start: int,
+                          page_end: Optional[int]) -> List[Optional[str]]:
+    page_nums = range(page_start, min(page_end or source.page_count, source.page_count) + 1)
+    texts: Dict[int, Optional[str]] = source.cached.get_pages(page_nums) if source.cached is not None else {}
+    missing = [n for n in page_nums if n not in texts]
+    workers = min(workers or DEFAULT_WORKERS, len(missing))
+    
+    extracted = None
+    if workers > 1 and len(missing) >= PARALLEL_MIN_PAGES:
+        step = -(-len(missing) // (workers * RANGES_PER_WORKER))
+        try:
+            pool = _get_pool(workers)
+            futures = [pool.submit(_extract_range, source.file_path, source.backend, missing[i:i + step])
+                       for i in range(0, len(missing), step)]
+            extracted = [text for future in futures for text in future.result()]
+        except Exception as e:
+            logger.warning(f"Parallel extraction of {source.file_path} failed ({e}); extracting serially")
+    if extracted is None:
+        extracted = [_extract_page(source.document, n) for n in missing]
+    
+    for page_num, text in zip(missing, extracted):
+        texts[page_num] = text
+        if text is not None and source.cached is not None:
+            source.cached.put_page(page_num, text)
+    return [texts[n] for n in page_nums]
+
+
+def _parse_cursor(cursor: str) -> Tuple[int, int]:
+    """Split a 'page:offset' cursor returned by read_pdf"""
+    match = _CURSOR.match(str(cursor))
+    if not match:
+        raise ValueError(f"Invalid cursor: {cursor!r} (expected 'page:offset' as returned in next_cursor)")
+    return int(match.group(1)), int(match.group(2))
+
+
+def read_pdf(file_path: str, workers: Optional[int] = None, page_start: Optional[int] = None,
+             page_end: Optional[int] = None, max_chars: Optional[int] = None,
+             cursor: Optional[str] = None, backend: Optional[str] = None) -> Dict[str, Any]:
     """
     Read and extract text from a PDF file.
     
+    With max_chars set, pages are extracted one at a time only until the
+    text budget is used up, and next_cursor tells where to continue, so
+    a large PDF can be read in bounded batches. Extracted text is cached
+    on disk (see utils.pdf_cache), so re-reading an unchanged file, or
+    paging through it, skips PDF parsing for pages already seen.
+    
     Args:
         file_path: Path to the PDF file
-        
+        workers: Worker processes for page extraction (default: MISSION_CONTROL_PDF_WORKERS
+            or the CPU count; 1 = serial). Only used for PARALLEL_MIN_PAGES pages or more
+            without max_chars
+        page_start: First page to read (1-based, default 1)
+        page_end: Last page to read, inclusive (default: last page)
+        max_chars: Maximum length of the returned text, page headers included; at least
+            one page header plus one character
+        cursor: next_cursor of a previous call; continues from there (replaces page_start)
+        backend: Extraction library: 'pypdfium2', 'pdfminer', 'pypdf', 'pypdf2' or 'auto'
+            (default: MISSION_CONTROL_PDF_BACKEND, 'auto' = the fastest installed one)
+    
     Returns:
-        Dictionary containing extracted text, page count, and metadata
+        Dictionary containing extracted text, page count, metadata, the pages read,
+        next_cursor (None once page_end is reached) and the backend used
     """
+    source = None
     try:
-        from PyPDF2 import PdfReader
-        
         # Validate file exists
         if not Path(file_path).exists():
             raise FileNotFoundError(f"PDF file not found: {file_path}")
         
         # Read PDF
-        reader = PdfReader(file_path)
+        source = _PdfSource(file_path, backend)
+        page_count = source.page_count
+        
+        offset = 0
+        if cursor is not None:
+            page_start, offset = _parse_cursor(cursor)
+        first = page_start or 1
+        last = min(page_end or page_count, page_count)
+        if first < 1 or (page_end is not None and page_end < first):
+            raise ValueError(f"Invalid page range: {first}-{page_end}")
+        # Every call must return some page text, so the budget has to fit a page header and more
+        min_chars = len(f"--- Page {last} ---\n") + 1
+        if max_chars is not None and max_chars < min_chars:
+            raise ValueError(f"max_chars must be at least {min_chars} (a page header plus one character)")
+        
+        if max_chars is None:
+            pages = enumerate(_extract_source_pages(source, workers, first, last), first)
+        else:
+            # Lazily, so pages past the text budget are never extracted
+            pages = ((n, source.page(n)) for n in range(first, last + 1))
         
-        # Extract text from all pages
         text_parts = []
-        for page_num, page in enumerate(reader.pages, 1):
-            try:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(f"--- Page {page_num} ---\n{text}")
-            except Exception as e:
-                logger.warning(f"Failed to extract text from page {page_num}: {e}")
-                text_parts.append(f"--- Page {page_num} ---\n[Extraction failed]")
+        length = 0
+        last_read = first - 1
+        next_cursor = None
+        for page_num, text in pages:
+            start = offset if page_num == first else 0
+            body = "[Extraction failed]" if text is None else text[start:]
+            if not body:
+                last_read = page_num
+                continue
+            
+            part = f"--- Page {page_num} ---\n{body}"
+            if max_chars is not None:
+                room = max_chars - length - (2 if text_parts else 0) - (len(part) - len(body))
+                if room < len(body):
+                    if room <= 0 and text_parts:
+                        next_cursor = f"{page_num}:{start}"
+                        break
+                    # Cut inside this page; the first part always has room (see min_chars)
+                    part = part[:len(part) - len(body) + room]
+                    next_cursor = f"{page_num}:{start + room}"
+            
+            text_parts.append(part)
+            length += len(part) + (2 if len(text_parts) > 1 else 0)
+            last_read = page_num
+            if next_cursor is not None:
+                break
         
         full_text = "\n\n".join(text_parts)
         
-        # Extract metadata
-        metadata = {}
-        if reader.metadata:
-            metadata = {
-                "author": reader.metadata.get("/Author", "Unknown"),
-                "creator": reader.metadata.get("/Creator", "Unknown"),
-                "producer": reader.metadata.get("/Producer", "Unknown"),
-                "subject": reader.metadata.get("/Subject", "Unknown"),
-                "title": reader.metadata.get("/Title", "Unknown"),
-                "creation_date": str(reader.metadata.get("/CreationDate", "Unknown"))
-            }
-        
         return {
             "text": full_text,
-            "pages": len(reader.pages),
-            "metadata": metadata
+            "pages": page_count,
+            "metadata": source.metadata,
+            "page_start": first,
+            "page_end": last_read,
+            "next_cursor": next_cursor,
+            "backend": source.backend
         }
-        
-    except ImportError:
-        logger.error("PyPDF2 not installed. Install with: pip install pypdf2")
+    
+    except ImportError as e:
+        logger.error(f"PDF library not installed: {e}")
         raise
     except Exception as e:
         logger.error(f"Error reading PDF: {e}")
         raise
+    finally:
+        if source is not None:
+            source.close()
+
+
+def iter_pdf_pages(file_path: str, page_start: int = 1,
+                   page_end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Extract text from a PDF one page at a time.
+    
+    Pages are only parsed when the generator reaches them, so stopping
+    early skips the rest of the document and only one page of text is
+    held at a time. Cached pages are read from the extracted-text cache.
+    
+    Args:
+        file_path: Path to the PDF file
+        page_start: First page (1-based)
+        page_end: Last page, inclusive (default: last page)
+    
+    Yields:
+        (page number starting at 1, page text); pages that fail to extract yield ""
+    """
+    if not Path(file_path).exists():
+        raise FileNotFoundError(f"PDF file not found: {file_path}")
+    
+    source = _PdfSource(file_path)
+    try:
+        last = min(page_end or source.page_count, source.page_count)
+        for page_num in range(page_start, last + 1):
+            yield page_num, source.page(page_num) or ""
+    finally:
+        source.close()
+
+
+def _declared_page_count(reader) -> Optional[int]:
+    """/Count of the root page tree node, or None if it is missing or unusable"""
+    try:
+        count = reader.trailer["/Root"]["/Pages"]["/Count"]
+        return int(count) if int(count) >= 0 else None
+    except Exception:
+        return None
 
 
 def get_pdf_info(file_path: str) -> Dict[str, Any]:
     """
-    Get basic information about a PDF without extracting all text.
+    Get basic information about a PDF without extracting any text.
+    
+    Only the cross-reference table, the trailer, the document catalog and
+    the Info dictionary are read: the page count is the /Count of the root
+    page tree node, so the page tree itself is not walked (it is only when
+    /Count is missing or broken). The file is read through a handle with
+    seeks rather than loaded into memory.
     
     Args:
         file_path: Path to the PDF file
-        
+    
     Returns:
-        Dictionary with PDF information
+        Dictionary with page count, PDF version, encryption flag, metadata and file size
     """
     try:
         from PyPDF2 import PdfReader
         
-        reader = PdfReader(file_path)
+        path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"PDF file not found: {file_path}")
+        
+        with open(path, "rb") as stream:
+            reader = PdfReader(stream)
+            readable = True
+            if reader.is_encrypted:
+                # Many encrypted PDFs only restrict permissions and open with an empty password
+                try:
+                    readable = bool(reader.decrypt(""))
+                except Exception:
+                    readable = False
+            
+            page_count = None
+            metadata: Dict[str, Any] = {}
+            if readable:
+                page_count = _declared_page_count(reader)
+                if page_count is None:
+                    logger.debug(f"{file_path}: no usable /Count, walking the page tree")
+                    page_count = len(reader.pages)
+                try:
+                    metadata = document_metadata(reader.metadata or {})
+                except Exception as e:
+                    logger.debug(f"{file_path}: unreadable Info dictionary: {e}")
+            
+            return {
+                "page_count": page_count,
+                "is_encrypted": reader.is_encrypted,
+                "pdf_version": reader.pdf_header.lstrip("%").replace("PDF-", "") or None,
+                "metadata": metadata,
+                "file_size_bytes": path.stat().st_size,
+                "file_name": path.name,
+                "file_path": str(path)
+            }
+    except Exception as e:
+        logger.error(f"Error getting PDF info: {e}")
+        raise
+
+
+def _inspect_quietly(file_path: str) -> Dict[str, Any]:
+    """get_pdf_info for batch use: failures become an entry with an error instead of raising"""
+    try:
+        return get_pdf_info(file_path)
+    except Exception as e:
+        return {"file_name": Path(file_path).name, "file_path": str(file_path), "error": str(e)}
+
+
+def inspect_pdfs(paths: Sequence[str], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Run get_pdf_info on many files, concurrently in the shared process pool.
+    
+    Args:
+        paths: PDF files to inspect
+        workers: Worker processes (default: MISSION_CONTROL_PDF_WORKERS or the CPU count, max 8;
+            1 = serial). Only used for PARALLEL_MIN_FILES files or more
+    
+    Returns:
+        get_pdf_info results in the order of paths; files that could not be read
+        have an "error" entry instead of their details
+    """
+    paths = [str(path) for path in paths]
+    workers = min(workers or DEFAULT_WORKERS, len(paths))
+    if workers > 1 and len(paths) >= PARALLEL_MIN_FILES:
+        try:
+            chunksize = -(-len(paths) // (workers * RANGES_PER_WORKER))
+            return list(_get_pool(workers).map(_inspect_quietly, paths, chunksize=chunksize))
+        except Exception as e:
+            logger.warning(f"Parallel PDF inspection failed ({e}); inspecting serially")
+    return [_inspect_quietly(path) for path in paths]
+
+
+def inspect_pdf_directory(directory: str, recursive: bool = True,
+                          workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Inspect every PDF in a directory (see get_pdf_info) for quick triage.
+    
+    Args:
+        directory: Directory to scan
+        recursive: Include subdirectories
+        workers: Worker processes, as for inspect_pdfs
+    
+    Returns:
+        Dictionary with per-file results, file/failure counts and the total page count
+    """
+    try:
+        root = Path(directory)
+        if not root.is_dir():
+            raise FileNotFoundError(f"Directory not found: {directory}")
+        
+        pattern = "**/*" if recursive else "*"
+        paths = sorted(path for path in root.glob(pattern)
+                       if path.is_file() and path.suffix.lower() == ".pdf")
+        files = inspect_pdfs(paths, workers)
         
         return {
-            "page_count": len(reader.pages),
-            "is_encrypted": reader.is_encrypted,
-            "file_size_bytes": Path(file_path).stat().st_size,
-            "file_name": Path(file_path).name
+            "directory": str(root),
+            "files": files,
+            "file_count": len(files),
+            "failed_count": sum(1 for info in files if "error" in info),
+            "total_pages": sum(info.get("page_count") or 0 for info in files)
         }
     except Exception as e:
-        logger.error(f"Error getting PDF info: {e}")
+        logger.error(f"Error inspecting PDF directory: {e}")
         raise
+
+
+def get_pdf_cache_stats() -> Dict[str, Any]:
+    """
+    Report extracted-text cache counters for this server process.
+    
+    Returns:
+        Dictionary with page hit/miss counts, hit rate and bytes saved
+    """
+    cache = get_pdf_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
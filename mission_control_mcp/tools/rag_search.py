@@ -2,19 +2,32 @@
 RAG Search Tool - Semantic search using vector embeddings
 """
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import sys
 import os
+import uuid
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.rag_utils import semantic_search, create_rag_store
+from utils.rag_utils import semantic_search, create_rag_store, estimate_vector_bytes, STORAGE_TYPES
+from utils.embedding_cache import get_embedding_cache
+from utils.embedding_models import get_model_registry
+from utils.rag_collections import (
+    create_collection,
+    add_to_collection,
+    get_collection,
+    collection_path,
+    list_collections
+)
 
 logger = logging.getLogger(__name__)
 
 
-def search_documents(query: str, documents: List[str], top_k: int = 3) -> Dict[str, Any]:
+def search_documents(query: str, documents: List[str], top_k: int = 3, metric: str = "l2",
+                     min_score: Optional[float] = None, retrieval: str = "dense",
+                     dedup_threshold: Optional[float] = None,
+                     mmr_lambda: Optional[float] = None) -> Dict[str, Any]:
     """
     Perform semantic search on a collection of documents.
     
@@ -22,6 +35,12 @@ def search_documents(query: str, documents: List[str], top_k: int = 3) -> Dict[s
         query: Search query string
         documents: List of document strings to search
         top_k: Number of top results to return
+        metric: 'l2' (score = 1/(1+distance)) or 'cosine' (score = cosine similarity)
+        min_score: Only return results scoring at least this value
+        retrieval: 'dense' (embeddings), 'sparse' (BM25 keywords, no model load)
+            or 'hybrid' (both, reciprocal-rank fused)
+        dedup_threshold: Drop near-duplicate documents before embedding (e.g. 0.85)
+        mmr_lambda: Diversify results with maximal marginal relevance (1.0 = relevance only)
         
     Returns:
         Dictionary containing search results with scores
@@ -34,10 +53,15 @@ def search_documents(query: str, documents: List[str], top_k: int = 3) -> Dict[s
             raise ValueError("Documents list cannot be empty")
         
         # Perform semantic search
-        results = semantic_search(query, documents, top_k)
+        results = semantic_search(
+            query, documents, top_k, metric=metric, min_score=min_score, retrieval=retrieval,
+            dedup_threshold=dedup_threshold, mmr_lambda=mmr_lambda
+        )
         
         return {
             "query": query,
+            "metric": metric,
+            "retrieval": retrieval,
             "total_documents": len(documents),
             "returned_results": len(results),
             "results": results
@@ -48,12 +72,30 @@ def search_documents(query: str, documents: List[str], top_k: int = 3) -> Dict[s
         raise
 
 
-def build_knowledge_base(documents: List[str]) -> Dict[str, Any]:
+def build_knowledge_base(documents: List[str], collection_id: Optional[str] = None,
+                         overwrite: bool = False, index_type: str = "flat", metric: str = "l2",
+                         retrieval: str = "dense", storage: str = "float32",
+                         train_threshold: Optional[int] = None, nprobe: Optional[int] = None,
+                         ef_search: Optional[int] = None, backend: Optional[str] = None,
+                         metadata: Optional[List[Dict[str, Any]]] = None,
+                         dedup_threshold: Optional[float] = None) -> Dict[str, Any]:
     """
-    Build a knowledge base from documents for later querying.
+    Build a persistent knowledge base from documents for later querying.
     
     Args:
         documents: List of documents to index
+        collection_id: Name of the collection; generated if not provided
+        overwrite: Replace an existing collection with the same id
+        index_type: 'flat' (exact), 'ivf_flat', 'ivf_pq' or 'hnsw'
+        metric: 'l2' or 'cosine'
+        retrieval: 'dense', 'sparse' (BM25) or 'hybrid'
+        storage: 'float32', or 'float16' / 'int8' to keep one quantized copy of the embeddings
+        train_threshold: Corpus size at which IVF indexes are trained
+        nprobe: Default IVF clusters visited per query
+        ef_search: Default HNSW candidate list size per query
+        backend: Embedding backend 'torch', 'onnx' or 'onnx_int8' (default: MISSION_CONTROL_EMBED_BACKEND)
+        metadata: Optional provenance dict per document (source, page, start, end, ingested_at)
+        dedup_threshold: Skip near-duplicate documents, now and on later appends (e.g. 0.85)
         
     Returns:
         Dictionary with knowledge base info
@@ -62,14 +104,40 @@ def build_knowledge_base(documents: List[str]) -> Dict[str, Any]:
         if not documents:
             raise ValueError("Documents list cannot be empty")
         
-        # Create RAG store
-        store = create_rag_store(documents)
+        if not collection_id:
+            collection_id = f"kb-{uuid.uuid4().hex[:12]}"
+        
+        options = {
+            "train_threshold": train_threshold,
+            "nprobe": nprobe,
+            "ef_search": ef_search,
+            "backend": backend,
+            "dedup_threshold": dedup_threshold
+        }
+        store = create_collection(
+            collection_id,
+            documents,
+            overwrite=overwrite,
+            metadata=metadata,
+            index_type=index_type,
+            metric=metric,
+            retrieval=retrieval,
+            storage=storage,
+            **{key: value for key, value in options.items() if value is not None}
+        )
         
         return {
             "success": True,
-            "document_count": len(documents),
-            "message": "Knowledge base built successfully",
-            "store": store  # In a real scenario, this would be persisted
+            "collection_id": collection_id,
+            "document_count": len(store.documents),
+            "index_type": store.index_type,
+            "metric": store.metric,
+            "retrieval": store.retrieval,
+            "storage": store.storage,
+            "backend": store.backend,
+            "index_trained": store.is_trained,
+            "path": str(collection_path(collection_id)),
+            "message": "Knowledge base built successfully"
         }
         
     except Exception as e:
@@ -77,44 +145,140 @@ def build_knowledge_base(documents: List[str]) -> Dict[str, Any]:
         raise
 
 
-def multi_query_search(queries: List[str], documents: List[str], top_k: int = 3) -> Dict[str, Any]:
+def add_to_knowledge_base(collection_id: str, documents: List[str],
+                          metadata: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Append documents to an existing knowledge base.
+    
+    Args:
+        collection_id: Name of the collection
+        documents: Documents to add
+        metadata: Optional provenance dict per document (source, page, start, end, ingested_at)
+        
+    Returns:
+        Dictionary with updated knowledge base info
+    """
+    try:
+        if not documents:
+            raise ValueError("Documents list cannot be empty")
+        
+        store, added = add_to_collection(collection_id, documents, metadata)
+        
+        return {
+            "success": True,
+            "collection_id": collection_id,
+            "added_documents": added,
+            "duplicates_skipped": len(documents) - added,
+            "document_count": len(store.documents)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error adding to knowledge base: {e}")
+        raise
+
+
+def search_knowledge_base(collection_id: str, query: str, top_k: int = 3,
+                          nprobe: Optional[int] = None,
+                          ef_search: Optional[int] = None,
+                          min_score: Optional[float] = None,
+                          filters: Optional[Dict[str, Any]] = None,
+                          mmr_lambda: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Search a persisted knowledge base without re-embedding its documents.
+    
+    Args:
+        collection_id: Name of the collection
+        query: Search query string
+        top_k: Number of top results to return
+        nprobe: Override IVF clusters visited (recall vs latency)
+        ef_search: Override HNSW candidate list size (recall vs latency)
+        min_score: Only return results scoring at least this value
+        filters: Metadata conditions: 'source' (path/URL or list), 'source_prefix',
+            'page_min', 'page_max', 'ingested_after', 'ingested_before' (ISO-8601)
+        mmr_lambda: Diversify results with maximal marginal relevance (1.0 = relevance only)
+        
+    Returns:
+        Dictionary containing search results with scores and provenance metadata
+    """
+    try:
+        if not query or not query.strip():
+            raise ValueError("Query cannot be empty")
+        
+        store = get_collection(collection_id)
+        results = store.search(query, top_k, nprobe=nprobe, ef_search=ef_search, min_score=min_score,
+                               filters=filters, mmr_lambda=mmr_lambda)
+        
+        return {
+            "query": query,
+            "collection_id": collection_id,
+            "metric": store.metric,
+            "total_documents": len(store.documents),
+            "returned_results": len(results),
+            "results": results
+        }
+        
+    except Exception as e:
+        logger.error(f"Error searching knowledge base: {e}")
+        raise
+
+
+def list_knowledge_bases() -> Dict[str, Any]:
+    """
+    List all persisted knowledge bases.
+    
+    Returns:
+        Dictionary with the available collections
+    """
+    collections = list_collections()
+    return {
+        "total_collections": len(collections),
+        "collections": collections
+    }
+
+
+def multi_query_search(queries: List[str], documents: Optional[List[str]] = None, top_k: int = 3,
+                       collection_id: Optional[str] = None, metric: str = "l2",
+                       min_score: Optional[float] = None,
+                       retrieval: str = "dense") -> Dict[str, Any]:
     """
     Perform multiple searches with different queries on the same document set.
     
+    All queries are embedded in one batch and searched with one FAISS call.
+    
     Args:
         queries: List of query strings
-        documents: List of documents to search
+        documents: List of documents to search (ignored when collection_id is given)
         top_k: Number of results per query
+        collection_id: Search a persisted knowledge base instead of documents
+        metric: 'l2' or 'cosine' for ad-hoc documents
+        retrieval: 'dense', 'sparse' or 'hybrid' for ad-hoc documents
+        min_score: Only return results scoring at least this value
         
     Returns:
         Dictionary with results for each query
     """
     try:
-        if not queries or not documents:
-            raise ValueError("Both queries and documents must be provided")
+        if not queries or not (documents or collection_id):
+            raise ValueError("Queries and either documents or a collection_id must be provided")
         
         # Build store once for efficiency
-        store = create_rag_store(documents)
+        if collection_id:
+            store = get_collection(collection_id)
+        else:
+            store = create_rag_store(documents, metric=metric, retrieval=retrieval)
+        
+        batch_results = store.search_batch(queries, top_k, min_score=min_score)
         
         all_results = {}
-        for idx, query in enumerate(queries):
-            try:
-                results = store.search(query, top_k)
-                all_results[f"query_{idx+1}"] = {
-                    "query": query,
-                    "results": results
-                }
-            except Exception as e:
-                logger.error(f"Error searching query {idx+1}: {e}")
-                all_results[f"query_{idx+1}"] = {
-                    "query": query,
-                    "error": str(e),
-                    "results": []
-                }
+        for idx, (query, results) in enumerate(zip(queries, batch_results)):
+            all_results[f"query_{idx+1}"] = {
+                "query": query,
+                "results": results
+            }
         
         return {
             "total_queries": len(queries),
-            "total_documents": len(documents),
+            "total_documents": len(store.documents),
             "results": all_results
         }
         
@@ -151,3 +315,59 @@ def find_similar_documents(target_doc: str, documents: List[str], top_k: int = 5
     except Exception as e:
         logger.error(f"Error finding similar documents: {e}")
         raise
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """
+    Report embedding cache hit/miss counters for this server process.
+    
+    Returns:
+        Dictionary with cache statistics
+    """
+    return get_embedding_cache().stats()
+
+
+def get_embedding_model_stats() -> Dict[str, Any]:
+    """
+    Report embedding model load time, warm-up time and encode throughput for this server process.
+    
+    Returns:
+        Dictionary with encoder settings and per-model metrics
+    """
+    return get_model_registry().stats()
+
+
+def get_memory_report(collection_id: str) -> Dict[str, Any]:
+    """
+    Report memory used by a knowledge base and what each storage mode would cost.
+    
+    Args:
+        collection_id: Name of the collection
+        
+    Returns:
+        Dictionary with current usage and per-document estimates for every storage mode
+    """
+    try:
+        store = get_collection(collection_id)
+        usage = store.memory_usage()
+        
+        estimates = {}
+        if store.dimension:
+            for storage in STORAGE_TYPES:
+                estimates[storage] = estimate_vector_bytes(
+                    store.dimension, storage, store.index_type, store.hnsw_m, store.pq_m
+                )
+        
+        baseline = estimates.get("float32", 0)
+        current = estimates.get(store.storage, 0)
+        
+        return {
+            "collection_id": collection_id,
+            "current": usage,
+            "estimated_vector_bytes_per_document": estimates,
+            "reduction_vs_float32": round(baseline / current, 2) if current else None
+        }
+        
+    except Exception as e:
+        logger.error(f"Error building memory report: {e}")
+        raise
@@ -1,79 +1,287 @@
 """
 Web Fetcher Tool - Fetch and extract content from web pages
 """
+import time
+import codecs
 import logging
-from typing import Dict, Any
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.helpers import validate_url, clean_text, format_timestamp
+from utils.helpers import validate_url, format_timestamp
+from utils.http_cache import get_http_cache, ResponseRecord
+from utils.html_text import extract_html, resolve_engine
 
 logger = logging.getLogger(__name__)
 
+# Requests in flight at once in a batch (MISSION_CONTROL_FETCH_CONCURRENCY)
+DEFAULT_CONCURRENCY = int(os.environ.get("MISSION_CONTROL_FETCH_CONCURRENCY", "16"))
+# Requests in flight to one host, so a batch does not hammer a single server
+DEFAULT_PER_HOST = int(os.environ.get("MISSION_CONTROL_FETCH_PER_HOST", "4"))
+# Hosts the shared session keeps idle keep-alive connections for
+POOLED_HOSTS = 32
+# Bump when HTML text extraction changes, so cached parse results from the old code are not reused
+PARSER_REVISION = 1
+# Most body bytes read from one response (after gzip/deflate decoding); the rest is not downloaded
+DEFAULT_MAX_BYTES = int(float(os.environ.get("MISSION_CONTROL_FETCH_MAX_MB", "10")) * 1024 * 1024)
+# Time allowed for reading a body, so a server trickling bytes cannot hold a fetch indefinitely
+MAX_DOWNLOAD_SECONDS = float(os.environ.get("MISSION_CONTROL_FETCH_MAX_SECONDS", "60"))
+CHUNK_BYTES = 64 * 1024
+# Response headers reported in result metadata
+METADATA_HEADERS = ("Content-Type", "Content-Length", "Content-Encoding", "Content-Language",
+                    "Last-Modified", "ETag", "Cache-Control", "Expires", "Date", "Server")
+# Non-text/* media types whose bodies are text
+TEXT_MEDIA_TYPES = ("application/json", "application/javascript", "application/x-javascript",
+                    "application/ecmascript", "application/xml", "application/xhtml+xml")
+# Leading bytes of common binary formats: PDF, PNG, GIF, JPEG, ZIP, gzip, RIFF, Ogg, MP3, Matroska, 7z, RAR
+BINARY_SIGNATURES = (b"%PDF", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"PK\x03\x04", b"\x1f\x8b", b"RIFF",
+                     b"OggS", b"ID3", b"\x1aE\xdf\xa3", b"7z\xbc\xaf", b"Rar!")
 
-def fetch_web_content(url: str, extract_text_only: bool = True, timeout: int = 30) -> Dict[str, Any]:
+# Set headers to mimic a browser
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """
+    requests.Session shared by all fetches, so connections to a host are kept alive and reused.
+    
+    It never stores cookies: fetches are independent, and a cookie set by one
+    page must not be sent with later fetches, crawls or robots.txt requests.
+    """
+    global _session
+    import requests
+    from http.cookiejar import DefaultCookiePolicy
+    from requests.adapters import HTTPAdapter
+    
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOLED_HOSTS, pool_maxsize=max(DEFAULT_CONCURRENCY, DEFAULT_PER_HOST))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(HEADERS)
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _session = session
+        return _session
+
+
+def _is_text_type(content_type: str) -> Optional[bool]:
+    """True for a text media type, False for a binary one, None when the header does not tell"""
+    media_type = content_type.split(";")[0].strip().lower()
+    if not media_type or media_type == "application/octet-stream":
+        return None
+    return (media_type.startswith("text/") or media_type in TEXT_MEDIA_TYPES
+            or media_type.endswith(("+xml", "+json")))
+
+
+def _looks_binary(sample: bytes) -> bool:
+    """Sniff the first bytes of a body sent without a usable Content-Type"""
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return False
+    return sample.startswith(BINARY_SIGNATURES) or sample[4:8] == b"ftyp" or b"\x00" in sample[:1024]
+
+
+def _decoder(encoding: Optional[str]):
+    """Incremental decoder that replaces undecodable bytes, UTF-8 for unknown encodings"""
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def _iter_body(response):
+    """
+    Body chunks of a streamed response as they arrive.
+    
+    iter_content waits until a whole chunk has been received, so a server
+    sending a byte at a time would hold it for ages; urllib3 2's read1
+    returns whatever is available.
+    """
+    read1 = getattr(response.raw, "read1", None)
+    if read1 is None:
+        yield from response.iter_content(CHUNK_BYTES)
+        return
+    from urllib3.exceptions import ProtocolError, DecodeError, ReadTimeoutError
+    from requests.exceptions import ChunkedEncodingError, ContentDecodingError, ConnectionError
+    
+    # Same exception translation as iter_content
+    try:
+        while True:
+            chunk = read1(CHUNK_BYTES, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    except ProtocolError as e:
+        raise ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise ConnectionError(e)
+
+
+def _read_body(response, max_bytes: int) -> Tuple[bytes, str, Optional[str], Optional[str]]:
+    """
+    Read a streamed response body within the size and time budgets.
+    
+    The Content-Type is checked before anything is read, and without one
+    the first chunk is sniffed: a binary body is not downloaded. Text is
+    decoded chunk by chunk as it arrives, so a body cut at max_bytes does
+    not end in half a character.
+    
+    Returns:
+        Tuple of (body, decoded text, text encoding, truncation: None, 'max_bytes', 'time' or 'binary')
+    """
+    textual = _is_text_type(response.headers.get("Content-Type", ""))
+    if textual is False:
+        return b"", "", response.encoding, "binary"
+    
+    deadline = time.monotonic() + MAX_DOWNLOAD_SECONDS
+    encoding = response.encoding
+    decoder = None
+    chunks, texts = [], []
+    size = 0
+    truncated = None
+    for chunk in _iter_body(response):
+        if decoder is None:
+            if textual is None and _looks_binary(chunk):
+                return b"", "", encoding, "binary"
+            if encoding is None:
+                # What requests' apparent_encoding does, on the first chunk instead of the whole body
+                from requests.compat import chardet
+                encoding = chardet.detect(chunk)["encoding"] if chardet is not None else None
+            decoder = _decoder(encoding)
+        if len(chunk) > max_bytes - size:
+            chunk = chunk[:max_bytes - size]
+            truncated = "max_bytes"
+        chunks.append(chunk)
+        texts.append(decoder.decode(chunk))
+        size += len(chunk)
+        if truncated is None and time.monotonic() > deadline:
+            truncated = "time"
+        if truncated is not None:
+            break
+    if decoder is not None:
+        texts.append(decoder.decode(b"", final=truncated is None))
+    return b"".join(chunks), "".join(texts), encoding, truncated
+
+
+def _bounded(record: ResponseRecord, max_bytes: int) -> ResponseRecord:
+    """A stored response as a download would return it now: without binary bodies, cut at max_bytes"""
+    textual = _is_text_type(record.headers.get("Content-Type", ""))
+    if textual is False or (textual is None and _looks_binary(record.body[:CHUNK_BYTES])):
+        body, text, truncated = b"", "", "binary"
+    elif len(record.body) > max_bytes:
+        body = record.body[:max_bytes]
+        text, truncated = _decoder(record.text_encoding).decode(body), "max_bytes"
+    else:
+        return record
+    return ResponseRecord(record.url, record.status_code, record.headers, body, record.encoding,
+                          record.text_encoding, record.stored_at, truncated=truncated, text=text,
+                          final_url=record.final_url)
+
+
+def _download(url: str, timeout: int, use_cache: bool, max_bytes: int) -> Tuple[ResponseRecord, str]:
+    """
+    Get a URL through the HTTP cache.
+    
+    A fresh cached response is returned without a request. A stale one is
+    revalidated with If-None-Match / If-Modified-Since, and a 304 answer
+    reuses the stored body without downloading it again. Otherwise the body
+    is streamed (see _read_body); a truncated or skipped one is not cached.
+    
+    Returns:
+        Tuple of (response, cache status: 'hit', 'revalidated', 'miss' or 'bypass')
+    """
+    cache = get_http_cache() if use_cache else None
+    cached = cache.get_response(url) if cache is not None else None
+    if cached is not None and cached.is_fresh():
+        cache.record(fresh_hits=1, bytes_saved=len(cached.body))
+        return _bounded(cached, max_bytes), "hit"
+    
+    # Fetch content (browser headers are set on the shared session)
+    conditional = cached.validators() if cached is not None else {}
+    with _get_session().get(url, headers=conditional, timeout=timeout, stream=True) as response:
+        if cached is not None and conditional and response.status_code == 304:
+            cache.record(revalidated=1, bytes_saved=len(cached.body))
+            return _bounded(cache.refresh(cached, response.headers), max_bytes), "revalidated"
+        response.raise_for_status()
+        body, text, text_encoding, truncated = _read_body(response, max_bytes)
+    
+    record = ResponseRecord(url, response.status_code, response.headers, body, response.encoding,
+                            text_encoding, truncated=truncated, text=text, final_url=response.url)
+    if cache is None:
+        return record, "bypass"
+    cache.record(misses=1)
+    cache.put_response(record)
+    return record, "miss"
+
+
+def fetch_web_content(url: str, extract_text_only: bool = True, timeout: int = 30,
+                      use_cache: bool = True, max_bytes: Optional[int] = None) -> Dict[str, Any]:
     """
     Fetch content from a web URL.
     
+    Responses are kept in a persistent HTTP cache (see utils.http_cache)
+    that honours Cache-Control and Expires and revalidates stale entries,
+    and text parsed from HTML is cached by body hash, so a page that did
+    not change is neither downloaded nor parsed again.
+    
+    The body is streamed and reading stops at max_bytes, or after
+    MISSION_CONTROL_FETCH_MAX_SECONDS; binary content (PDF, images,
+    video, ...) is not downloaded at all. metadata["truncated"] tells
+    whether the content is incomplete.
+    
     Args:
         url: URL to fetch
         extract_text_only: If True, extract only text content; if False, return HTML
         timeout: Request timeout in seconds
-        
+        use_cache: Read and update the HTTP cache (False always downloads)
+        max_bytes: Most body bytes to read (default: MISSION_CONTROL_FETCH_MAX_MB, 10 MB)
+    
     Returns:
         Dictionary containing fetched content, status code, and metadata
     """
     try:
         import requests
-        from bs4 import BeautifulSoup
         
         # Validate URL
         if not validate_url(url):
             raise ValueError(f"Invalid URL format: {url}")
         
-        # Set headers to mimic a browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # Fetch content
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
+        response, cache_status = _download(url, timeout, use_cache, max_bytes or DEFAULT_MAX_BYTES)
         
         content = ""
         content_type = response.headers.get('Content-Type', '')
         
-        if extract_text_only and 'text/html' in content_type:
-            # Parse HTML and extract text
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract title
-            title = soup.title.string if soup.title else "No title"
-            
-            # Extract links
+        if response.truncated == "binary":
+            # The body was not downloaded
+            title = "N/A (binary content)"
             links = []
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '')
-                if href and not href.startswith('#'):
-                    links.append(href)
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # Get text
-            text = soup.get_text()
-            
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            content = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            # Further clean
-            content = clean_text(content)
+        
+        elif extract_text_only and 'text/html' in content_type:
+            # Parse HTML and extract text, unless this exact body was parsed before
+            # (the text of a truncated body is not cached)
+            cache = get_http_cache() if use_cache and response.truncated is None else None
+            engine = resolve_engine()
+            variant = f"html-text/{PARSER_REVISION}/{engine}"
+            parsed = cache.get_text(response.body_hash, variant) if cache is not None else None
+            if parsed is None:
+                parsed = extract_html(response.text, engine)
+                if cache is not None:
+                    cache.put_text(response.body_hash, variant, parsed)
+            content, title, links = parsed["content"], parsed["title"], parsed["links"]
             
         else:
             # Return raw content
@@ -84,12 +292,17 @@ def fetch_web_content(url: str, extract_text_only: bool = True, timeout: int = 3
         # Build metadata
         metadata = {
             "url": url,
+            "final_url": response.final_url,
             "status_code": response.status_code,
             "content_type": content_type,
             "content_length": len(content),
+            "bytes_read": len(response.body),
+            "truncated": response.truncated is not None,
+            "truncation_reason": response.truncated,
             "encoding": response.encoding,
             "timestamp": format_timestamp(),
-            "headers": dict(response.headers)
+            "headers": {name: response.headers[name] for name in METADATA_HEADERS if name in response.headers},
+            "cache": cache_status
         }
         
         return {
@@ -108,36 +321,110 @@ def fetch_web_content(url: str, extract_text_only: bool = True, timeout: int = 3
         raise
 
 
-def fetch_multiple_urls(urls: list, extract_text_only: bool = True) -> list:
+def _fetch_indexed(idx: int, url: str, extract_text_only: bool, timeout: int,
+                   use_cache: bool = True, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """fetch_web_content for a batch: failures become a result with success=False"""
+    try:
+        result = fetch_web_content(url, extract_text_only, timeout, use_cache, max_bytes)
+        result["index"] = idx
+        result["success"] = True
+        return result
+    except Exception as e:
+        logger.error(f"Error fetching URL at index {idx} ({url}): {e}")
+        return {
+            "index": idx,
+            "url": url,
+            "success": False,
+            "error": str(e),
+            "content": "",
+            "status_code": 0
+        }
+
+
+async def fetch_urls_async(urls: List[str], extract_text_only: bool = True, timeout: int = 30,
+                           concurrency: Optional[int] = None, per_host: Optional[int] = None,
+                           use_cache: bool = True, max_bytes: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    Fetch content from multiple URLs.
+    Fetch many URLs concurrently.
+    
+    An asyncio task per URL waits for a slot for its host, then for a
+    global slot, and runs the fetch on a thread pool. All fetches share
+    one pooled requests.Session, so requests to the same host reuse
+    keep-alive connections instead of opening one per URL.
+    
+    Args:
+        urls: URLs to fetch
+        extract_text_only: Whether to extract text only
+        timeout: Request timeout in seconds, per URL
+        concurrency: Requests in flight at once (default: MISSION_CONTROL_FETCH_CONCURRENCY or 16)
+        per_host: Requests in flight to one host (default: MISSION_CONTROL_FETCH_PER_HOST or 4)
+        use_cache: Read and update the HTTP cache
+        max_bytes: Most body bytes to read per URL (default: MISSION_CONTROL_FETCH_MAX_MB, 10 MB)
+    
+    Returns:
+        Results in the order of urls, as for fetch_multiple_urls
+    """
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    per_host = per_host or DEFAULT_PER_HOST
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    host_slots: Dict[str, asyncio.Semaphore] = {}
+    
+    async def fetch_one(idx: int, url: str) -> Dict[str, Any]:
+        host = urlsplit(url).netloc.lower()
+        host_limit = host_slots.setdefault(host, asyncio.Semaphore(per_host))
+        # Host slot first, so URLs queued behind a busy host do not hold global slots
+        async with host_limit, slots:
+            return await loop.run_in_executor(executor, _fetch_indexed, idx, url, extract_text_only,
+                                              timeout, use_cache, max_bytes)
+    
+    with ThreadPoolExecutor(max(min(concurrency, len(urls)), 1), thread_name_prefix="web-fetch") as executor:
+        return list(await asyncio.gather(*(fetch_one(idx, url) for idx, url in enumerate(urls))))
+
+
+def _run_coroutine(coroutine):
+    """Run a coroutine to completion from synchronous code, also inside a running event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(1) as runner:
+        return runner.submit(asyncio.run, coroutine).result()
+
+
+def fetch_multiple_urls(urls: list, extract_text_only: bool = True, timeout: int = 30,
+                        concurrency: Optional[int] = None, per_host: Optional[int] = None,
+                        use_cache: bool = True, max_bytes: Optional[int] = None) -> list:
+    """
+    Fetch content from multiple URLs concurrently (see fetch_urls_async).
     
     Args:
         urls: List of URLs to fetch
         extract_text_only: Whether to extract text only
-        
+        timeout: Request timeout in seconds, per URL
+        concurrency: Requests in flight at once
+        per_host: Requests in flight to one host
+        use_cache: Read and update the HTTP cache
+        max_bytes: Most body bytes to read per URL
+    
     Returns:
-        List of results for each URL
-    """
-    results = []
-    for idx, url in enumerate(urls):
-        try:
-            result = fetch_web_content(url, extract_text_only)
-            result["index"] = idx
-            result["success"] = True
-            results.append(result)
-        except Exception as e:
-            logger.error(f"Error fetching URL at index {idx} ({url}): {e}")
-            results.append({
-                "index": idx,
-                "url": url,
-                "success": False,
-                "error": str(e),
-                "content": "",
-                "status_code": 0
-            })
+        List of results for each URL, in input order
+    """
+    return _run_coroutine(fetch_urls_async(urls, extract_text_only, timeout, concurrency, per_host, use_cache,
+                                           max_bytes))
+
+
+def get_web_cache_stats() -> Dict[str, Any]:
+    """
+    Report HTTP cache counters for this server process.
     
-    return results
+    Returns:
+        Dictionary with fresh hits, revalidations, misses, parsed-text hits and bytes saved
+    """
+    cache = get_http_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
 
 
 def extract_links(url: str) -> Dict[str, Any]:
@@ -151,11 +438,10 @@ def extract_links(url: str) -> Dict[str, Any]:
         Dictionary with extracted links
     """
     try:
-        import requests
         from bs4 import BeautifulSoup
         from urllib.parse import urljoin
         
-        response = requests.get(url, timeout=30)
+        response = _get_session().get(url, timeout=30)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.text, 'html.parser')
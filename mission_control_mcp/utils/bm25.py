@@ -0,0 +1,139 @@
+"""
+In-process BM25 sparse index for keyword and exact-identifier retrieval
+"""
+import re
+import math
+import logging
+from array import array
+from typing import List, Dict, Tuple, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words, plus identifiers joined by '-', '.', '/' or '_' (e.g. INV-2024-0042, ERR_CONN.5)
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+_PART_PATTERN = re.compile(r"[-./_]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase BM25 terms.
+    
+    Compound identifiers are kept whole and also split into their parts, so
+    "INV-2024-0042" matches queries for the full id as well as for "0042".
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        List of terms
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if _PART_PATTERN.search(token):
+            terms.extend(part for part in _PART_PATTERN.split(token) if part)
+    return terms
+
+
+class BM25Index:
+    """
+    Incremental inverted index scored with Okapi BM25.
+    
+    Postings are stored per term as compact integer arrays of document ids
+    and term frequencies. Documents are numbered in insertion order, the
+    same order SimpleRAGStore uses for its vector index.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the index.
+        
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_lengths = array('i')
+        self._total_length = 0
+    
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+    
+    def add(self, documents: Iterable[str]) -> None:
+        """
+        Index documents, appending them after the existing ones.
+        
+        Args:
+            documents: Document strings
+        """
+        for text in documents:
+            doc_id = len(self._doc_lengths)
+            terms = tokenize(text)
+            frequencies: Dict[str, int] = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            
+            for term, frequency in frequencies.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = (array('i'), array('i'))
+                    self._postings[term] = postings
+                postings[0].append(doc_id)
+                postings[1].append(frequency)
+            
+            self._doc_lengths.append(len(terms))
+            self._total_length += len(terms)
+    
+    def search(self, query: str, top_k: int = 10,
+               allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Score documents against a query.
+        
+        Args:
+            query: Query string
+            top_k: Maximum number of hits to return
+            allowed: Optional boolean mask of the documents that may be returned
+        
+        Returns:
+            List of (document id, BM25 score) sorted by descending score; documents
+            sharing no term with the query are not returned
+        """
+        count = len(self._doc_lengths)
+        if count == 0 or top_k <= 0:
+            return []
+        
+        doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.int32)
+        average_length = self._total_length / count or 1.0
+        scores = np.zeros(count, dtype=np.float32)
+        matched = np.zeros(count, dtype=bool)
+        
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            ids = np.frombuffer(postings[0], dtype=np.int32)
+            frequencies = np.frombuffer(postings[1], dtype=np.int32).astype(np.float32)
+            
+            idf = math.log(1.0 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_lengths[ids] / average_length)
+            scores[ids] += idf * frequencies * (self.k1 + 1.0) / (frequencies + norm)
+            matched[ids] = True
+        
+        if allowed is not None:
+            matched &= allowed
+        candidates = np.flatnonzero(matched)
+        if len(candidates) > top_k:
+            top = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = candidates[top]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in order]
+    
+    def clear(self) -> None:
+        """Remove all documents from the index"""
+        self._postings = {}
+        self._doc_lengths = array('i')
+        self._total_length = 0
@@ -0,0 +1,255 @@
+"""
+Streaming, token-aware text chunker that splits on sentence boundaries
+"""
+import re
+import copy
+import math
+import logging
+import unicodedata
+from collections import deque
+from typing import Iterable, Iterator, Callable, NamedTuple, Optional, Union, Tuple
+
+logger = logging.getLogger(__name__)
+
+# all-MiniLM-L6-v2 truncates input at 256 tokens including [CLS] and [SEP]; the default
+# budget leaves headroom for the error of the tokenizer-free estimate
+MODEL_MAX_TOKENS = 256
+# [CLS] and [SEP]: the most a chunk may hold is MODEL_MAX_TOKENS minus these
+MODEL_SPECIAL_TOKENS = 2
+DEFAULT_MAX_TOKENS = 200
+DEFAULT_OVERLAP_TOKENS = 30
+# Text without any sentence boundary is force-split once this much is pending
+MAX_PENDING_CHARS = 20_000
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) followed by whitespace,
+# or a blank line between paragraphs
+_SENTENCE_END = re.compile(r'[.!?]+["\'”’)\]]*\s+|\n\s*\n\s*')
+_WORD = re.compile(r'\S+\s*')
+# Scripts written without spaces between words, which WordPiece splits into single characters:
+# CJK ideographs and radicals, kana, bopomofo, Hangul, Thai, Lao, Tibetan, Myanmar, Khmer
+_PER_CHAR = ("\u0e00-\u0fff\u1000-\u109f\u1100-\u11ff\u1780-\u17ff\u2e80-\u2fdf\u3040-\u31ff"
+             "\u3400-\u4dbf\u4e00-\u9fff\ua960-\ua97f\uac00-\ud7ff\uf900-\ufaff\uff66-\uffdc"
+             "\U00020000-\U0003134f")
+# One such character, a digit run, a letter run, or any other character (punctuation and '_'
+# are tokens of their own)
+_ESTIMATE_PIECE = re.compile(rf'([{_PER_CHAR}])|(\d+)|([^\W\d_{_PER_CHAR}]+)|\S')
+
+
+class Chunk(NamedTuple):
+    """A chunk of text and where it came from in the source"""
+    text: str
+    start: int  # character offset of the first character in the source
+    end: int  # character offset just past the last character
+    token_count: int
+
+
+def _letter_tokens(word: str) -> int:
+    if not word.isascii():
+        # Accents are stripped before WordPiece, so accented Latin reads like ASCII;
+        # words in other alphabets (Cyrillic, Greek, Arabic, ...) split into short pieces
+        folded = unicodedata.normalize("NFD", word)
+        if not all(c.isascii() or unicodedata.combining(c) for c in folded):
+            return math.ceil(len(word) / 2)
+    # Dictionary words are one or two tokens; long runs are mostly identifiers and compounds
+    return math.ceil(len(word) / 6) if len(word) <= 12 else math.ceil(len(word) / 4)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the WordPiece token count of text without loading a tokenizer.
+    
+    Counts punctuation marks (and '_') as one token, CJK, Thai and other
+    scripts written without spaces as one token per character, digit runs
+    as one per two digits and words as one per six letters (four in runs
+    longer than twelve, two in non-Latin alphabets). This slightly
+    overestimates typical English text.
+    
+    Args:
+        text: Text to measure
+    
+    Returns:
+        Estimated token count
+    """
+    tokens = 0
+    for per_char, digits, letters in _ESTIMATE_PIECE.findall(text):
+        if digits:
+            tokens += math.ceil(len(digits) / 2)
+        elif letters:
+            tokens += _letter_tokens(letters)
+        else:
+            tokens += 1
+    return tokens
+
+
+def model_token_counter(backend: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Build an exact token counter from the embedding model's own tokenizer.
+    
+    Args:
+        backend: Embedding backend whose tokenizer to use (default: server default)
+    
+    Returns:
+        Function returning the token count of a text, special tokens excluded
+    """
+    from utils.embedding_models import get_model_registry, MODEL_NAME, DEFAULT_BACKEND
+    
+    model = get_model_registry().get_model(MODEL_NAME, backend or DEFAULT_BACKEND)
+    # Count with a copy: the model's own tokenizer may be encoding in another thread, and
+    # the ONNX one truncates and pads
+    if hasattr(model.tokenizer, "encode_batch"):  # tokenizers.Tokenizer used by the ONNX backend
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_str(model.tokenizer.to_str())
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+    tokenizer = copy.deepcopy(model.tokenizer)
+    return lambda text: len(tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"])
+
+
+def token_counter(backend: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Token counter for chunking text for the embedding model.
+    
+    Args:
+        backend: Embedding backend whose tokenizer to use (default: server default)
+    
+    Returns:
+        model_token_counter(backend), or estimate_tokens if the model's tokenizer
+        cannot be loaded
+    """
+    try:
+        return model_token_counter(backend)
+    except Exception as e:
+        logger.warning(f"Estimating chunk token counts, the model tokenizer is not available: {e}")
+        return estimate_tokens
+
+
+def iter_sentences(source: Union[str, Iterable[str]]) -> Iterator[Tuple[int, str]]:
+    """
+    Split text into sentences lazily.
+    
+    Args:
+        source: Text, or an iterable of text pieces (e.g. pages) read as one
+            concatenated string
+    
+    Yields:
+        (start offset, sentence text including its trailing whitespace)
+    """
+    pieces = [source] if isinstance(source, str) else source
+    pending = ""
+    offset = 0  # source offset of pending[0]
+    
+    def emit(text: str):
+        nonlocal offset
+        stripped = text.lstrip()
+        start = offset + len(text) - len(stripped)
+        offset += len(text)
+        if stripped.strip():
+            yield start, stripped
+    
+    for piece in pieces:
+        pending += piece
+        cut = 0
+        for match in _SENTENCE_END.finditer(pending):
+            # A boundary at the very end may continue in the next piece
+            if match.end() == len(pending):
+                break
+            yield from emit(pending[cut:match.end()])
+            cut = match.end()
+        pending = pending[cut:]
+        
+        if len(pending) > MAX_PENDING_CHARS:
+            split = pending.rfind(" ", 0, MAX_PENDING_CHARS) + 1 or MAX_PENDING_CHARS
+            yield from emit(pending[:split])
+            pending = pending[split:]
+    
+    if pending:
+        yield from emit(pending)
+
+
+def _split_long(start: int, text: str, max_tokens: int,
+                count_tokens: Callable[[str], int]) -> Iterator[Tuple[int, str, int]]:
+    """Split a sentence longer than max_tokens at word boundaries (inside words only if unavoidable)"""
+    part_start, part, part_tokens = start, "", 0
+    for match in _WORD.finditer(text):
+        word = match.group()
+        tokens = count_tokens(word)
+        if tokens > max_tokens:
+            if part:
+                yield part_start, part, part_tokens
+            step = max(1, len(word) * max_tokens // tokens)
+            for i in range(0, len(word), step):
+                piece = word[i:i + step]
+                yield start + match.start() + i, piece, count_tokens(piece)
+            part_start, part, part_tokens = start + match.end(), "", 0
+            continue
+        if part and part_tokens + tokens > max_tokens:
+            yield part_start, part, part_tokens
+            part_start, part, part_tokens = start + match.start(), "", 0
+        part += word
+        part_tokens += tokens
+    if part:
+        yield part_start, part, part_tokens
+
+
+def iter_chunks(source: Union[str, Iterable[str]], max_tokens: int = DEFAULT_MAX_TOKENS,
+                overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+                count_tokens: Callable[[str], int] = estimate_tokens) -> Iterator[Chunk]:
+    """
+    Split text into chunks of whole sentences that fit the embedding model.
+    
+    Sentences are packed into a chunk until the next one would exceed
+    max_tokens; sentences longer than that are split at word boundaries.
+    Consecutive chunks share up to overlap_tokens worth of trailing
+    sentences. Only the current chunk is held in memory, so arbitrarily
+    long input can be streamed in piece by piece.
+    
+    Args:
+        source: Text, or an iterable of text pieces (e.g. PDF pages) read as one
+            concatenated string
+        max_tokens: Token budget per chunk (the model limit is 256 including special tokens)
+        overlap_tokens: Tokens of trailing sentences repeated at the start of the next chunk
+        count_tokens: Token counter; estimate_tokens by default, or model_token_counter()
+            for exact counts
+    
+    Yields:
+        Chunk tuples with text, start/end character offsets into the source and token count
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be between 0 and max_tokens - 1")
+    
+    window: deque = deque()  # (start, text, tokens) of the sentences in the current chunk
+    total = 0
+    fresh = False  # window holds sentences not yet emitted
+    
+    def build() -> Chunk:
+        first_start = window[0][0]
+        last_start, last_text, _ = window[-1]
+        end = last_start + len(last_text.rstrip())
+        # Rebuild the source span; only whitespace can lie between consecutive parts
+        pieces, position = [], first_start
+        for part_start, part, _ in window:
+            pieces.append(" " * (part_start - position))
+            pieces.append(part)
+            position = part_start + len(part)
+        return Chunk("".join(pieces)[:end - first_start], first_start, end, total)
+    
+    for sentence_start, sentence in iter_sentences(source):
+        tokens = count_tokens(sentence)
+        parts = [(sentence_start, sentence, tokens)] if tokens <= max_tokens else \
+            _split_long(sentence_start, sentence, max_tokens, count_tokens)
+        for part in parts:
+            if window and total + part[2] > max_tokens:
+                if fresh:
+                    yield build()
+                    fresh = False
+                while window and (total > overlap_tokens or total + part[2] > max_tokens):
+                    total -= window.popleft()[2]
+            window.append(part)
+            total += part[2]
+            fresh = True
+    
+    if window and fresh:
+        yield build()
@@ -0,0 +1,208 @@
+"""
+MinHash / LSH near-duplicate detection for documents entering a RAG store
+"""
+import re
+import zlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Sequence, Tuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 64 MinHash permutations split into 16 LSH bands of 4 rows: pairs with Jaccard
+# similarity 0.5 become candidates ~64% of the time, pairs at 0.8 ~100%
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+DEFAULT_DEDUP_THRESHOLD = 0.85
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+_SHINGLE_MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 1], dtype=np.uint64)[-SHINGLE_WORDS:]
+
+_WORD = re.compile(r'\w+')
+_EMPTY = np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+
+
+def minhash(text: str) -> np.ndarray:
+    """
+    MinHash signature of the word 3-gram shingles of a text.
+    
+    Args:
+        text: Document text (case and punctuation are ignored)
+    
+    Returns:
+        uint32 array of NUM_PERM minimum hash values
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return _EMPTY.copy()
+    word_hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words),
+                              dtype=np.uint64, count=len(words))
+    if len(words) < SHINGLE_WORDS:
+        shingles = (word_hashes * _SHINGLE_MIX[-len(words):]).sum(keepdims=True, dtype=np.uint64)
+    else:
+        # Combine each run of consecutive word hashes into one shingle hash (wrapping uint64)
+        windows = np.lib.stride_tricks.sliding_window_view(word_hashes, SHINGLE_WORDS)
+        shingles = (windows * _SHINGLE_MIX).sum(axis=1, dtype=np.uint64)
+    shingles = np.unique(shingles)
+    permuted = (shingles[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def minhash_batch(texts: Sequence[str]) -> np.ndarray:
+    """MinHash signatures of many texts as a (len(texts), NUM_PERM) uint32 matrix"""
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for i, text in enumerate(texts):
+        signatures[i] = minhash(text)
+    return signatures
+
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive hash index over MinHash signatures.
+    
+    Each signature is cut into BANDS bands; documents sharing any band
+    land in the same bucket and become candidates, and only candidates
+    are compared by estimated Jaccard similarity (the fraction of equal
+    signature values). Lookups therefore touch a handful of documents
+    instead of the whole corpus.
+    
+    Signatures are kept row-aligned with the store's documents. Buckets
+    are rebuilt lazily the first time a lookup is needed, so stores that
+    are only searched never pay for them.
+    """
+    
+    def __init__(self, threshold: float = DEFAULT_DEDUP_THRESHOLD,
+                 signatures: Optional[np.ndarray] = None):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("dedup threshold must be in (0, 1]")
+        self.threshold = threshold
+        self._signatures = signatures if signatures is not None else np.empty((1024, NUM_PERM), dtype=np.uint32)
+        self._size = len(signatures) if signatures is not None else 0
+        self._buckets: Optional[List[Dict[int, List[int]]]] = None
+        self.skipped = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def nbytes(self) -> int:
+        return self._signatures.nbytes
+    
+    @staticmethod
+    def _band_keys(signature: np.ndarray) -> List[int]:
+        return [hash(signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+    
+    def _ensure_buckets(self) -> List[Dict[int, List[int]]]:
+        if self._buckets is None:
+            self._buckets = [{} for _ in range(BANDS)]
+            for doc_id in range(self._size):
+                self._insert(self._buckets, self._band_keys(self._signatures[doc_id]), doc_id)
+        return self._buckets
+    
+    @staticmethod
+    def _insert(buckets: List[Dict[int, List[int]]], keys: List[int], doc_id: int) -> None:
+        for band, key in enumerate(keys):
+            buckets[band].setdefault(key, []).append(doc_id)
+    
+    def _similarity(self, signature: np.ndarray, doc_id: int, pending: List[np.ndarray]) -> float:
+        other = self._signatures[doc_id] if doc_id < self._size else pending[doc_id - self._size]
+        return float(np.count_nonzero(signature == other)) / NUM_PERM
+    
+    def check(self, documents: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find documents that nearly duplicate an indexed document or an earlier one in the batch.
+        
+        Nothing is added to the index; pass the signatures of the kept
+        documents to add() once they are stored.
+        
+        Args:
+            documents: Candidate document texts
+        
+        Returns:
+            Tuple of (boolean keep mask, signatures of all documents)
+        """
+        buckets = self._ensure_buckets()
+        signatures = minhash_batch(documents)
+        keep = np.ones(len(documents), dtype=bool)
+        batch_buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        pending: List[np.ndarray] = []  # kept signatures of this batch, ids continue after the index
+        
+        for i, signature in enumerate(signatures):
+            if (signature == _EMPTY).all():  # no words to compare
+                continue
+            keys = self._band_keys(signature)
+            seen = set()
+            for band, key in enumerate(keys):
+                for table in (buckets[band], batch_buckets[band]):
+                    for doc_id in table.get(key, ()):
+                        if doc_id in seen:
+                            continue
+                        seen.add(doc_id)
+                        if self._similarity(signature, doc_id, pending) >= self.threshold:
+                            keep[i] = False
+                            break
+                    if not keep[i]:
+                        break
+                if not keep[i]:
+                    break
+            if keep[i]:
+                self._insert(batch_buckets, keys, self._size + len(pending))
+                pending.append(signature)
+        
+        self.skipped += int((~keep).sum())
+        return keep, signatures
+    
+    def add(self, signatures: np.ndarray) -> None:
+        """
+        Index the signatures of documents appended to the store.
+        
+        Args:
+            signatures: (n, NUM_PERM) uint32 matrix, in document order
+        """
+        if self._buckets is not None:
+            for offset, signature in enumerate(signatures):
+                self._insert(self._buckets, self._band_keys(signature), self._size + offset)
+        needed = self._size + len(signatures)
+        if needed > len(self._signatures):
+            # Grow by doubling; also copies a read-only memory map before the first append
+            grown = np.empty((max(needed, 2 * len(self._signatures)), NUM_PERM), dtype=np.uint32)
+            grown[:self._size] = self._signatures[:self._size]
+            self._signatures = grown
+        self._signatures[self._size:needed] = signatures
+        self._size = needed
+    
+    def signatures(self, start: int, stop: int) -> np.ndarray:
+        """Signatures of documents [start, stop)"""
+        return self._signatures[start:min(stop, self._size)]
+    
+    def save(self, directory: Path) -> None:
+        np.save(directory / "dedup_signatures.npy", self._signatures[:self._size])
+    
+    @classmethod
+    def load(cls, directory: Path, threshold: float, documents: Sequence[str],
+             mmap: bool = False) -> "NearDuplicateIndex":
+        """
+        Read signatures written by save(), computing them if the store has none yet.
+        
+        Args:
+            directory: Store directory
+            threshold: Estimated Jaccard similarity at which documents count as duplicates
+            documents: The store's documents
+            mmap: Memory-map the signatures read-only
+        
+        Returns:
+            NearDuplicateIndex aligned with the documents
+        """
+        signatures_file = directory / "dedup_signatures.npy"
+        if signatures_file.exists():
+            return cls(threshold, np.load(signatures_file, mmap_mode='r' if mmap else None))
+        logger.info(f"Computing MinHash signatures for {len(documents)} documents")
+        return cls(threshold, minhash_batch(documents))
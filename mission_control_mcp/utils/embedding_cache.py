@@ -0,0 +1,316 @@
+"""
+Content-addressed embedding cache with an in-memory LRU tier and an optional on-disk tier
+"""
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: the disk tier is then single-process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the process-wide cache; the disk tier is only enabled when a directory is set
+DEFAULT_MAX_ENTRIES = int(os.environ.get("MISSION_CONTROL_EMBED_CACHE_SIZE", "50000"))
+DEFAULT_CACHE_DIR = os.environ.get("MISSION_CONTROL_EMBED_CACHE_DIR")
+
+_KEY_BYTES = 16
+_KEY_LINE = _KEY_BYTES * 2 + 1  # hex digest + newline
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies share a cache entry"""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def make_key(model_name: str, text: str) -> str:
+    """
+    Build the cache key for a text embedded by a given model.
+    
+    Args:
+        model_name: Name of the embedding model
+        text: Text to embed
+    
+    Returns:
+        Hex digest of (model name, normalized text)
+    """
+    digest = hashlib.blake2b(digest_size=_KEY_BYTES)
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _DiskTier:
+    """
+    Append-only on-disk store for one model's embeddings.
+    
+    Vectors live in a raw float32 matrix (``vectors.f32``) that is read
+    through a memory map; ``keys.idx`` holds one hex key per matrix row.
+    Appends take an exclusive file lock so several processes can share
+    the same directory.
+    """
+    
+    def __init__(self, directory: Path, dimension: int):
+        self.directory = directory
+        self.dimension = dimension
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        meta_file = self.directory / "meta.json"
+        if meta_file.exists():
+            with open(meta_file, "r", encoding="utf-8") as f:
+                stored_dimension = json.load(f)["dimension"]
+            if stored_dimension != dimension:
+                raise ValueError(
+                    f"Embedding cache at {directory} has dimension {stored_dimension}, "
+                    f"model produces {dimension}"
+                )
+        else:
+            with open(meta_file, "w", encoding="utf-8") as f:
+                json.dump({"dimension": dimension, "dtype": "float32"}, f)
+        
+        self._vectors_file = self.directory / "vectors.f32"
+        self._keys_file = self.directory / "keys.idx"
+        self._vectors_file.touch(exist_ok=True)
+        self._keys_file.touch(exist_ok=True)
+        
+        self._rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._matrix: Optional[np.memmap] = None
+        self.refresh()
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def refresh(self) -> None:
+        """Pick up rows appended since the last refresh (possibly by other processes)"""
+        with open(self._keys_file, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        
+        complete = len(data) - len(data) % _KEY_LINE
+        row = self._keys_offset // _KEY_LINE
+        for start in range(0, complete, _KEY_LINE):
+            key = data[start:start + _KEY_LINE - 1].decode("ascii")
+            self._rows[key] = row
+            row += 1
+        self._keys_offset += complete
+    
+    def _row_view(self, row: int) -> np.ndarray:
+        """Return the stored vector for a row, remapping if the file has grown"""
+        if self._matrix is None or row >= self._matrix.shape[0]:
+            rows = os.path.getsize(self._vectors_file) // (4 * self.dimension)
+            self._matrix = np.memmap(self._vectors_file, dtype="float32", mode="r",
+                                     shape=(rows, self.dimension))
+        return self._matrix[row]
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        return np.array(self._row_view(row), dtype="float32")
+    
+    def append(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Append new rows; keys already present are skipped"""
+        with open(self._keys_file, "ab") as keys_out:
+            if fcntl is not None:
+                fcntl.flock(keys_out.fileno(), fcntl.LOCK_EX)
+            try:
+                # Another process may have written rows while we were unlocked
+                self.refresh()
+                fresh = [i for i, key in enumerate(keys) if key not in self._rows]
+                if not fresh:
+                    return
+                
+                # Rows are implied by position, so vectors go down before their keys
+                first_row = self._keys_offset // _KEY_LINE
+                block = np.ascontiguousarray(vectors[fresh], dtype="float32")
+                with open(self._vectors_file, "r+b") as vectors_out:
+                    vectors_out.seek(first_row * 4 * self.dimension)
+                    vectors_out.write(block.tobytes())
+                
+                keys_out.write("".join(f"{keys[i]}\n" for i in fresh).encode("ascii"))
+                keys_out.flush()
+                
+                for offset, i in enumerate(fresh):
+                    self._rows[keys[i]] = first_row + offset
+                self._keys_offset += len(fresh) * _KEY_LINE
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(keys_out.fileno(), fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by a hash of (model name, normalized text).
+    
+    Lookups check a bounded in-memory LRU first and then, if configured,
+    the on-disk tier. Only texts missing from both tiers are sent to the
+    encoder.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, cache_dir: Optional[str] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of vectors kept in memory
+            cache_dir: Directory for the on-disk tier; memory only if None
+        """
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._disk: Dict[str, _DiskTier] = {}
+        self._lock = threading.RLock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    def _disk_tier(self, model_name: str, dimension: Optional[int] = None) -> Optional[_DiskTier]:
+        """Open the disk tier for a model; dimension may be omitted if it already exists on disk"""
+        if self.cache_dir is None:
+            return None
+        tier = self._disk.get(model_name)
+        if tier is None:
+            directory = self.cache_dir / re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+            if dimension is None:
+                meta_file = directory / "meta.json"
+                if not meta_file.exists():
+                    return None
+                with open(meta_file, "r", encoding="utf-8") as f:
+                    dimension = json.load(f)["dimension"]
+            tier = _DiskTier(directory, dimension)
+            self._disk[model_name] = tier
+        return tier
+    
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _lookup(self, model_name: str, key: str) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+        
+        tier = self._disk_tier(model_name)
+        if tier is not None:
+            vector = tier.get(key)
+            if vector is not None:
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector
+        return None
+    
+    def encode(self, model_name: str, texts: List[str],
+               encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return embeddings for texts, calling encode_fn only for cache misses.
+        
+        Args:
+            model_name: Name of the embedding model (part of the cache key)
+            texts: Texts to embed
+            encode_fn: Function that embeds a list of texts into a 2-D array
+        
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        
+        keys = [make_key(model_name, text) for text in texts]
+        found: List[Optional[np.ndarray]] = [None] * len(texts)
+        
+        with self._lock:
+            tier = self._disk_tier(model_name)
+            for i, key in enumerate(keys):
+                found[i] = self._lookup(model_name, key)
+            if tier is not None and any(v is None for v in found):
+                tier.refresh()
+                for i, key in enumerate(keys):
+                    if found[i] is None:
+                        found[i] = self._lookup(model_name, key)
+        
+        # Encode each distinct missing text once, even if it repeats in the batch
+        missing: Dict[str, int] = {}
+        for i, vector in enumerate(found):
+            if vector is None and keys[i] not in missing:
+                missing[keys[i]] = i
+        
+        if missing:
+            positions = list(missing.values())
+            encoded = np.asarray(encode_fn([texts[i] for i in positions]), dtype="float32")
+            with self._lock:
+                self.misses += len(positions)
+                for key, vector in zip(missing, encoded):
+                    # A row of encoded is a view that would keep the whole batch alive
+                    self._remember(key, vector.copy())
+                tier = self._disk_tier(model_name, encoded.shape[1])
+                if tier is not None:
+                    tier.append(list(missing), encoded)
+            by_key = dict(zip(missing, encoded))
+            for i, key in enumerate(keys):
+                if found[i] is None:
+                    found[i] = by_key[key]
+        
+        return np.vstack(found).astype("float32", copy=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache hit/miss counters.
+        
+        Returns:
+            Dictionary with hit and miss counts, hit rate and tier sizes
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_memory_entries": self.max_entries,
+                "disk_entries": sum(len(tier) for tier in self._disk.values()),
+                "disk_dir": str(self.cache_dir) if self.cache_dir else None
+            }
+    
+    def clear(self) -> None:
+        """Drop the in-memory tier and reset counters (the disk tier is kept)"""
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache, creating it on first use"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(DEFAULT_MAX_ENTRIES, DEFAULT_CACHE_DIR)
+            logger.info(
+                f"Embedding cache ready (memory entries: {DEFAULT_MAX_ENTRIES}, "
+                f"disk: {DEFAULT_CACHE_DIR or 'disabled'})"
+            )
+        return _default_cache
@@ -0,0 +1,381 @@
+"""
+Process-wide registry of sentence-transformer models shared by all RAG stores
+"""
+import os
+import json
+import time
+import threading
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Encoder backends: PyTorch via sentence-transformers, or the same model exported to ONNX
+# and run with onnxruntime on CPU, optionally with int8 dynamically quantized weights
+BACKENDS = ("torch", "onnx", "onnx_int8")
+DEFAULT_BACKEND = os.environ.get("MISSION_CONTROL_EMBED_BACKEND", "torch")
+# Exported ONNX models, one sub-directory per model; created on first use of an ONNX backend
+ONNX_DIR = os.environ.get(
+    "MISSION_CONTROL_ONNX_DIR",
+    os.path.join(os.path.expanduser("~"), ".mission_control_mcp", "onnx")
+)
+ONNX_OPSET = 14
+
+# Encoder settings; threads and device are applied when a model is first loaded
+DEFAULT_BATCH_SIZE = int(os.environ.get("MISSION_CONTROL_EMBED_BATCH_SIZE", "32"))
+DEFAULT_THREADS = int(os.environ.get("MISSION_CONTROL_EMBED_THREADS", "0")) or None
+DEFAULT_DEVICE = os.environ.get("MISSION_CONTROL_EMBED_DEVICE") or None
+# Load and warm up the default model when the MCP server starts
+WARM_UP_ON_START = os.environ.get("MISSION_CONTROL_EMBED_WARMUP", "").lower() in ("1", "true", "yes")
+
+_WARM_UP_TEXT = "warm up"
+
+
+def validate_backend(backend: str) -> str:
+    """Check that an encoder backend name is known"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    return backend
+
+
+def encoder_key(model_name: str, backend: str) -> str:
+    """
+    Name identifying the vectors a model produces with a backend.
+    
+    Used as the embedding cache namespace, so vectors from different
+    backends are never mixed up.
+    """
+    return model_name if backend == "torch" else f"{model_name}:{backend}"
+
+
+def export_onnx(model_name: str, directory: Path) -> None:
+    """
+    Export a sentence-transformer model to ONNX.
+    
+    Writes ``model.onnx`` (the transformer, returning token embeddings),
+    ``tokenizer.json`` and ``encoder.json`` with the pooling settings, so
+    the ONNX backend needs only onnxruntime and tokenizers at run time.
+    
+    Args:
+        model_name: sentence-transformers model name
+        directory: Output directory
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    pooling = next((m for m in model if type(m).__name__ == "Pooling"), None)
+    pooling_mode = pooling.get_pooling_mode_str() if pooling is not None else "mean"
+    if pooling_mode not in ("mean", "cls"):
+        raise ValueError(f"ONNX export supports mean or cls pooling, {model_name} uses {pooling_mode}")
+    
+    class _TokenEmbeddings(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+        
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids)[0]
+    
+    directory.mkdir(parents=True, exist_ok=True)
+    sample = model.tokenizer(["export sample"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]}
+    token_type_ids = sample.get("token_type_ids", torch.zeros_like(sample["input_ids"]))
+    with torch.no_grad():
+        torch.onnx.export(
+            _TokenEmbeddings(transformer),
+            (sample["input_ids"], sample["attention_mask"], token_type_ids),
+            str(directory / "model.onnx"),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET
+        )
+    model.tokenizer.backend_tokenizer.save(str(directory / "tokenizer.json"))
+    with open(directory / "encoder.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_name,
+            "max_seq_length": model.max_seq_length,
+            "pooling": pooling_mode,
+            "normalize": any(type(m).__name__ == "Normalize" for m in model),
+            "pad_token_id": model.tokenizer.pad_token_id or 0
+        }, f, indent=2)
+    logger.info(f"Exported {model_name} to ONNX at {directory}")
+
+
+def quantize_onnx(directory: Path) -> None:
+    """Write ``model_int8.onnx``, a copy of ``model.onnx`` with int8 dynamically quantized weights"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    
+    quantize_dynamic(str(directory / "model.onnx"), str(directory / "model_int8.onnx"),
+                     weight_type=QuantType.QInt8)
+    logger.info(f"Quantized ONNX model at {directory} to int8")
+
+
+class OnnxEncoder:
+    """
+    Sentence encoder running an exported model with onnxruntime on CPU.
+    
+    Reproduces the sentence-transformers pipeline (tokenize, transformer,
+    pooling, optional normalization) with the same ``encode`` call, so the
+    registry treats it like a SentenceTransformer.
+    """
+    
+    def __init__(self, model_name: str, quantized: bool = False, threads: Optional[int] = None,
+                 root: str = ONNX_DIR):
+        """
+        Load the exported model, exporting (and quantizing) it first if needed.
+        
+        Args:
+            model_name: sentence-transformers model name
+            quantized: Use int8 dynamically quantized weights
+            threads: onnxruntime intra-op threads (default: onnxruntime's choice)
+            root: Directory holding exported models
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+        
+        directory = Path(root) / model_name.replace("/", "__")
+        if not (directory / "encoder.json").exists():
+            export_onnx(model_name, directory)
+        model_file = directory / ("model_int8.onnx" if quantized else "model.onnx")
+        if not model_file.exists():
+            quantize_onnx(directory)
+        
+        with open(directory / "encoder.json", "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        
+        self.tokenizer = Tokenizer.from_file(str(directory / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"])
+        
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(str(model_file), options,
+                                                    providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+        }
+        tokens = self.session.run(None, {k: v for k, v in feeds.items() if k in self._input_names})[0]
+        
+        if self.config["pooling"] == "cls":
+            pooled = tokens[:, 0]
+        else:
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (tokens * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.config["normalize"]:
+            pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32)
+    
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Embed texts.
+        
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per forward pass
+            show_progress_bar: Accepted for SentenceTransformer compatibility; ignored
+        
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Sorting by length keeps padding per batch small, as sentence-transformers does
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        batches = [self._encode_batch([texts[i] for i in order[start:start + batch_size]])
+                   for start in range(0, len(texts), batch_size)]
+        vectors = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.vstack(batches)
+        return vectors
+
+
+class _ModelEntry:
+    """A loaded encoder with its load and usage counters"""
+    
+    def __init__(self, model, load_seconds: float):
+        self.model = model
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.warm_up_seconds: Optional[float] = None
+        self.encode_calls = 0
+        self.encoded_texts = 0
+        self.encode_seconds = 0.0
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Loads each embedding model once per process and shares it.
+    
+    Stores used to load their own copy on first use, so every call that
+    built a temporary store paid the full model load again. The registry
+    keeps one instance per (model name, backend), serializes forward
+    passes through it and records load and encode timings.
+    """
+    
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, threads: Optional[int] = DEFAULT_THREADS,
+                 device: Optional[str] = DEFAULT_DEVICE):
+        """
+        Initialize the registry.
+        
+        Args:
+            batch_size: Texts per forward pass
+            threads: torch / onnxruntime intra-op threads (default: the library's own choice)
+            device: Device passed to SentenceTransformer, e.g. 'cpu' (default: auto)
+        """
+        self.batch_size = batch_size
+        self.threads = threads
+        self.device = device
+        self._models: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+    
+    def configure(self, batch_size: Optional[int] = None, threads: Optional[int] = None,
+                  device: Optional[str] = None) -> None:
+        """
+        Change encoder settings; device only affects models loaded afterwards.
+        
+        Args:
+            batch_size: Texts per forward pass
+            threads: torch intra-op threads (onnxruntime sessions keep the count they were loaded with)
+            device: Device for models loaded from now on
+        """
+        with self._lock:
+            if batch_size is not None:
+                if batch_size < 1:
+                    raise ValueError("batch_size must be at least 1")
+                self.batch_size = batch_size
+            if device is not None:
+                self.device = device
+            if threads is not None:
+                self.threads = threads
+                self._apply_threads()
+    
+    def _apply_threads(self) -> None:
+        if not self.threads:
+            return
+        try:
+            import torch
+            torch.set_num_threads(self.threads)
+        except ImportError:
+            logger.debug("torch not available; thread setting ignored")
+    
+    def _entry(self, model_name: str, backend: str) -> _ModelEntry:
+        key = encoder_key(model_name, validate_backend(backend))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                try:
+                    start = time.perf_counter()
+                    if backend == "torch":
+                        from sentence_transformers import SentenceTransformer
+                        self._apply_threads()
+                        model = SentenceTransformer(model_name, device=self.device)
+                    else:
+                        model = OnnxEncoder(model_name, quantized=backend == "onnx_int8", threads=self.threads)
+                    entry = _ModelEntry(model, time.perf_counter() - start)
+                except Exception as e:
+                    logger.error(f"Failed to load embedding model {key}: {e}")
+                    raise
+                self._models[key] = entry
+                logger.info(f"Loaded embedding model {key} in {entry.load_seconds:.2f}s")
+            return entry
+    
+    def get_model(self, model_name: str = MODEL_NAME, backend: str = DEFAULT_BACKEND):
+        """Return the shared model instance, loading it on first use"""
+        return self._entry(model_name, backend).model
+    
+    def encode(self, texts: List[str], model_name: str = MODEL_NAME,
+               backend: str = DEFAULT_BACKEND) -> np.ndarray:
+        """
+        Embed texts with the shared model.
+        
+        Args:
+            texts: Texts to embed
+            model_name: Model to use
+            backend: 'torch', 'onnx' or 'onnx_int8'
+        
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        entry = self._entry(model_name, backend)
+        with entry.lock:
+            start = time.perf_counter()
+            vectors = entry.model.encode(texts, batch_size=self.batch_size, show_progress_bar=False)
+            entry.encode_seconds += time.perf_counter() - start
+            entry.encode_calls += 1
+            entry.encoded_texts += len(texts)
+        return np.asarray(vectors, dtype='float32')
+    
+    def warm_up(self, model_name: str = MODEL_NAME, backend: str = DEFAULT_BACKEND) -> float:
+        """
+        Load a model and run one forward pass so the first real query is not slowed down.
+        
+        Returns:
+            Seconds spent loading and warming up
+        """
+        start = time.perf_counter()
+        entry = self._entry(model_name, backend)
+        with entry.lock:
+            entry.model.encode([_WARM_UP_TEXT], batch_size=1, show_progress_bar=False)
+        elapsed = time.perf_counter() - start
+        entry.warm_up_seconds = elapsed
+        logger.info(f"Warmed up {encoder_key(model_name, backend)} in {elapsed:.2f}s")
+        return elapsed
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get load and encode metrics.
+        
+        Returns:
+            Dictionary with encoder settings and per-model timings
+        """
+        with self._lock:
+            models = {}
+            for name, entry in self._models.items():
+                models[name] = {
+                    "load_seconds": round(entry.load_seconds, 4),
+                    "warm_up_seconds": round(entry.warm_up_seconds, 4) if entry.warm_up_seconds is not None else None,
+                    "loaded_at": entry.loaded_at,
+                    "encode_calls": entry.encode_calls,
+                    "encoded_texts": entry.encoded_texts,
+                    "encode_seconds": round(entry.encode_seconds, 4),
+                    "texts_per_second": round(entry.encoded_texts / entry.encode_seconds, 1) if entry.encode_seconds else 0.0
+                }
+            return {
+                "default_backend": DEFAULT_BACKEND,
+                "batch_size": self.batch_size,
+                "threads": self.threads,
+                "device": self.device,
+                "models": models
+            }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry, creating it on first use"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
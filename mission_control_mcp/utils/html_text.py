@@ -0,0 +1,347 @@
+"""
+Title, links and visible text of HTML pages, in a single pass over the markup
+"""
+import os
+import logging
+import importlib.util
+from typing import Dict, Any, List, Optional
+
+from utils.helpers import clean_text
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("htmlparser", "lxml", "bs4")
+# 'auto' is the streaming html.parser engine: it gives exactly the output of the
+# BeautifulSoup reference ('bs4'). lxml is faster still but repairs malformed markup
+# its own way (implied and auto-closed tags), so its text can differ; only used when asked for
+DEFAULT_ENGINE = os.environ.get("MISSION_CONTROL_HTML_ENGINE", "auto")
+
+# Elements whose text is not part of the page content (links inside them are kept)
+HIDDEN_TAGS = frozenset(("script", "style", "nav", "footer", "header"))
+
+# Whether the installed bs4 works with the htmlparser engine (checked on first use)
+_htmlparser_ok: Optional[bool] = None
+
+
+def _result(text: str, title: Optional[str], links: List[str]) -> Dict[str, Any]:
+    # Same as splitting the text into stripped lines and double-space separated phrases and
+    # joining them with newlines first: clean_text turns every whitespace run into one space
+    return {"content": clean_text(text), "title": title, "links": links}
+
+
+def _keep_link(href: Optional[str]) -> bool:
+    return bool(href) and not href.startswith('#')
+
+
+def _extract_bs4(html: str) -> Dict[str, Any]:
+    """Reference engine: BeautifulSoup tree, then find_all, decompose and get_text"""
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Extract title
+    title = soup.title.string if soup.title else "No title"
+    
+    # Extract links
+    links = []
+    for link in soup.find_all('a', href=True):
+        href = link.get('href', '')
+        if href and not href.startswith('#'):
+            links.append(href)
+    
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+    
+    # Get text
+    text = soup.get_text()
+    
+    # Clean up text
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    content = '\n'.join(chunk for chunk in chunks if chunk)
+    
+    # Further clean
+    content = clean_text(content)
+    
+    return {"content": content, "title": str(title) if title is not None else None, "links": links}
+
+
+class _TextCollector:
+    """
+    Stands in for the BeautifulSoup object behind bs4's html.parser tree builder.
+    
+    It receives the same events and keeps BeautifulSoup's bookkeeping (open tag
+    stack, end tags matched to the most recent open tag of that name, whitespace
+    runs collapsed outside pre/textarea, string classes inside rt/rp/template),
+    but instead of building a tree it keeps only what the page extraction reads:
+    the first title's contents, the links and the strings get_text() would return
+    once script/style/nav/footer/header are removed.
+    """
+    
+    ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+    
+    def __init__(self, builder):
+        from bs4.element import NavigableString, CData
+        
+        self.builder = builder
+        self.contains_replacement_characters = False
+        self._text_types = (NavigableString, CData)
+        self._string_containers = builder.string_containers
+        self._preserve_tags = builder.preserve_whitespace_tags
+        self._empty_tags = builder.empty_element_tags
+        
+        self.current_data: List[str] = []
+        self.stack: List[str] = []
+        self.open_counts: Dict[str, int] = {}
+        self.preserve_depth = 0
+        self.hidden_depth = 0
+        self.containers: List[str] = []
+        
+        self.parts: List[str] = []
+        self.links: List[str] = []
+        # Contents of the first <title>: strings and nested lists for child tags
+        self.title: Optional[list] = None
+        self.title_nodes: List[Optional[list]] = []
+    
+    def handle_starttag(self, name, namespace, nsprefix, attrs, sourceline=None, sourcepos=None, namespaces=None):
+        self.endData()
+        if name == "a":
+            href = attrs.get("href")
+            if _keep_link(href):
+                self.links.append(href)
+        
+        node = None
+        parent = self.title_nodes[-1] if self.title_nodes else None
+        if parent is not None:
+            node = []
+            parent.append(node)
+        elif name == "title" and self.title is None:
+            node = self.title = []
+        
+        self.stack.append(name)
+        self.title_nodes.append(node)
+        self.open_counts[name] = self.open_counts.get(name, 0) + 1
+        if name in self._preserve_tags:
+            self.preserve_depth += 1
+        if name in self._string_containers:
+            self.containers.append(name)
+        if name in HIDDEN_TAGS:
+            self.hidden_depth += 1
+        # Freshly opened, so it has no contents: void elements are empty elements
+        return _EMPTY_ELEMENT if name in self._empty_tags else _ELEMENT
+    
+    def _pop(self) -> None:
+        name = self.stack.pop()
+        self.title_nodes.pop()
+        self.open_counts[name] -= 1
+        if name in self._preserve_tags:
+            self.preserve_depth -= 1
+        if self.containers and name == self.containers[-1]:
+            self.containers.pop()
+        if name in HIDDEN_TAGS:
+            self.hidden_depth -= 1
+    
+    def handle_endtag(self, name, nsprefix=None):
+        self.endData()
+        # Pop up to and including the most recent open tag of that name, if there is one
+        if not self.open_counts.get(name):
+            return
+        while self.stack:
+            top = self.stack[-1]
+            self._pop()
+            if top == name:
+                break
+    
+    def handle_data(self, data):
+        self.current_data.append(data)
+    
+    def endData(self, containerClass=None):
+        if not self.current_data:
+            return
+        data = "".join(self.current_data)
+        self.current_data = []
+        if not self.preserve_depth and not data.strip(self.ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        
+        if self.title_nodes and self.title_nodes[-1] is not None:
+            self.title_nodes[-1].append(data)
+        if self.hidden_depth:
+            return
+        if containerClass is None and self.containers:
+            containerClass = self._string_containers[self.containers[-1]]
+        if containerClass is None or containerClass in self._text_types:
+            self.parts.append(data)
+    
+    def close(self) -> None:
+        self.endData()
+        while self.stack:
+            self._pop()
+    
+    def title_string(self) -> Optional[str]:
+        """What Tag.string gives for the first title: its only string, looking through single child tags"""
+        node = self.title
+        while len(node) == 1:
+            node = node[0]
+            if isinstance(node, str):
+                return node
+        return None
+
+
+class _Element:
+    def __init__(self, is_empty_element: bool):
+        self.is_empty_element = is_empty_element
+
+
+_ELEMENT = _Element(False)
+_EMPTY_ELEMENT = _Element(True)
+
+
+def _extract_htmlparser(html: str) -> Dict[str, Any]:
+    """Streaming engine: bs4's html.parser tokenizer feeding _TextCollector"""
+    from bs4.builder import HTMLParserTreeBuilder
+    from bs4.builder._htmlparser import BeautifulSoupHTMLParser
+    from bs4.exceptions import ParserRejectedMarkup
+    
+    builder = HTMLParserTreeBuilder()
+    collector = _TextCollector(builder)
+    args, kwargs = builder.parser_args
+    parser = BeautifulSoupHTMLParser(collector, *args, **kwargs)
+    try:
+        parser.feed(html)
+        parser.close()
+    except AssertionError as e:
+        raise ParserRejectedMarkup(e)
+    collector.close()
+    title = collector.title_string() if collector.title is not None else "No title"
+    return _result("".join(collector.parts), title, collector.links)
+
+
+def _lxml_title(title) -> Optional[str]:
+    """Tag.string of an lxml element: its only child string, looking through single child tags"""
+    while True:
+        children = len(title)
+        if title.text:
+            if children:
+                return None
+            return title.text
+        if children != 1 or title[0].tail:
+            return None
+        title = title[0]
+        if not isinstance(title.tag, str):
+            return title.text  # comment or processing instruction
+
+
+def _extract_lxml(html: str) -> Dict[str, Any]:
+    """lxml (libxml2) engine: C parser, then one walk over the tree"""
+    import lxml.html
+    from lxml import etree
+    
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError) as e:
+        # Empty documents, and str input with an XML encoding declaration
+        logger.debug(f"lxml cannot parse this page ({e}), using the htmlparser engine")
+        return _extract_htmlparser(html)
+    
+    parts = []
+    links = []
+    title = None
+    hidden = 0
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        tag = element.tag
+        if not isinstance(tag, str):
+            # Comments and processing instructions: only the text after them is content
+            if event == "end" and not hidden and element.tail:
+                parts.append(element.tail)
+            continue
+        if event == "start":
+            if tag == "a" and _keep_link(element.get("href")):
+                links.append(element.get("href"))
+            elif tag == "title" and title is None:
+                title = element
+            if tag in HIDDEN_TAGS:
+                hidden += 1
+            elif not hidden and element.text:
+                parts.append(element.text)
+        else:
+            if tag in HIDDEN_TAGS:
+                hidden -= 1
+            if not hidden and element.tail:
+                parts.append(element.tail)
+    
+    return _result("".join(parts), _lxml_title(title) if title is not None else "No title", links)
+
+
+_EXTRACTORS = {
+    "htmlparser": _extract_htmlparser,
+    "lxml": _extract_lxml,
+    "bs4": _extract_bs4,
+}
+
+
+def _htmlparser_supported() -> bool:
+    """
+    The htmlparser engine drives bs4 internals (BeautifulSoupHTMLParser and the
+    tree builder's tag sets) that a bs4 release outside the range pinned in
+    requirements.txt may rename or change; try it once on a small page.
+    """
+    global _htmlparser_ok
+    if _htmlparser_ok is None:
+        sample = "<title>t</title><p>text <a href='/'>link</a></p>"
+        try:
+            _htmlparser_ok = _extract_htmlparser(sample) == _extract_bs4(sample)
+        except (ImportError, AttributeError, TypeError) as e:
+            logger.warning(f"htmlparser engine does not work with this bs4 version: {e}")
+            _htmlparser_ok = False
+        if not _htmlparser_ok:
+            logger.warning("Using the bs4 HTML engine instead of htmlparser")
+    return _htmlparser_ok
+
+
+def available_engines() -> List[str]:
+    """Installed engines"""
+    return [name for name in ENGINES
+            if (name != "lxml" or importlib.util.find_spec("lxml") is not None)
+            and (name != "htmlparser" or _htmlparser_supported())]
+
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    """
+    Pick the engine to use.
+    
+    Args:
+        engine: Engine name, or 'auto'/None for MISSION_CONTROL_HTML_ENGINE
+            (itself 'auto' by default: 'htmlparser')
+    
+    Returns:
+        Name of an installed engine ('bs4', which gives the same output, in place
+        of 'htmlparser' when the installed bs4 does not support it)
+    """
+    engine = engine or DEFAULT_ENGINE
+    if engine == "auto":
+        engine = "htmlparser"
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown HTML engine: {engine} (expected auto or one of {', '.join(ENGINES)})")
+    if engine == "htmlparser" and not _htmlparser_supported():
+        return "bs4"
+    if engine not in available_engines():
+        raise ImportError(f"HTML engine {engine} is not installed. Install with: pip install {engine}")
+    return engine
+
+
+def extract_html(html: str, engine: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Title, links and cleaned visible text of an HTML page.
+    
+    Args:
+        html: Page markup
+        engine: Engine name, 'auto' or None (see resolve_engine)
+    
+    Returns:
+        Dictionary with content (text outside script/style/nav/footer/header, cleaned),
+        title (None if the first <title> holds more than a single string, "No title"
+        if there is none) and links (hrefs of <a> tags in document order, without
+        empty and '#' ones)
+    """
+    return _EXTRACTORS[resolve_engine(engine)](html)
@@ -0,0 +1,384 @@
+"""
+Persistent HTTP response cache for web_fetcher, with conditional revalidation
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Mapping
+
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Set MISSION_CONTROL_HTTP_CACHE=0 to disable the cache
+CACHE_ENABLED = os.environ.get("MISSION_CONTROL_HTTP_CACHE", "1").lower() not in ("0", "false", "no")
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MISSION_CONTROL_HTTP_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".mission_control_mcp", "http_cache")
+)
+# Size bound of the cache directory; least recently used entries are evicted beyond it
+DEFAULT_MAX_BYTES = int(float(os.environ.get("MISSION_CONTROL_HTTP_CACHE_MAX_MB", "256")) * 1024 * 1024)
+# Lifetime guessed from Last-Modified when a response states none: 10% of its age, at most a day
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_SECONDS = 86400
+CACHEABLE_STATUS = (200, 203)
+
+
+def _directives(cache_control: Optional[str]) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into {directive: argument or None}"""
+    directives = {}
+    for part in (cache_control or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    """Timestamp of an HTTP date header, or None if it is missing or invalid"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseRecord:
+    """
+    A downloaded or stored response: status, headers and body bytes.
+    
+    stored_at is when the response was received (or last revalidated);
+    freshness follows RFC 9111 for a private cache. The record is keyed by
+    the requested url; final_url is where redirects led. truncated says why the
+    body is incomplete ('max_bytes', 'time' or 'binary' when it was not read
+    at all); such a record is never stored.
+    """
+    
+    def __init__(self, url: str, status_code: int, headers: Mapping[str, str], body: bytes,
+                 encoding: Optional[str], text_encoding: Optional[str], stored_at: Optional[float] = None,
+                 truncated: Optional[str] = None, text: Optional[str] = None,
+                 final_url: Optional[str] = None):
+        self.url = url
+        self.final_url = final_url or url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.body = body
+        self.encoding = encoding
+        self.text_encoding = text_encoding
+        self.stored_at = stored_at if stored_at is not None else time.time()
+        self.truncated = truncated
+        self._text = text
+    
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = str(self.body, self.text_encoding or "utf-8", errors="replace")
+        return self._text
+    
+    @property
+    def body_hash(self) -> str:
+        return hashlib.blake2b(self.body, digest_size=16).hexdigest()
+    
+    def storable(self) -> bool:
+        directives = _directives(self.headers.get("Cache-Control"))
+        return (self.truncated is None and self.status_code in CACHEABLE_STATUS and "no-store" not in directives
+                and self.headers.get("Vary", "").strip() != "*")
+    
+    def freshness_lifetime(self) -> float:
+        """Seconds the response may be reused without asking the server"""
+        directives = _directives(self.headers.get("Cache-Control"))
+        if "no-cache" in directives:
+            return 0.0
+        max_age = _seconds(directives.get("max-age"))
+        if max_age is not None:
+            return float(max_age)
+        date = _http_date(self.headers.get("Date")) or self.stored_at
+        if "Expires" in self.headers:
+            # An invalid Expires (e.g. "0") means already expired
+            expires = _http_date(self.headers["Expires"])
+            return max(expires - date, 0.0) if expires is not None else 0.0
+        last_modified = _http_date(self.headers.get("Last-Modified"))
+        if last_modified is not None:
+            return min(max(date - last_modified, 0.0) * HEURISTIC_FRACTION, HEURISTIC_MAX_SECONDS)
+        return 0.0
+    
+    def age(self, now: Optional[float] = None) -> float:
+        """Current age: time since it was stored plus the age it already had then"""
+        now = time.time() if now is None else now
+        date = _http_date(self.headers.get("Date"))
+        apparent = max(self.stored_at - date, 0.0) if date is not None else 0.0
+        initial = max(apparent, float(_seconds(self.headers.get("Age")) or 0))
+        return initial + max(now - self.stored_at, 0.0)
+    
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return self.age(now) < self.freshness_lifetime()
+    
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that let the server answer 304 Not Modified"""
+        conditional = {}
+        if self.headers.get("ETag"):
+            conditional["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            conditional["If-Modified-Since"] = self.headers["Last-Modified"]
+        return conditional
+    
+    def to_bytes(self) -> bytes:
+        meta = {
+            "url": self.url,
+            "status_code": self.status_code,
+            "headers": dict(self.headers),
+            "encoding": self.encoding,
+            "text_encoding": self.text_encoding,
+            "stored_at": self.stored_at,
+            "final_url": self.final_url
+        }
+        # json.dumps escapes newlines, so the first newline ends the metadata
+        return json.dumps(meta).encode("utf-8") + b"\n" + self.body
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ResponseRecord":
+        meta, _, body = data.partition(b"\n")
+        meta = json.loads(meta)
+        return cls(meta["url"], meta["status_code"], meta["headers"], body,
+                   meta["encoding"], meta["text_encoding"], meta["stored_at"], final_url=meta.get("final_url"))
+
+
+class HttpCache:
+    """
+    Size-bounded on-disk cache of HTTP responses and of the text parsed from them.
+    
+    Responses are keyed by URL, one file each (metadata line plus body).
+    Parsed text is keyed by a hash of the body, so unchanged content is
+    not parsed again even after a full re-download. Every file is written
+    atomically; an in-memory LRU index of file sizes keeps the directory
+    under max_bytes.
+    """
+    
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir: Directory holding the cache files
+            max_bytes: Size bound of all cache files together
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[Path, int]"] = None
+        self._size = 0
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stored = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self.text_hits = 0
+        self.text_misses = 0
+    
+    def _ensure_index(self) -> "OrderedDict[Path, int]":
+        """LRU index of cache files (oldest first), built from the directory on first use"""
+        if self._index is None:
+            files = []
+            if self.cache_dir.exists():
+                for path in self.cache_dir.glob("*/*/*"):
+                    if path.is_file() and not path.name.endswith(".tmp"):
+                        stat = path.stat()
+                        files.append((stat.st_mtime, path, stat.st_size))
+            self._index = OrderedDict((path, size) for _, path, size in sorted(files))
+            self._size = sum(self._index.values())
+        return self._index
+    
+    def _path(self, kind: str, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / kind / digest[:2] / digest
+    
+    def _read(self, path: Path) -> Optional[bytes]:
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._ensure_index().pop(path, 0)
+            return None
+        with self._lock:
+            index = self._ensure_index()
+            if path in index:
+                index.move_to_end(path)
+        try:
+            # mtime orders the index when another process loads it
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+    
+    def _write(self, path: Path, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write HTTP cache file {path}: {e}")
+            return
+        with self._lock:
+            index = self._ensure_index()
+            self._size += len(data) - index.pop(path, 0)
+            index[path] = len(data)
+            while self._size > self.max_bytes and index:
+                oldest, size = index.popitem(last=False)
+                self._size -= size
+                self.evictions += 1
+                try:
+                    oldest.unlink()
+                except OSError:
+                    pass
+    
+    def get_response(self, url: str) -> Optional[ResponseRecord]:
+        """Stored response for a URL (fresh or not), or None"""
+        data = self._read(self._path("responses", url))
+        if data is None:
+            return None
+        try:
+            return ResponseRecord.from_bytes(data)
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable HTTP cache entry for {url}: {e}")
+            return None
+    
+    def put_response(self, record: ResponseRecord) -> bool:
+        """Store a response if its status and Cache-Control allow it"""
+        if not record.storable():
+            return False
+        self._write(self._path("responses", record.url), record.to_bytes())
+        self.record(stored=1)
+        return True
+    
+    def refresh(self, record: ResponseRecord, headers: Mapping[str, str]) -> ResponseRecord:
+        """
+        Update a stored response after a 304 Not Modified.
+        
+        Args:
+            record: The stored response that was revalidated
+            headers: Headers of the 304 response (new Cache-Control, Expires, ETag, Date, ...)
+        
+        Returns:
+            The stored response with merged headers, fresh as of now
+        """
+        merged = CaseInsensitiveDict(record.headers)
+        for name, value in headers.items():
+            # Body framing headers of the 304 describe an empty message, not the stored body
+            if name.lower() not in ("content-length", "content-encoding", "transfer-encoding"):
+                merged[name] = value
+        refreshed = ResponseRecord(record.url, record.status_code, merged, record.body,
+                                   record.encoding, record.text_encoding, final_url=record.final_url)
+        if not self.put_response(refreshed):
+            self.delete_response(record.url)
+        return refreshed
+    
+    def delete_response(self, url: str) -> None:
+        path = self._path("responses", url)
+        with self._lock:
+            index = self._ensure_index()
+            self._size -= index.pop(path, 0)
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    
+    def get_text(self, body_hash: str, variant: str) -> Optional[Dict[str, Any]]:
+        """
+        Parsed output stored for a body.
+        
+        Args:
+            body_hash: ResponseRecord.body_hash of the parsed body
+            variant: Parser name and version, so a changed parser never reuses old output
+        
+        Returns:
+            The stored dictionary, or None
+        """
+        data = self._read(self._path("text", f"{variant}:{body_hash}"))
+        self.record(text_hits=int(data is not None), text_misses=int(data is None))
+        return json.loads(data) if data is not None else None
+    
+    def put_text(self, body_hash: str, variant: str, parsed: Dict[str, Any]) -> None:
+        self._write(self._path("text", f"{variant}:{body_hash}"), json.dumps(parsed).encode("utf-8"))
+    
+    def record(self, fresh_hits: int = 0, revalidated: int = 0, misses: int = 0, stored: int = 0,
+               bytes_saved: int = 0, text_hits: int = 0, text_misses: int = 0) -> None:
+        with self._lock:
+            self.fresh_hits += fresh_hits
+            self.revalidated += revalidated
+            self.misses += misses
+            self.stored += stored
+            self.bytes_saved += bytes_saved
+            self.text_hits += text_hits
+            self.text_misses += text_misses
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters for this process.
+        
+        Returns:
+            Dictionary with fresh hits, 304 revalidations, misses, parsed-text hits,
+            body bytes not downloaded, evictions and the current size
+        """
+        with self._lock:
+            self._ensure_index()
+            lookups = self.fresh_hits + self.revalidated + self.misses
+            return {
+                "fresh_hits": self.fresh_hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "hit_rate": round((self.fresh_hits + self.revalidated) / lookups, 4) if lookups else 0.0,
+                "stored": self.stored,
+                "bytes_saved": self.bytes_saved,
+                "text_hits": self.text_hits,
+                "text_misses": self.text_misses,
+                "evictions": self.evictions,
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "cache_dir": str(self.cache_dir)
+            }
+    
+    def clear(self) -> None:
+        """Delete all cache files and reset the counters"""
+        with self._lock:
+            if self.cache_dir.exists():
+                shutil.rmtree(self.cache_dir)
+            self._index = None
+            self._size = 0
+            self.fresh_hits = self.revalidated = self.misses = self.stored = self.evictions = 0
+            self.bytes_saved = self.text_hits = self.text_misses = 0
+
+
+_default_cache: Optional[HttpCache] = None
+_default_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Get the process-wide HTTP cache, or None if it is disabled"""
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache(DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES)
+            logger.info(f"HTTP cache ready ({DEFAULT_CACHE_DIR}, max {DEFAULT_MAX_BYTES / 1024 / 1024:.0f} MB)")
+        return _default_cache
@@ -0,0 +1,279 @@
+"""
+PDF text extraction backends, chosen among the libraries that are installed
+"""
+import os
+import logging
+import importlib.util
+from abc import ABC, abstractmethod
+from importlib import metadata as importlib_metadata
+from typing import Dict, Any, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pypdfium2", "pdfminer", "pypdf", "pypdf2")
+# Backends 'auto' picks from, fastest first (benchmarks/bench_pdf_backends.py): on text PDFs
+# pdfminer and pypdf extract fewer pages/sec than PyPDF2, so they are only used when asked for
+AUTO_PREFERENCE = ("pypdfium2", "pypdf2")
+DEFAULT_BACKEND = os.environ.get("MISSION_CONTROL_PDF_BACKEND", "auto")
+
+# Backend name -> (module to import, distribution that carries the version)
+_MODULES = {
+    "pypdfium2": ("pypdfium2", "pypdfium2"),
+    "pdfminer": ("pdfminer", "pdfminer.six"),
+    "pypdf": ("pypdf", "pypdf"),
+    "pypdf2": ("PyPDF2", "PyPDF2"),
+}
+_METADATA_FIELDS = (
+    ("author", "Author"),
+    ("creator", "Creator"),
+    ("producer", "Producer"),
+    ("subject", "Subject"),
+    ("title", "Title"),
+    ("creation_date", "CreationDate"),
+)
+
+
+def document_metadata(info: Mapping[str, Any]) -> Dict[str, str]:
+    """
+    Normalize a PDF Info dictionary to read_pdf's metadata fields.
+    
+    Args:
+        info: Info entries, keyed with or without the leading '/'
+    
+    Returns:
+        Dictionary of author, creator, producer, subject, title and creation_date
+        ("Unknown" when missing); empty if the document has no Info entries
+    """
+    values = {str(key).lstrip("/"): value for key, value in info.items() if value not in (None, "")}
+    if not values:
+        return {}
+    return {field: str(values.get(key, "Unknown")) for field, key in _METADATA_FIELDS}
+
+
+class PdfDocument(ABC):
+    """
+    An open PDF, as seen by one extraction library.
+    
+    Subclasses open the file in __init__ and must implement page_count,
+    page_text() and info(). Pages are numbered from 1.
+    """
+    
+    name = ""
+    
+    def __init__(self, file_path: str):
+        self.file_path = str(file_path)
+    
+    @property
+    @abstractmethod
+    def page_count(self) -> int:
+        """Number of pages"""
+    
+    @abstractmethod
+    def page_text(self, page_num: int) -> str:
+        """Text of one page; raises if the page cannot be extracted"""
+    
+    @abstractmethod
+    def info(self) -> Mapping[str, Any]:
+        """Raw Info dictionary entries"""
+    
+    def metadata(self) -> Dict[str, str]:
+        return document_metadata(self.info())
+    
+    def close(self) -> None:
+        pass
+    
+    def __enter__(self) -> "PdfDocument":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PyPdf2Document(PdfDocument):
+    """PyPDF2: pure Python, always installed, the slowest"""
+    
+    name = "pypdf2"
+    
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        from PyPDF2 import PdfReader
+        self.reader = PdfReader(self.file_path)
+    
+    @property
+    def page_count(self) -> int:
+        return len(self.reader.pages)
+    
+    def page_text(self, page_num: int) -> str:
+        return self.reader.pages[page_num - 1].extract_text() or ""
+    
+    def info(self) -> Mapping[str, Any]:
+        return self.reader.metadata or {}
+
+
+class PypdfDocument(PyPdf2Document):
+    """pypdf: the maintained successor of PyPDF2, same API, faster text extraction"""
+    
+    name = "pypdf"
+    
+    def __init__(self, file_path: str):
+        PdfDocument.__init__(self, file_path)
+        from pypdf import PdfReader
+        self.reader = PdfReader(self.file_path)
+
+
+class PdfiumDocument(PdfDocument):
+    """pypdfium2: bindings to PDFium, Chrome's C++ PDF engine"""
+    
+    name = "pypdfium2"
+    
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        import pypdfium2
+        self.document = pypdfium2.PdfDocument(self.file_path)
+    
+    @property
+    def page_count(self) -> int:
+        return len(self.document)
+    
+    def page_text(self, page_num: int) -> str:
+        page = self.document[page_num - 1]
+        try:
+            text_page = page.get_textpage()
+            try:
+                return text_page.get_text_range().replace("\r\n", "\n")
+            finally:
+                text_page.close()
+        finally:
+            page.close()
+    
+    def info(self) -> Mapping[str, Any]:
+        return self.document.get_metadata_dict()
+    
+    def close(self) -> None:
+        self.document.close()
+
+
+class PdfminerDocument(PdfDocument):
+    """pdfminer.six with text-box ordering disabled: lines in content-stream order"""
+    
+    name = "pdfminer"
+    
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.layout import LAParams
+        
+        self._file = open(self.file_path, "rb")
+        self.document = PDFDocument(PDFParser(self._file))
+        self._page_iter = PDFPage.create_pages(self.document)
+        self._pages: List[Any] = []
+        self._page_count: Optional[int] = None
+        self._resources = PDFResourceManager(caching=True)
+        # Characters are still grouped into words and lines (without any grouping, text
+        # objects run together), but the costly reading-order analysis of boxes is skipped
+        self._laparams = LAParams(boxes_flow=None)
+    
+    def _page(self, page_num: int):
+        # The page tree is walked only as far as the requested page
+        while len(self._pages) < page_num:
+            page = next(self._page_iter, None)
+            if page is None:
+                raise IndexError(f"Page {page_num} out of range")
+            self._pages.append(page)
+        return self._pages[page_num - 1]
+    
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            from pdfminer.pdftypes import resolve1
+            try:
+                self._page_count = int(resolve1(self.document.catalog["Pages"])["Count"])
+            except Exception:
+                # No usable /Count: walk the rest of the tree, keeping the pages for _page
+                self._pages.extend(self._page_iter)
+                self._page_count = len(self._pages)
+        return self._page_count
+    
+    def page_text(self, page_num: int) -> str:
+        from io import StringIO
+        from pdfminer.converter import TextConverter
+        from pdfminer.pdfinterp import PDFPageInterpreter
+        
+        output = StringIO()
+        with TextConverter(self._resources, output, laparams=self._laparams) as device:
+            PDFPageInterpreter(self._resources, device).process_page(self._page(page_num))
+        return output.getvalue()
+    
+    def info(self) -> Mapping[str, Any]:
+        from pdfminer.pdftypes import resolve1
+        from pdfminer.utils import decode_text
+        
+        entries = {}
+        for info in self.document.info:
+            for key, value in info.items():
+                value = resolve1(value)
+                entries[key] = decode_text(value) if isinstance(value, bytes) else value
+        return entries
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+_DOCUMENT_CLASSES = {
+    "pypdfium2": PdfiumDocument,
+    "pdfminer": PdfminerDocument,
+    "pypdf": PypdfDocument,
+    "pypdf2": PyPdf2Document,
+}
+
+
+def available_backends() -> List[str]:
+    """Installed backends"""
+    return [name for name in BACKENDS if importlib.util.find_spec(_MODULES[name][0]) is not None]
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Pick the backend to use.
+    
+    Args:
+        backend: Backend name, or 'auto'/None for MISSION_CONTROL_PDF_BACKEND
+            (itself 'auto' by default: the first installed of AUTO_PREFERENCE)
+    
+    Returns:
+        Name of an installed backend
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "auto":
+        installed = available_backends()
+        return next((name for name in AUTO_PREFERENCE if name in installed), "pypdf2")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {backend} (expected auto or one of {', '.join(BACKENDS)})")
+    if importlib.util.find_spec(_MODULES[backend][0]) is None:
+        raise ImportError(f"PDF backend {backend} is not installed. Install with: pip install {_MODULES[backend][1]}")
+    return backend
+
+
+def backend_version(backend: str) -> str:
+    """Installed version of a backend's library"""
+    try:
+        return importlib_metadata.version(_MODULES[backend][1])
+    except importlib_metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def open_document(file_path: str, backend: Optional[str] = None) -> PdfDocument:
+    """
+    Open a PDF with a backend.
+    
+    Args:
+        file_path: Path to the PDF file
+        backend: Backend name, 'auto' or None (see resolve_backend)
+    
+    Returns:
+        Open PdfDocument
+    """
+    return _DOCUMENT_CLASSES[resolve_backend(backend)](file_path)
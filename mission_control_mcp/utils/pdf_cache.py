@@ -0,0 +1,299 @@
+"""
+On-disk cache of text extracted from PDFs, stored compressed page by page
+"""
+import os
+import json
+import zlib
+import shutil
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Set MISSION_CONTROL_PDF_CACHE=0 to disable the cache
+CACHE_ENABLED = os.environ.get("MISSION_CONTROL_PDF_CACHE", "1").lower() not in ("0", "false", "no")
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MISSION_CONTROL_PDF_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".mission_control_mcp", "pdf_cache")
+)
+# 'stat' keys entries by path, size and modification time (no file read);
+# 'hash' by a hash of the file content (survives copies and renames, reads the whole file)
+DEFAULT_KEY_MODE = os.environ.get("MISSION_CONTROL_PDF_CACHE_KEY", "stat")
+KEY_MODES = ("stat", "hash")
+# Size bound of the cache directory (MISSION_CONTROL_PDF_CACHE_MAX_MB); least recently used documents go first
+DEFAULT_MAX_BYTES = int(float(os.environ.get("MISSION_CONTROL_PDF_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+_HASH_CHUNK = 1 << 20
+_COMPRESS_LEVEL = 6
+
+
+def _write_atomic(path: Path, data: bytes) -> int:
+    """
+    Write via a temporary file and rename, so readers never see a partial file.
+    
+    Returns:
+        Size of the file that was replaced (0 if there was none)
+    """
+    try:
+        replaced = path.stat().st_size
+    except FileNotFoundError:
+        replaced = 0
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return replaced
+
+
+class CachedDocument:
+    """
+    Cache entry of one PDF: document info plus one compressed file per page.
+    
+    Pages are stored as they are extracted, so partial reads (page ranges,
+    cursor paging) fill the entry incrementally.
+    """
+    
+    def __init__(self, cache: "PdfTextCache", directory: Path):
+        self._cache = cache
+        self.directory = directory
+        self._info: Optional[Dict[str, Any]] = None
+        self._used = False
+    
+    def _use(self) -> None:
+        # Once per open document is enough to keep the entry recently used
+        if not self._used:
+            self._used = True
+            self._cache.touch(self.directory)
+    
+    @property
+    def info(self) -> Optional[Dict[str, Any]]:
+        """Stored document info (page count, metadata), or None if not cached yet"""
+        if self._info is None:
+            try:
+                with open(self.directory / "info.json", "r", encoding="utf-8") as f:
+                    self._info = json.load(f)
+            except FileNotFoundError:
+                return None
+            self._use()
+        return self._info
+    
+    def set_info(self, info: Dict[str, Any]) -> None:
+        self._info = info
+        self._write(self.directory / "info.json", json.dumps(info, ensure_ascii=False).encode("utf-8"))
+    
+    def _write(self, path: Path, data: bytes) -> bool:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            replaced = _write_atomic(path, data)
+        except OSError as e:
+            logger.warning(f"Could not write PDF cache entry {self.directory}: {e}")
+            return False
+        self._cache.grow(self.directory, len(data) - replaced)
+        return True
+    
+    def get_page(self, page_num: int) -> Optional[str]:
+        """Cached text of a page, or None on a miss"""
+        try:
+            with open(self.directory / f"{page_num}.z", "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+        except (FileNotFoundError, zlib.error):
+            self._cache.record(misses=1)
+            return None
+        self._use()
+        self._cache.record(hits=1, served=len(text.encode("utf-8")))
+        return text
+    
+    def get_pages(self, page_nums: Iterable[int]) -> Dict[int, str]:
+        """Cached texts of the given pages; missing pages are left out"""
+        found = {}
+        for page_num in page_nums:
+            text = self.get_page(page_num)
+            if text is not None:
+                found[page_num] = text
+        return found
+    
+    def put_page(self, page_num: int, text: str) -> None:
+        raw = text.encode("utf-8")
+        compressed = zlib.compress(raw, _COMPRESS_LEVEL)
+        if self._write(self.directory / f"{page_num}.z", compressed):
+            self._cache.record(written=len(raw), stored=len(compressed))
+
+
+class PdfTextCache:
+    """
+    Extracted-text cache shared by every tool that reads PDFs.
+    
+    An entry is keyed by the file identity (path, size and mtime, or a
+    content hash) together with the extractor name and version, so a
+    changed file or a different extractor never returns stale text. Each
+    page is zlib-compressed into its own file, written atomically, so
+    several processes can share the directory. An in-memory LRU index of
+    entry sizes keeps the directory under max_bytes (plus at most the
+    document being written), dropping whole documents.
+    """
+    
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, key_mode: str = DEFAULT_KEY_MODE,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir: Directory holding the cache entries
+            key_mode: 'stat' (path, size, mtime) or 'hash' (file content)
+            max_bytes: Size bound of all cache entries together
+        """
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"Unknown cache key mode: {key_mode} (expected one of {', '.join(KEY_MODES)})")
+        self.cache_dir = Path(cache_dir)
+        self.key_mode = key_mode
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[Path, int]"] = None
+        self._size = 0
+        self.evictions = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.bytes_served = 0
+        self.bytes_written = 0
+        self.bytes_stored = 0
+    
+    def key(self, file_path: str, extractor: str) -> str:
+        """
+        Cache key of a PDF as read by a given extractor.
+        
+        Args:
+            file_path: Path to the PDF file
+            extractor: Extractor name and version, e.g. 'pypdf2-3.0.1/1'
+        
+        Returns:
+            Hex digest identifying the entry
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(extractor.encode("utf-8"))
+        digest.update(b"\0")
+        path = Path(file_path).resolve()
+        if self.key_mode == "hash":
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+                    digest.update(block)
+        else:
+            stat = path.stat()
+            digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()
+    
+    def open(self, file_path: str, extractor: str) -> CachedDocument:
+        """Cache entry of a PDF (which may still be empty)"""
+        key = self.key(file_path, extractor)
+        with self._lock:
+            # Indexed before anything is written, so the writes are not counted twice
+            self._ensure_index()
+        return CachedDocument(self, self.cache_dir / key[:2] / key)
+    
+    def _ensure_index(self) -> "OrderedDict[Path, int]":
+        """LRU index of entry directories and their sizes (oldest first), built from the directory on first use"""
+        if self._index is None:
+            entries = []
+            if self.cache_dir.exists():
+                for directory in self.cache_dir.glob("*/*"):
+                    try:
+                        size = sum(path.stat().st_size for path in directory.iterdir()
+                                   if not path.name.endswith(".tmp"))
+                        entries.append((directory.stat().st_mtime, directory, size))
+                    except OSError:
+                        continue
+            self._index = OrderedDict((directory, size) for _, directory, size in sorted(entries))
+            self._size = sum(self._index.values())
+        return self._index
+    
+    def touch(self, directory: Path) -> None:
+        """Mark an entry as recently used"""
+        with self._lock:
+            index = self._ensure_index()
+            if directory in index:
+                index.move_to_end(directory)
+        try:
+            # mtime orders the index when another process loads it
+            os.utime(directory)
+        except OSError:
+            pass
+    
+    def grow(self, directory: Path, delta: int) -> None:
+        """Account for bytes written to an entry, evicting the least recently used entries over max_bytes"""
+        with self._lock:
+            index = self._ensure_index()
+            index[directory] = index.pop(directory, 0) + delta
+            self._size += delta
+            # The entry being written is never dropped, so one document larger than
+            # max_bytes is still cached whole instead of evicting itself page by page
+            while self._size > self.max_bytes and len(index) > 1:
+                oldest, size = index.popitem(last=False)
+                self._size -= size
+                self.evictions += 1
+                shutil.rmtree(oldest, ignore_errors=True)
+    
+    def record(self, hits: int = 0, misses: int = 0, served: int = 0,
+               written: int = 0, stored: int = 0) -> None:
+        with self._lock:
+            self.page_hits += hits
+            self.page_misses += misses
+            self.bytes_served += served
+            self.bytes_written += written
+            self.bytes_stored += stored
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters for this process.
+        
+        Returns:
+            Dictionary with page hits/misses, hit rate and byte counts: text served from
+            the cache instead of being re-extracted, text written vs bytes stored,
+            evictions and the current size
+        """
+        with self._lock:
+            self._ensure_index()
+            lookups = self.page_hits + self.page_misses
+            return {
+                "page_hits": self.page_hits,
+                "page_misses": self.page_misses,
+                "hit_rate": round(self.page_hits / lookups, 4) if lookups else 0.0,
+                "bytes_served_from_cache": self.bytes_served,
+                "bytes_written": self.bytes_written,
+                "bytes_stored_compressed": self.bytes_stored,
+                "compression_saved_bytes": self.bytes_written - self.bytes_stored,
+                "evictions": self.evictions,
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "key_mode": self.key_mode,
+                "cache_dir": str(self.cache_dir)
+            }
+    
+    def clear(self) -> None:
+        """Delete all cache entries and reset the counters"""
+        with self._lock:
+            if self.cache_dir.exists():
+                shutil.rmtree(self.cache_dir)
+            self._index = None
+            self._size = 0
+            self.page_hits = self.page_misses = self.evictions = 0
+            self.bytes_served = self.bytes_written = self.bytes_stored = 0
+
+
+_default_cache: Optional[PdfTextCache] = None
+_default_lock = threading.Lock()
+
+
+def get_pdf_cache() -> Optional[PdfTextCache]:
+    """Get the process-wide PDF text cache, or None if it is disabled"""
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PdfTextCache(DEFAULT_CACHE_DIR, DEFAULT_KEY_MODE, DEFAULT_MAX_BYTES)
+            logger.info(f"PDF text cache ready ({DEFAULT_CACHE_DIR}, key: {DEFAULT_KEY_MODE}, "
+                        f"max {DEFAULT_MAX_BYTES / 1024 / 1024:.0f} MB)")
+        return _default_cache
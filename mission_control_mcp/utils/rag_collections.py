@@ -0,0 +1,218 @@
+"""
+Persistent, named RAG collections stored on disk
+"""
+import os
+import re
+import shutil
+import threading
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+
+from utils.rag_utils import SimpleRAGStore
+
+logger = logging.getLogger(__name__)
+
+# Root directory for all collections; override with MISSION_CONTROL_RAG_DIR
+COLLECTIONS_DIR = os.environ.get(
+    "MISSION_CONTROL_RAG_DIR",
+    os.path.join(os.path.expanduser("~"), ".mission_control_mcp", "collections")
+)
+
+# Open collections read-only from memory-mapped files (see SimpleRAGStore.load); useful when
+# several server processes serve the same collections
+MMAP_COLLECTIONS = os.environ.get("MISSION_CONTROL_RAG_MMAP", "").lower() in ("1", "true", "yes")
+
+_COLLECTION_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+# Loaded stores keyed by collection id, with the on-disk stamp they were read at
+_loaded: Dict[str, Tuple[int, SimpleRAGStore]] = {}
+_lock = threading.RLock()
+
+
+def validate_collection_id(collection_id: str) -> str:
+    """
+    Validate a collection id so it is safe to use as a directory name.
+    
+    Args:
+        collection_id: Requested collection id
+    
+    Returns:
+        The validated collection id
+    """
+    if not collection_id or not _COLLECTION_ID_PATTERN.match(collection_id) or ".." in collection_id:
+        raise ValueError(
+            f"Invalid collection id: {collection_id!r} "
+            "(use 1-64 letters, digits, '_', '-' or '.')"
+        )
+    return collection_id
+
+
+def collection_path(collection_id: str) -> Path:
+    """Return the directory that holds a collection"""
+    return Path(COLLECTIONS_DIR) / validate_collection_id(collection_id)
+
+
+def collection_exists(collection_id: str) -> bool:
+    """Check whether a collection has been saved to disk"""
+    return (collection_path(collection_id) / "store.json").exists()
+
+
+def _disk_stamp(collection_id: str) -> int:
+    """Modification time of the collection manifest, used to detect writes by other processes"""
+    return (collection_path(collection_id) / "store.json").stat().st_mtime_ns
+
+
+def save_collection(collection_id: str, store: SimpleRAGStore) -> None:
+    """
+    Persist a store as a collection, replacing what is on disk.
+    
+    A store that was loaded from or last saved to this collection only
+    writes the documents added since (see SimpleRAGStore.save).
+    
+    Args:
+        collection_id: Collection id
+        store: Store to write
+    """
+    with _lock:
+        _save(collection_id, store)
+
+
+def _save(collection_id: str, store: SimpleRAGStore) -> None:
+    """Write a store to its collection directory and refresh the in-memory copy"""
+    path = collection_path(collection_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    store.save(str(path), incremental=True)
+    _loaded[collection_id] = (_disk_stamp(collection_id), store)
+
+
+def get_collection(collection_id: str, read_only: Optional[bool] = None) -> SimpleRAGStore:
+    """
+    Get a collection, loading it from disk only if it is not already in memory.
+    
+    Args:
+        collection_id: Collection id
+        read_only: Open the collection memory-mapped and read-only
+            (default: MISSION_CONTROL_RAG_MMAP); False guarantees a writable store
+    
+    Returns:
+        SimpleRAGStore for the collection
+    """
+    if read_only is None:
+        read_only = MMAP_COLLECTIONS
+    
+    with _lock:
+        if not collection_exists(collection_id):
+            raise FileNotFoundError(f"Collection not found: {collection_id}")
+        
+        stamp = _disk_stamp(collection_id)
+        cached = _loaded.get(collection_id)
+        # A writable copy also serves read-only callers
+        if cached is not None and cached[0] == stamp and (read_only or not cached[1].read_only):
+            return cached[1]
+        
+        store = SimpleRAGStore.load(str(collection_path(collection_id)), mmap=read_only)
+        _loaded[collection_id] = (stamp, store)
+        return store
+
+
+def create_collection(collection_id: str, documents: List[str], overwrite: bool = False,
+                      metadata: Optional[List[Optional[Dict[str, Any]]]] = None,
+                      **store_options: Any) -> SimpleRAGStore:
+    """
+    Create a new collection from documents and persist it.
+    
+    Args:
+        collection_id: Collection id
+        documents: Documents to index
+        overwrite: Replace an existing collection with the same id
+        metadata: Optional provenance dict per document (source, page, start, end, ingested_at)
+        **store_options: Index settings passed to SimpleRAGStore (index_type, nprobe, ...)
+    
+    Returns:
+        The populated SimpleRAGStore
+    """
+    with _lock:
+        if collection_exists(collection_id) and not overwrite:
+            raise FileExistsError(f"Collection already exists: {collection_id}")
+        
+        store = SimpleRAGStore(**store_options)
+        if documents:
+            store.add_documents(documents, metadata)
+        _save(collection_id, store)
+        logger.info(f"Created collection '{collection_id}' with {len(store.documents)} documents")
+        return store
+
+
+def add_to_collection(collection_id: str, documents: List[str],
+                      metadata: Optional[List[Optional[Dict[str, Any]]]] = None) -> Tuple[SimpleRAGStore, int]:
+    """
+    Append documents to an existing collection and persist it.
+    
+    Only the new documents are embedded; the existing index is reused, and
+    only they are written to disk, as an append segment.
+    
+    Args:
+        collection_id: Collection id
+        documents: Documents to append
+        metadata: Optional provenance dict per document
+    
+    Returns:
+        Tuple of (the updated SimpleRAGStore, documents actually added: near-duplicates
+        skipped by the collection's dedup filter are not counted)
+    """
+    with _lock:
+        store = get_collection(collection_id, read_only=False)
+        added = store.add_documents(documents, metadata)
+        _save(collection_id, store)
+        return store, added
+
+
+def delete_collection(collection_id: str) -> bool:
+    """
+    Delete a collection from disk and memory.
+    
+    Returns:
+        True if a collection was deleted
+    """
+    with _lock:
+        _loaded.pop(collection_id, None)
+        path = collection_path(collection_id)
+        if not path.exists():
+            return False
+        shutil.rmtree(path)
+        return True
+
+
+def list_collections() -> List[Dict[str, Any]]:
+    """
+    List all collections found on disk.
+    
+    Returns:
+        List of dictionaries with collection id and document count
+    """
+    import json
+    
+    root = Path(COLLECTIONS_DIR)
+    if not root.exists():
+        return []
+    
+    collections = []
+    for entry in sorted(root.iterdir()):
+        manifest = entry / "store.json"
+        if not entry.is_dir() or not manifest.exists():
+            continue
+        try:
+            with open(manifest, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable collection {entry.name}: {e}")
+            continue
+        collections.append({
+            "collection_id": entry.name,
+            "document_count": info.get("document_count", 0),
+            "index_type": info.get("index", {}).get("index_type", "flat"),
+            "path": str(entry)
+        })
+    return collections
+
@@ -0,0 +1,237 @@
+"""
+Columnar per-document metadata (provenance) for RAG stores, with vectorized filtering
+"""
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union, Iterable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Numeric columns and their dtypes; -1 (or NaN for timestamps) marks a missing value
+NUMERIC_COLUMNS = {
+    "page": np.int32,
+    "start": np.int64,
+    "end": np.int64,
+    "ingested_at": np.float64
+}
+FILTER_KEYS = ("source", "source_prefix", "page_min", "page_max", "ingested_after", "ingested_before")
+
+
+class _Column:
+    """One-dimensional numpy column that grows by doubling, like _VectorBuffer"""
+    
+    def __init__(self, dtype, data: Optional[np.ndarray] = None):
+        if data is None:
+            self._data = np.empty(1024, dtype=dtype)
+            self._size = 0
+        else:
+            self._data = data
+            self._size = len(data)
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self._size]
+    
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+    
+    def extend(self, values: np.ndarray) -> None:
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+
+
+def _to_timestamp(value: Union[str, float, int, datetime]) -> float:
+    """Accept epoch seconds, datetimes or ISO-8601 strings"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class MetadataTable:
+    """
+    Per-document metadata stored column by column.
+    
+    Sources are dictionary-encoded (one int32 id per document plus a list
+    of distinct source strings); page, character offsets and ingest time
+    are numpy columns. Rows are aligned with the store's documents, so the
+    row number is the FAISS id and filters evaluate to id arrays directly.
+    """
+    
+    def __init__(self):
+        self.sources: List[str] = []
+        self._source_ids: Dict[str, int] = {}
+        self._source_column = _Column(np.int32)
+        self._columns = {name: _Column(dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    
+    def __len__(self) -> int:
+        return len(self._source_column)
+    
+    def append(self, count: int, rows: Optional[List[Optional[Dict[str, Any]]]] = None,
+               ingested_at: Optional[float] = None) -> None:
+        """
+        Append metadata rows for newly added documents.
+        
+        Args:
+            count: Number of documents added
+            rows: Optional metadata dict per document with keys 'source', 'page',
+                'start', 'end' and 'ingested_at'; missing keys are left empty
+            ingested_at: Timestamp for rows that do not set one (default: now)
+        """
+        if rows is not None and len(rows) != count:
+            raise ValueError(f"Expected {count} metadata rows, got {len(rows)}")
+        rows = rows or [None] * count
+        ingested_at = datetime.now().timestamp() if ingested_at is None else ingested_at
+        
+        source_ids = np.full(count, -1, dtype=np.int32)
+        values = {name: np.full(count, np.nan if dtype == np.float64 else -1, dtype=dtype)
+                  for name, dtype in NUMERIC_COLUMNS.items()}
+        values["ingested_at"][:] = ingested_at
+        for i, row in enumerate(rows):
+            if not row:
+                continue
+            source = row.get("source")
+            if source is not None:
+                source_id = self._source_ids.get(source)
+                if source_id is None:
+                    source_id = len(self.sources)
+                    self.sources.append(source)
+                    self._source_ids[source] = source_id
+                source_ids[i] = source_id
+            for name in ("page", "start", "end"):
+                if row.get(name) is not None:
+                    values[name][i] = row[name]
+            if row.get("ingested_at") is not None:
+                values["ingested_at"][i] = _to_timestamp(row["ingested_at"])
+        
+        self._source_column.extend(source_ids)
+        for name, column in self._columns.items():
+            column.extend(values[name])
+    
+    def row(self, doc_id: int) -> Dict[str, Any]:
+        """Metadata of one document, with empty fields omitted"""
+        result: Dict[str, Any] = {}
+        source_id = int(self._source_column.view[doc_id])
+        if source_id >= 0:
+            result["source"] = self.sources[source_id]
+        for name in ("page", "start", "end"):
+            value = int(self._columns[name].view[doc_id])
+            if value >= 0:
+                result[name] = value
+        ingested_at = float(self._columns["ingested_at"].view[doc_id])
+        if not np.isnan(ingested_at):
+            result["ingested_at"] = datetime.fromtimestamp(ingested_at).isoformat(timespec="seconds")
+        return result
+    
+    def rows(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Rows [start, stop) in the form append() takes, ingest times as epoch seconds"""
+        source_ids = self._source_column.view[start:stop]
+        columns = {name: column.view[start:stop] for name, column in self._columns.items()}
+        rows = []
+        for i, source_id in enumerate(source_ids):
+            row: Dict[str, Any] = {name: int(columns[name][i]) for name in ("page", "start", "end")
+                                   if columns[name][i] >= 0}
+            if source_id >= 0:
+                row["source"] = self.sources[source_id]
+            if not np.isnan(columns["ingested_at"][i]):
+                row["ingested_at"] = float(columns["ingested_at"][i])
+            rows.append(row)
+        return rows
+    
+    def select(self, source: Union[str, Iterable[str], None] = None, source_prefix: Optional[str] = None,
+               page_min: Optional[int] = None, page_max: Optional[int] = None,
+               ingested_after: Union[str, float, None] = None,
+               ingested_before: Union[str, float, None] = None) -> np.ndarray:
+        """
+        Find the documents matching all given conditions.
+        
+        Args:
+            source: Exact source path/URL, or a list of them
+            source_prefix: Source prefix, e.g. a directory or site
+            page_min: Lowest page number (inclusive)
+            page_max: Highest page number (inclusive)
+            ingested_after: Earliest ingest time (ISO-8601 string or epoch seconds)
+            ingested_before: Latest ingest time (ISO-8601 string or epoch seconds)
+        
+        Returns:
+            Sorted int64 array of matching document ids
+        """
+        mask = np.ones(len(self), dtype=bool)
+        
+        if source is not None or source_prefix is not None:
+            # Resolve the condition on the few distinct sources, then map it to documents
+            wanted = np.zeros(len(self.sources) + 1, dtype=bool)  # last slot: no source
+            names = {source} if isinstance(source, str) else set(source or [])
+            for source_id, name in enumerate(self.sources):
+                if (source is None or name in names) and \
+                        (source_prefix is None or name.startswith(source_prefix)):
+                    wanted[source_id] = True
+            mask &= wanted[self._source_column.view]
+        
+        pages = self._columns["page"].view
+        if page_min is not None:
+            mask &= pages >= page_min
+        if page_max is not None:
+            mask &= (pages >= 0) & (pages <= page_max)
+        
+        times = self._columns["ingested_at"].view
+        if ingested_after is not None:
+            mask &= times >= _to_timestamp(ingested_after)
+        if ingested_before is not None:
+            mask &= times <= _to_timestamp(ingested_before)
+        
+        return np.flatnonzero(mask).astype(np.int64)
+    
+    @property
+    def nbytes(self) -> int:
+        return (self._source_column.nbytes + sum(column.nbytes for column in self._columns.values())
+                + sum(len(source) for source in self.sources))
+    
+    def save(self, directory: Path) -> None:
+        """Write the table as one .npy file per column plus the source list"""
+        np.save(directory / "meta_source.npy", self._source_column.view)
+        for name, column in self._columns.items():
+            np.save(directory / f"meta_{name}.npy", column.view)
+        with open(directory / "meta_sources.json", "w", encoding="utf-8") as f:
+            json.dump(self.sources, f, ensure_ascii=False)
+    
+    @classmethod
+    def load(cls, directory: Path, count: int, mmap: bool = False) -> "MetadataTable":
+        """
+        Read a table written by save(), or create empty rows for stores saved without one.
+        
+        Args:
+            directory: Store directory
+            count: Number of documents in the store
+            mmap: Memory-map the columns read-only
+        
+        Returns:
+            MetadataTable with one row per document
+        """
+        table = cls()
+        if not (directory / "meta_sources.json").exists():
+            table.append(count, ingested_at=float("nan"))
+            return table
+        
+        with open(directory / "meta_sources.json", "r", encoding="utf-8") as f:
+            table.sources = json.load(f)
+        table._source_ids = {source: i for i, source in enumerate(table.sources)}
+        mode = 'r' if mmap else None
+        table._source_column = _Column(np.int32, np.load(directory / "meta_source.npy", mmap_mode=mode))
+        for name, dtype in NUMERIC_COLUMNS.items():
+            table._columns[name] = _Column(dtype, np.load(directory / f"meta_{name}.npy", mmap_mode=mode))
+        return table
@@ -2,130 +2,1274 @@
 RAG (Retrieval Augmented Generation) utilities using FAISS and embeddings
 """
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Sequence, Iterable, Union
+from pathlib import Path
+import os
+import sys
+import json
+import shutil
+import time
 import logging
 
+from utils.embedding_cache import get_embedding_cache
+from utils.embedding_models import get_model_registry, validate_backend, encoder_key, MODEL_NAME, DEFAULT_BACKEND
+from utils.bm25 import BM25Index
+from utils.rag_metadata import MetadataTable, FILTER_KEYS
+from utils.dedup import NearDuplicateIndex, minhash_batch
+
 logger = logging.getLogger(__name__)
 
+# Bump when the on-disk layout written by SimpleRAGStore.save changes; older versions
+# listed in READABLE_FORMAT_VERSIONS can still be loaded (3 added append segments)
+STORE_FORMAT_VERSION = 3
+READABLE_FORMAT_VERSIONS = (1, 2, 3)
+
+# Similarity metrics: L2 distance, or cosine via inner product over L2-normalized embeddings
+METRICS = ("l2", "cosine")
+# Retrieval modes: dense vectors only, BM25 only (no embedding model), or both fused with RRF
+RETRIEVAL_MODES = ("dense", "sparse", "hybrid")
+# Reciprocal-rank fusion constant and number of candidates taken from each retriever
+DEFAULT_RRF_K = 60
+FUSION_CANDIDATES = 50
+# Index backends: exact brute force, inverted file (optionally product quantized) and graph based
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+DEFAULT_TRAIN_THRESHOLD = 10_000
+DEFAULT_NPROBE = 8
+DEFAULT_EF_SEARCH = 64
+DEFAULT_HNSW_M = 32
+# Cap on training points; k-means quality saturates long before large corpora
+MAX_TRAIN_POINTS = 100_000
+# Embedding storage: float32 keeps a contiguous matrix next to the index; the compact
+# modes keep a single scalar-quantized copy inside the FAISS index
+STORAGE_TYPES = ("float32", "float16", "int8")
+# int8 ranges are learned per dimension from the first batch when it is at least this big,
+# otherwise one symmetric range is used for all dimensions; both get a safety margin
+INT8_MIN_PER_DIM_TRAIN = 256
+INT8_RANGE_MARGIN = 1.25
+# Vectors reconstructed at a time when re-indexing a compact store
+RECONSTRUCT_CHUNK = 65_536
+# Documents embedded per batch when adding from a stream
+STREAM_BATCH_SIZE = 256
+# Filtered searches matching at most this many documents scan just those vectors exactly;
+# larger subsets search the index with a FAISS ID selector
+FILTER_EXACT_MAX = 20_000
+# MMR re-ranking picks top_k results from this many times as many relevance-ranked candidates
+MMR_CANDIDATE_FACTOR = 4
+# Incremental saves append new documents as segments until these hold more than this
+# fraction of the full snapshot's documents (or there are MAX_APPEND_SEGMENTS of them);
+# then the next save rewrites the store, so writes stay proportional to what was added
+MAX_APPEND_FRACTION = 0.25
+MAX_APPEND_SEGMENTS = 64
+
+
+class _VectorBuffer:
+    """
+    Contiguous float32 matrix that grows by doubling its capacity,
+    so appending n vectors costs amortized O(n) instead of O(total).
+    """
+    
+    def __init__(self, dimension: int, capacity: int = 1024):
+        self.dimension = dimension
+        self._data = np.empty((max(capacity, 1), dimension), dtype='float32')
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[0]
+    
+    @property
+    def view(self) -> np.ndarray:
+        """Read-only view of the filled rows (no copy)"""
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+    
+    def append(self, vectors: np.ndarray) -> None:
+        """Append a (n, dimension) block of vectors"""
+        needed = self._size + vectors.shape[0]
+        if needed > self.capacity:
+            new_capacity = self.capacity
+            while new_capacity < needed:
+                new_capacity *= 2
+            grown = np.empty((new_capacity, self.dimension), dtype='float32')
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = vectors
+        self._size = needed
+    
+    @classmethod
+    def wrap(cls, matrix: np.ndarray) -> "_VectorBuffer":
+        """Use an existing (n, dimension) matrix, e.g. a read-only memory map, without copying"""
+        buffer = cls.__new__(cls)
+        buffer.dimension = matrix.shape[1]
+        buffer._data = matrix
+        buffer._size = matrix.shape[0]
+        return buffer
+
+
+class _MappedDocuments(Sequence):
+    """
+    Read-only list of document texts backed by memory-mapped files.
+    
+    ``documents.bin`` holds the UTF-8 texts back to back and
+    ``document_offsets.npy`` the n + 1 byte offsets between them, so a
+    document is only decoded when it is accessed and the pages are shared
+    by every process that maps the same collection.
+    """
+    
+    def __init__(self, data_file: Path, offsets_file: Path):
+        self._offsets = np.load(offsets_file, mmap_mode='r')
+        size = int(self._offsets[-1])
+        self._data = np.memmap(data_file, dtype=np.uint8, mode='r') if size else b""
+        self.nbytes = size + self._offsets.nbytes
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("document index out of range")
+        start, stop = int(self._offsets[index]), int(self._offsets[index + 1])
+        return bytes(self._data[start:stop]).decode("utf-8")
+
+
+def _write_documents(directory: Path, documents: Sequence[str]) -> None:
+    """Write document texts in the layout read by _MappedDocuments"""
+    offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+    with open(directory / "documents.bin", "wb") as f:
+        for i, text in enumerate(documents):
+            offsets[i + 1] = offsets[i] + f.write(text.encode("utf-8"))
+    np.save(directory / "document_offsets.npy", offsets)
+
+
+def _read_index(index_file: Path, mmap: bool):
+    """Read a FAISS index, optionally memory-mapping its vectors read-only"""
+    import faiss
+    
+    if not mmap:
+        return faiss.read_index(str(index_file))
+    # Flat and HNSW codes are only mapped with IO_FLAG_MMAP_IFC, which IVF lists reject;
+    # IVF lists are mapped with IO_FLAG_MMAP instead
+    mmap_ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    if mmap_ifc is not None:
+        try:
+            return faiss.read_index(str(index_file), mmap_ifc | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass
+    return faiss.read_index(str(index_file), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+
+
+def _default_nlist(count: int) -> int:
+    """Number of IVF clusters for a corpus, ~4*sqrt(n) with at least 39 points per cluster"""
+    return int(max(1, min(4 * np.sqrt(count), count // 39)))
+
+
+def _default_pq_m(dimension: int) -> int:
+    """Number of PQ sub-quantizers: the largest divisor of dimension with >= 8 dims each"""
+    for m in range(max(dimension // 8, 1), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def estimate_vector_bytes(dimension: int, storage: str, index_type: str = "flat",
+                          hnsw_m: int = DEFAULT_HNSW_M, pq_m: Optional[int] = None) -> int:
+    """
+    Estimate embedding bytes held per document for a store configuration.
+    
+    Args:
+        dimension: Embedding dimension
+        storage: 'float32', 'float16' or 'int8'
+        index_type: 'flat', 'ivf_flat', 'ivf_pq' or 'hnsw'
+        hnsw_m: HNSW graph degree
+        pq_m: PQ sub-quantizers for 'ivf_pq'
+        
+    Returns:
+        Approximate bytes per document
+    """
+    code_bytes = {"float32": 4 * dimension, "float16": 2 * dimension, "int8": dimension}[storage]
+    if index_type == "ivf_pq":
+        code_bytes = pq_m or _default_pq_m(dimension)
+    
+    total = code_bytes
+    if storage == "float32":
+        total += 4 * dimension  # contiguous embedding matrix kept next to the index
+    if index_type in ("ivf_flat", "ivf_pq"):
+        total += 8  # inverted-list ids
+    elif index_type == "hnsw":
+        total += 2 * hnsw_m * 4  # level-0 graph links
+    return total
+
 
 class SimpleRAGStore:
     """
     Simple RAG implementation using FAISS for vector similarity search
     """
     
-    def __init__(self):
-        """Initialize the RAG store"""
-        self.documents: List[str] = []
-        self.embeddings: List[np.ndarray] = []
+    def __init__(self, use_cache: bool = True, index_type: str = "flat", metric: str = "l2",
+                 train_threshold: int = DEFAULT_TRAIN_THRESHOLD, nlist: Optional[int] = None,
+                 pq_m: Optional[int] = None, nprobe: int = DEFAULT_NPROBE,
+                 ef_search: int = DEFAULT_EF_SEARCH, hnsw_m: int = DEFAULT_HNSW_M,
+                 retrieval: str = "dense", rrf_k: int = DEFAULT_RRF_K, storage: str = "float32",
+                 backend: str = DEFAULT_BACKEND, dedup_threshold: Optional[float] = None):
+        """
+        Initialize the RAG store
+        
+        Args:
+            use_cache: Look up embeddings in the shared embedding cache before encoding
+            index_type: 'flat' (exact), 'ivf_flat', 'ivf_pq' or 'hnsw' (approximate)
+            metric: 'l2' (score = 1/(1+distance)) or 'cosine' (normalized embeddings,
+                inner-product index, score = cosine similarity)
+            train_threshold: Corpus size at which IVF indexes are trained; exact search is used below it
+            nlist: Number of IVF clusters (default: ~4*sqrt(n) at training time)
+            pq_m: Number of PQ sub-quantizers for 'ivf_pq' (default: dimension / 8)
+            nprobe: IVF clusters visited per query
+            ef_search: HNSW candidate list size per query
+            hnsw_m: HNSW graph degree
+            retrieval: 'dense' (vectors), 'sparse' (BM25 only, never loads the embedding
+                model) or 'hybrid' (both, fused with reciprocal-rank fusion)
+            rrf_k: Reciprocal-rank fusion constant for hybrid retrieval
+            storage: 'float32' (embedding matrix plus index), or 'float16' / 'int8' to keep a
+                single scalar-quantized copy inside the index (2x / 4x smaller than one float32 copy)
+            backend: Embedding backend: 'torch' (sentence-transformers), 'onnx' or 'onnx_int8'
+                (the same model through onnxruntime on CPU, optionally int8 quantized)
+            dedup_threshold: Skip documents whose estimated Jaccard similarity (MinHash over
+                word 3-grams) to an indexed document reaches this value; None disables dedup
+        """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type} (expected one of {', '.join(INDEX_TYPES)})")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric} (expected one of {', '.join(METRICS)})")
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown storage type: {storage} (expected one of {', '.join(STORAGE_TYPES)})")
+        if retrieval not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval} (expected one of {', '.join(RETRIEVAL_MODES)})")
+        validate_backend(backend)
+        
+        self.documents: Sequence[str] = []
         self.index = None
-        self._model = None
+        self.read_only = False
+        self.use_cache = use_cache
+        self.index_type = index_type
+        self.metric = metric
+        self.train_threshold = train_threshold
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.hnsw_m = hnsw_m
+        self.retrieval = retrieval
+        self.rrf_k = rrf_k
+        self.storage = storage
+        self.backend = backend
+        self.dedup_threshold = dedup_threshold
+        self._dedup: Optional[NearDuplicateIndex] = (
+            NearDuplicateIndex(dedup_threshold) if dedup_threshold is not None else None
+        )
+        # JSON-serializable state saved in store.json together with the index (e.g. ingestion progress)
+        self.attributes: Dict[str, Any] = {}
+        self.metadata = MetadataTable()
+        self._bm25: Optional[BM25Index] = BM25Index() if retrieval != "dense" else None
+        self._vectors: Optional[_VectorBuffer] = None
+        # What the directory last saved to (or loaded from) holds, for incremental saves
+        self._persisted: Optional[Dict[str, Any]] = None
+        # Compact stores cannot decode their index exactly, so the vectors added since then are kept
+        self._unsaved_vectors: List[np.ndarray] = []
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        """
+        Embedding matrix of all documents, one float32 row per document.
+        
+        Compact stores decode it from the index on every access.
+        """
+        if self._vectors is not None:
+            return self._vectors.view
+        if self.index is None or self.index.ntotal == 0:
+            return np.zeros((0, 0), dtype='float32')
+        return self._reconstruct(0, self.index.ntotal)
+    
+    @property
+    def dimension(self) -> Optional[int]:
+        """Embedding dimension, or None before the first vectors are added"""
+        if self._vectors is not None:
+            return self._vectors.dimension
+        return self.index.d if self.index is not None else None
+    
+    def _reconstruct(self, start: int, stop: int) -> np.ndarray:
+        """Decode stored vectors [start, stop) back to float32"""
+        if self._vectors is not None:
+            return self._vectors.view[start:stop]
+        self._ensure_direct_map()
+        return self.index.reconstruct_n(start, stop - start)
+    
+    def _reconstruct_ids(self, ids: np.ndarray) -> np.ndarray:
+        """Decode the stored vectors of the given document ids back to float32"""
+        if self._vectors is not None:
+            return self._vectors.view[ids]
+        self._ensure_direct_map()
+        return self.index.reconstruct_batch(ids)
+    
+    def _ensure_direct_map(self) -> None:
+        """IVF indexes need an id -> list position map before vectors can be reconstructed"""
+        import faiss
+        
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None and not ivf.direct_map.type:
+            ivf.make_direct_map()
         
     def _get_model(self):
-        """Lazy load the sentence transformer model"""
-        if self._model is None:
-            try:
-                from sentence_transformers import SentenceTransformer
-                self._model = SentenceTransformer('all-MiniLM-L6-v2')
-                logger.info("Loaded sentence transformer model")
-            except Exception as e:
-                logger.error(f"Failed to load sentence transformer: {e}")
-                raise
-        return self._model
-    
-    def add_documents(self, documents: List[str]) -> None:
+        """Get the process-wide sentence transformer model, loading it on first use"""
+        return get_model_registry().get_model(MODEL_NAME, self.backend)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, reusing cached embeddings for texts seen before"""
+        registry = get_model_registry()
+        if not self.use_cache:
+            return registry.encode(texts, MODEL_NAME, self.backend)
+        return get_embedding_cache().encode(
+            encoder_key(MODEL_NAME, self.backend),
+            texts,
+            lambda batch: registry.encode(batch, MODEL_NAME, self.backend)
+        )
+    
+    def add_documents(self, documents: List[str],
+                      metadata: Optional[List[Optional[Dict[str, Any]]]] = None) -> int:
         """
         Add documents to the RAG store and build FAISS index.
         
+        With dedup enabled, near-duplicates of indexed documents (or of
+        earlier documents in the same call) are dropped before embedding.
+        
         Args:
             documents: List of document strings to add
+            metadata: Optional provenance per document ('source', 'page', 'start', 'end',
+                'ingested_at'); the ingest time defaults to now
+            
+        Returns:
+            Number of documents added
         """
-        import faiss
-        
+        self._check_writable()
         if not documents:
             logger.warning("No documents provided to add")
-            return
+            return 0
+        if metadata is not None and len(metadata) != len(documents):
+            raise ValueError(f"Expected {len(documents)} metadata rows, got {len(metadata)}")
+        
+        signatures = None
+        if self._dedup is not None:
+            keep, signatures = self._dedup.check(documents)
+            if not keep.all():
+                logger.info(f"Skipped {int((~keep).sum())} near-duplicate documents")
+                documents = [document for document, kept in zip(documents, keep) if kept]
+                if metadata is not None:
+                    metadata = [row for row, kept in zip(metadata, keep) if kept]
+                signatures = signatures[keep]
+            if not documents:
+                return 0
+        
+        if self.retrieval == "sparse":
+            self._add_sparse(documents, metadata, signatures)
+            return len(documents)
+        
+        # Generate embeddings
+        new_embeddings = self._encode(documents)
+        self.add_embeddings(documents, new_embeddings, metadata, signatures)
+        return len(documents)
+    
+    def add_document_stream(self, documents: Iterable[Union[str, Tuple[str, Dict[str, Any]]]],
+                            batch_size: int = STREAM_BATCH_SIZE) -> int:
+        """
+        Add documents from an iterable (e.g. a chunk generator) in fixed-size batches.
+        
+        At most batch_size documents are held outside the store at a time,
+        so a generator over a large file is indexed in bounded memory.
+        
+        Args:
+            documents: Iterable of document strings or (document, metadata) pairs
+            batch_size: Documents embedded and indexed per batch
             
+        Returns:
+            Number of documents added (near-duplicates skipped by dedup are not counted)
+        """
+        self._check_writable()
+        added = 0
+        batch: List[str] = []
+        batch_metadata: List[Optional[Dict[str, Any]]] = []
+        for document in documents:
+            text, metadata = document if isinstance(document, tuple) else (document, None)
+            batch.append(text)
+            batch_metadata.append(metadata)
+            if len(batch) >= batch_size:
+                added += self.add_documents(batch, batch_metadata)
+                batch, batch_metadata = [], []
+        if batch:
+            added += self.add_documents(batch, batch_metadata)
+        return added
+    
+    def _add_sparse(self, documents: List[str], metadata: Optional[List[Optional[Dict[str, Any]]]],
+                    signatures: Optional[np.ndarray]) -> None:
+        self._bm25.add(documents)
         self.documents.extend(documents)
+        self.metadata.append(len(documents), metadata)
+        if self._dedup is not None:
+            self._dedup.add(signatures if signatures is not None else minhash_batch(documents))
+        logger.info(f"Added {len(documents)} documents to RAG store (sparse)")
+    
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError("RAG store was opened read-only (memory-mapped); load it without mmap to modify it")
+    
+    @property
+    def _faiss_metric(self) -> int:
+        import faiss
+        return faiss.METRIC_INNER_PRODUCT if self.metric == "cosine" else faiss.METRIC_L2
+    
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """Return a contiguous float32 copy, L2-normalized for the cosine metric"""
+        import faiss
         
-        # Generate embeddings
-        model = self._get_model()
-        new_embeddings = model.encode(documents, show_progress_bar=False)
-        self.embeddings.extend(new_embeddings)
+        vectors = np.array(vectors, dtype='float32', order='C')
+        if self.metric == "cosine" and vectors.ndim == 2 and vectors.size:
+            faiss.normalize_L2(vectors)
+        return vectors
+    
+    def add_embeddings(self, documents: List[str], embeddings: np.ndarray,
+                       metadata: Optional[List[Optional[Dict[str, Any]]]] = None,
+                       signatures: Optional[np.ndarray] = None) -> None:
+        """
+        Add documents with precomputed embeddings.
         
-        # Build or update FAISS index
-        embeddings_array = np.array(self.embeddings).astype('float32')
-        dimension = embeddings_array.shape[1]
+        Only the new vectors are appended to the FAISS index, so each call
+        costs O(len(documents)) regardless of how large the store already is.
+        Documents are not checked for near-duplicates here.
+        
+        Args:
+            documents: List of document strings to add
+            embeddings: Matrix of shape (len(documents), dimension)
+            metadata: Optional provenance dict per document
+            signatures: Precomputed MinHash signatures of the documents (dedup stores only)
+        """
+        import faiss
+        
+        self._check_writable()
+        if self.retrieval == "sparse":
+            raise ValueError("Sparse-only stores do not hold embeddings; use add_documents")
+        
+        embeddings = self._prepare(embeddings)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(documents):
+            raise ValueError(
+                f"Expected {len(documents)} embeddings, got array of shape {embeddings.shape}"
+            )
+        if len(documents) == 0:
+            return
+        if metadata is not None and len(metadata) != len(documents):
+            raise ValueError(f"Expected {len(documents)} metadata rows, got {len(metadata)}")
+        
+        dimension = embeddings.shape[1]
+        if self.dimension is not None and dimension != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {dimension} does not match store dimension {self.dimension}"
+            )
         
         if self.index is None:
-            self.index = faiss.IndexFlatL2(dimension)
+            self.index = self._new_index(dimension, embeddings)
+            if self.storage == "float32":
+                self._vectors = _VectorBuffer(dimension)
         
-        self.index.add(embeddings_array)
+        if self._vectors is not None:
+            self._vectors.append(embeddings)
+        elif self._persisted is not None:
+            self._unsaved_vectors.append(embeddings)
+        self.index.add(embeddings)
+        if self._bm25 is not None:
+            self._bm25.add(documents)
+        self.documents.extend(documents)
+        self.metadata.append(len(documents), metadata)
+        if self._dedup is not None:
+            self._dedup.add(signatures if signatures is not None else minhash_batch(documents))
+        self._maybe_train()
         logger.info(f"Added {len(documents)} documents to RAG store")
     
-    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+    def _scalar_quantizer_type(self) -> int:
+        import faiss
+        if self.storage == "float16":
+            return faiss.ScalarQuantizer.QT_fp16
+        return faiss.ScalarQuantizer.QT_8bit
+    
+    def _train_int8_ranges(self, index, embeddings: np.ndarray) -> None:
+        """
+        Fix the int8 quantization range from the first batch: symmetric per-dimension
+        bounds with a margin (or one shared bound for small batches); values outside are clipped.
+        """
+        magnitude = np.abs(embeddings)
+        if len(embeddings) >= INT8_MIN_PER_DIM_TRAIN:
+            bounds = magnitude.max(axis=0)
+        else:
+            bounds = np.full(embeddings.shape[1], magnitude.max(), dtype='float32')
+        bounds = np.maximum(bounds * INT8_RANGE_MARGIN, 1e-6).astype('float32')
+        index.train(np.stack([bounds, -bounds]))
+    
+    def _new_index(self, dimension: int, first_batch: np.ndarray):
+        """Create the initial (untrained IVF stores: exact) index for the configured storage"""
+        import faiss
+        
+        if self.storage == "float32":
+            if self.index_type == "hnsw":
+                return faiss.IndexHNSWFlat(dimension, self.hnsw_m, self._faiss_metric)
+            return faiss.IndexFlat(dimension, self._faiss_metric)
+        
+        qtype = self._scalar_quantizer_type()
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWSQ(dimension, qtype, self.hnsw_m, self._faiss_metric)
+        else:
+            index = faiss.IndexScalarQuantizer(dimension, qtype, self._faiss_metric)
+        
+        if self.storage == "int8":
+            self._train_int8_ranges(index, first_batch)
+        return index
+    
+    @property
+    def is_trained(self) -> bool:
+        """True once an IVF store has switched from exact search to its trained index"""
+        import faiss
+        return self.index is not None and faiss.try_extract_index_ivf(self.index) is not None
+    
+    def _maybe_train(self) -> None:
+        """
+        Replace the exact index with the configured IVF index once the corpus
+        crosses train_threshold. Later appends go straight into the IVF index.
+        """
+        import faiss
+        
+        if self.index_type not in ("ivf_flat", "ivf_pq") or self.is_trained:
+            return
+        
+        count = len(self.documents)
+        # PQ needs at least 256 points to train its 8-bit codebooks
+        minimum = max(self.train_threshold, 256 if self.index_type == "ivf_pq" else 1)
+        if count < minimum:
+            return
+        
+        dimension = self.dimension
+        nlist = min(self.nlist or _default_nlist(count), count)
+        quantizer = faiss.IndexFlat(dimension, self._faiss_metric)
+        
+        if self.index_type == "ivf_pq":
+            pq_m = self.pq_m or _default_pq_m(dimension)
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, 8, self._faiss_metric)
+        elif self.storage == "float32":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, self._faiss_metric)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer, dimension, nlist, self._scalar_quantizer_type(), self._faiss_metric
+            )
+        
+        if count > MAX_TRAIN_POINTS:
+            rng = np.random.default_rng(0)
+            sample = self._reconstruct_ids(np.sort(rng.choice(count, MAX_TRAIN_POINTS, replace=False)))
+        else:
+            sample = self._reconstruct(0, count)
+        
+        started = time.perf_counter()
+        index.train(np.ascontiguousarray(sample, dtype='float32'))
+        # Re-add in chunks so compact stores never decode the whole corpus at once
+        for start in range(0, count, RECONSTRUCT_CHUNK):
+            index.add(np.ascontiguousarray(self._reconstruct(start, min(start + RECONSTRUCT_CHUNK, count))))
+        self.index = index
+        logger.info(
+            f"Trained {self.index_type} index (nlist={nlist}) on {len(sample)} of {count} vectors "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+    
+    def _search_params(self, nprobe: Optional[int], ef_search: Optional[int], top_k: int,
+                       selector=None):
+        """Per-query search parameters (None for an unfiltered exact search)"""
+        import faiss
+        
+        if self.is_trained:
+            params = faiss.SearchParametersIVF(nprobe=nprobe or self.nprobe)
+        elif self.index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=max(ef_search or self.ef_search, top_k))
+        elif selector is not None:
+            params = faiss.SearchParameters()
+        else:
+            return None
+        if selector is not None:
+            params.sel = selector
+        return params
+    
+    def _filter_ids(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Ids of the documents matching metadata filters, or None when unfiltered"""
+        if not filters:
+            return None
+        unknown = set(filters) - set(FILTER_KEYS)
+        if unknown:
+            raise ValueError(
+                f"Unknown filter keys: {', '.join(sorted(unknown))} (expected {', '.join(FILTER_KEYS)})"
+            )
+        return self.metadata.select(**filters)
+    
+    def _search_subset(self, query_embeddings: np.ndarray, ids: np.ndarray, top_k: int,
+                       min_score: Optional[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact k-NN over only the given documents, in the same layout as an index search"""
+        vectors = self._reconstruct_ids(ids)
+        if self.metric == "cosine":
+            distances = query_embeddings @ vectors.T
+            order_keys = -distances
+        else:
+            distances = (
+                (query_embeddings ** 2).sum(axis=1)[:, None]
+                - 2.0 * query_embeddings @ vectors.T
+                + (vectors ** 2).sum(axis=1)[None, :]
+            )
+            np.maximum(distances, 0.0, out=distances)
+            order_keys = distances
+        
+        n_queries = query_embeddings.shape[0]
+        fill = -np.inf if self.metric == "cosine" else np.inf
+        out_distances = np.full((n_queries, top_k), fill, dtype='float32')
+        out_indices = np.full((n_queries, top_k), -1, dtype='int64')
+        k = min(top_k, len(ids))
+        for i in range(n_queries):
+            top = np.argpartition(order_keys[i], k - 1)[:k] if k < len(ids) else np.arange(len(ids))
+            top = top[np.lexsort((ids[top], order_keys[i][top]))]
+            out_distances[i, :k] = distances[i][top]
+            out_indices[i, :k] = ids[top]
+        
+        if min_score is not None:
+            scores = out_distances if self.metric == "cosine" else 1.0 / (1.0 + out_distances)
+            out_indices[scores < min_score] = -1
+        return out_distances, out_indices
+    
+    def _to_score(self, distance: float) -> float:
+        """Convert a raw FAISS distance into a higher-is-better score"""
+        if self.metric == "cosine":
+            return float(distance)
+        # Convert L2 distance to similarity score (inverse relationship)
+        return 1.0 / (1.0 + float(distance))
+    
+    def _score_radius(self, min_score: float) -> float:
+        """FAISS range-search radius equivalent to a minimum score"""
+        if self.metric == "cosine":
+            return float(min_score)
+        return 1.0 / float(min_score) - 1.0
+    
+    def _range_search(self, query_embeddings: np.ndarray, top_k: int, min_score: float,
+                      params) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Range search that only returns hits scoring at least min_score,
+        padded into the same (n_queries, top_k) layout as a k-NN search.
+        """
+        radius = self._score_radius(min_score)
+        if params is None:
+            lims, distances, indices = self.index.range_search(query_embeddings, radius)
+        else:
+            lims, distances, indices = self.index.range_search(query_embeddings, radius, params=params)
+        
+        n_queries = query_embeddings.shape[0]
+        fill = -np.inf if self.metric == "cosine" else np.inf
+        out_distances = np.full((n_queries, top_k), fill, dtype='float32')
+        out_indices = np.full((n_queries, top_k), -1, dtype='int64')
+        for i in range(n_queries):
+            hit_distances = distances[lims[i]:lims[i + 1]]
+            hit_indices = indices[lims[i]:lims[i + 1]]
+            order = np.argsort(-hit_distances if self.metric == "cosine" else hit_distances)[:top_k]
+            out_distances[i, :len(order)] = hit_distances[order]
+            out_indices[i, :len(order)] = hit_indices[order]
+        return out_distances, out_indices
+    
+    def search_embeddings(self, query_embeddings: np.ndarray, top_k: int,
+                          nprobe: Optional[int] = None,
+                          ef_search: Optional[int] = None,
+                          min_score: Optional[float] = None,
+                          ids: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the index with precomputed query embeddings.
+        
+        With min_score set, flat and IVF indexes run a FAISS range search so
+        low-relevance candidates are dropped inside the index instead of being
+        returned and filtered afterwards. HNSW has no range search; its k-NN
+        hits are filtered instead.
+        
+        With ids set, only those documents are candidates: small subsets
+        (up to FILTER_EXACT_MAX) are scanned exactly on their own vectors,
+        larger ones are searched through the index with an ID selector.
+        
+        Args:
+            query_embeddings: Matrix of shape (n_queries, dimension)
+            top_k: Number of neighbours per query
+            nprobe: Override IVF clusters visited for this search
+            ef_search: Override HNSW candidate list size for this search
+            min_score: Drop hits scoring below this value
+            ids: Restrict the search to these document ids
+            
+        Returns:
+            Tuple of (distances, indices) arrays of shape (n_queries, top_k); missing hits are -1
+        """
+        import faiss
+        
+        query_embeddings = self._prepare(query_embeddings)
+        
+        selector = None
+        if ids is not None:
+            if len(ids) == 0:
+                return (np.zeros((query_embeddings.shape[0], top_k), dtype='float32'),
+                        np.full((query_embeddings.shape[0], top_k), -1, dtype='int64'))
+            if len(ids) <= FILTER_EXACT_MAX:
+                return self._search_subset(query_embeddings, ids, top_k, min_score)
+            mask = np.zeros(self.index.ntotal, dtype=bool)
+            mask[ids] = True
+            # The bitmap must outlive the search; it stays referenced by this frame
+            bitmap = np.packbits(mask, bitorder='little')
+            selector = faiss.IDSelectorBitmap(bitmap)
+        params = self._search_params(nprobe, ef_search, top_k, selector)
+        
+        use_range = min_score is not None and (self.metric == "cosine" or min_score > 0)
+        if use_range and self.index_type != "hnsw":
+            return self._range_search(query_embeddings, top_k, min_score, params)
+        
+        if params is None:
+            distances, indices = self.index.search(query_embeddings, top_k)
+        else:
+            distances, indices = self.index.search(query_embeddings, top_k, params=params)
+        
+        if use_range:
+            scores = distances if self.metric == "cosine" else 1.0 / (1.0 + distances)
+            indices[scores < min_score] = -1
+        return distances, indices
+    
+    def _format_results(self, distances: np.ndarray, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """Turn one row of search output into ranked result dictionaries"""
+        results = []
+        for distance, idx in zip(distances, indices):
+            if 0 <= idx < len(self.documents):
+                results.append({
+                    "rank": len(results) + 1,
+                    "document": self.documents[idx],
+                    "score": round(self._to_score(distance), 4),
+                    "distance": 1.0 - float(distance) if self.metric == "cosine" else float(distance),
+                    "metadata": self.metadata.row(idx)
+                })
+        return results
+    
+    def search(self, query: str, top_k: int = 3, nprobe: Optional[int] = None,
+               ef_search: Optional[int] = None,
+               min_score: Optional[float] = None,
+               filters: Optional[Dict[str, Any]] = None,
+               mmr_lambda: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Search for similar documents using the query.
         
         Args:
             query: Search query string
             top_k: Number of top results to return
+            nprobe: Override IVF clusters visited for this query
+            ef_search: Override HNSW candidate list size for this query
+            min_score: Only return results scoring at least this value
+            filters: Metadata conditions (see MetadataTable.select)
+            mmr_lambda: Re-rank for diversity with maximal marginal relevance
+                (1.0 = relevance only, 0.0 = novelty only); None disables it
             
         Returns:
             List of search results with scores
         """
-        if self.index is None or len(self.documents) == 0:
+        return self.search_batch([query], top_k, nprobe, ef_search, min_score, filters, mmr_lambda)[0]
+    
+    def search_batch(self, queries: List[str], top_k: int = 3, nprobe: Optional[int] = None,
+                     ef_search: Optional[int] = None,
+                     min_score: Optional[float] = None,
+                     filters: Optional[Dict[str, Any]] = None,
+                     mmr_lambda: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search many queries at once.
+        
+        All queries are encoded in a single model.encode call and searched
+        with a single FAISS call over the query matrix. In hybrid mode the
+        dense and BM25 candidate lists are merged with reciprocal-rank fusion.
+        With mmr_lambda set, MMR_CANDIDATE_FACTOR * top_k candidates are
+        retrieved and top_k of them picked greedily, trading relevance to the
+        query against similarity to the results already picked.
+        
+        Args:
+            queries: List of query strings
+            top_k: Number of top results per query
+            nprobe: Override IVF clusters visited
+            ef_search: Override HNSW candidate list size
+            min_score: Only return results scoring at least this value (dense score,
+                or BM25 score for sparse-only stores)
+            filters: Metadata conditions ('source', 'source_prefix', 'page_min', 'page_max',
+                'ingested_after', 'ingested_before'); only matching documents are searched
+            mmr_lambda: Maximal-marginal-relevance weight in [0, 1] (dense and hybrid only)
+            
+        Returns:
+            One list of search results per query, in query order
+        """
+        if mmr_lambda is not None:
+            if not 0.0 <= mmr_lambda <= 1.0:
+                raise ValueError("mmr_lambda must be between 0 and 1")
+            if self.retrieval == "sparse":
+                raise ValueError("MMR re-ranking needs embeddings; it is not available for sparse retrieval")
+        if not queries:
+            return []
+        if len(self.documents) == 0:
             logger.warning("No documents in RAG store")
+            return [[] for _ in queries]
+        
+        ids = self._filter_ids(filters)
+        if ids is not None and len(ids) == 0:
+            return [[] for _ in queries]
+        allowed = None
+        if ids is not None and self._bm25 is not None:
+            allowed = np.zeros(len(self.documents), dtype=bool)
+            allowed[ids] = True
+        
+        pool = len(self.documents) if ids is None else len(ids)
+        top_k = min(top_k, pool)
+        
+        if self.retrieval == "sparse":
+            return [self._format_sparse(self._bm25.search(query, top_k, allowed), min_score) for query in queries]
+        
+        # MMR chooses from a deeper relevance-ranked list; hybrid retrieval also fuses
+        # deeper candidate lists than the final top_k
+        depth = top_k if mmr_lambda is None else min(top_k * MMR_CANDIDATE_FACTOR, pool)
+        candidates = depth if self.retrieval == "dense" else min(max(depth, FUSION_CANDIDATES), pool)
+        
+        query_embeddings = self._encode(queries)
+        distances, indices = self.search_embeddings(
+            query_embeddings, candidates, nprobe, ef_search, min_score, ids
+        )
+        
+        all_results = []
+        for i, query in enumerate(queries):
+            if self.retrieval == "dense":
+                results = self._format_results(distances[i], indices[i])
+                doc_ids = [int(idx) for idx in indices[i] if 0 <= idx < len(self.documents)]
+            else:
+                results, doc_ids = self._fuse(
+                    distances[i], indices[i], self._bm25.search(query, candidates, allowed), depth
+                )
+            if mmr_lambda is not None:
+                order = self._mmr_order(query_embeddings[i], doc_ids, top_k, mmr_lambda)
+                results = [dict(results[position], rank=rank) for rank, position in enumerate(order, 1)]
+            all_results.append(results)
+        return all_results
+    
+    def _mmr_order(self, query_embedding: np.ndarray, doc_ids: List[int], top_k: int,
+                   mmr_lambda: float) -> List[int]:
+        """
+        Greedy maximal marginal relevance over a candidate list.
+        
+        Each step picks the candidate maximizing
+        mmr_lambda * cos(query, doc) - (1 - mmr_lambda) * max cos(doc, picked).
+        Only the candidates are compared with each other, so the cost is
+        O(top_k * len(doc_ids)) regardless of corpus size.
+        
+        Args:
+            query_embedding: Query vector
+            doc_ids: Candidate document ids, best first
+            top_k: Number of candidates to pick
+            mmr_lambda: Relevance weight in [0, 1]
+            
+        Returns:
+            Positions into doc_ids in pick order
+        """
+        if not doc_ids:
             return []
+        vectors = self._reconstruct_ids(np.asarray(doc_ids, dtype=np.int64)).astype('float32')
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        query = np.asarray(query_embedding, dtype='float32')
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        
+        relevance = vectors @ query
+        redundancy = np.zeros(len(doc_ids), dtype='float32')
+        available = np.ones(len(doc_ids), dtype=bool)
+        order: List[int] = []
+        for _ in range(min(top_k, len(doc_ids))):
+            marginal = mmr_lambda * relevance - (1.0 - mmr_lambda) * redundancy
+            marginal[~available] = -np.inf
+            best = int(np.argmax(marginal))
+            order.append(best)
+            available[best] = False
+            similarity = vectors @ vectors[best]
+            redundancy = similarity if len(order) == 1 else np.maximum(redundancy, similarity)
+        return order
+    
+    def _format_sparse(self, hits: List[Tuple[int, float]],
+                       min_score: Optional[float]) -> List[Dict[str, Any]]:
+        """Turn BM25 hits into ranked result dictionaries"""
+        results = []
+        for doc_id, score in hits:
+            if min_score is not None and score < min_score:
+                break
+            results.append({
+                "rank": len(results) + 1,
+                "document": self.documents[doc_id],
+                "score": round(score, 4),
+                "metadata": self.metadata.row(doc_id)
+            })
+        return results
+    
+    def _fuse(self, distances: np.ndarray, indices: np.ndarray, sparse_hits: List[Tuple[int, float]],
+              top_k: int) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """Merge dense and BM25 candidates with reciprocal-rank fusion; returns results and their ids"""
+        fused: Dict[int, Dict[str, Any]] = {}
         
-        # Encode query
-        model = self._get_model()
-        query_embedding = model.encode([query], show_progress_bar=False)
-        query_embedding = np.array(query_embedding).astype('float32')
+        dense_rank = 0
+        for distance, idx in zip(distances, indices):
+            if not 0 <= idx < len(self.documents):
+                continue
+            dense_rank += 1
+            entry = fused.setdefault(int(idx), {"score": 0.0})
+            entry["score"] += 1.0 / (self.rrf_k + dense_rank)
+            entry["dense_rank"] = dense_rank
+            entry["dense_score"] = round(self._to_score(distance), 4)
         
-        # Search FAISS index
-        top_k = min(top_k, len(self.documents))
-        distances, indices = self.index.search(query_embedding, top_k)
+        for sparse_rank, (doc_id, score) in enumerate(sparse_hits, 1):
+            entry = fused.setdefault(doc_id, {"score": 0.0})
+            entry["score"] += 1.0 / (self.rrf_k + sparse_rank)
+            entry["sparse_rank"] = sparse_rank
+            entry["sparse_score"] = round(score, 4)
         
-        # Format results
+        ranked = sorted(fused.items(), key=lambda item: item[1]["score"], reverse=True)[:top_k]
         results = []
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(self.documents):
-                # Convert L2 distance to similarity score (inverse relationship)
-                similarity_score = 1.0 / (1.0 + float(distance))
-                results.append({
-                    "rank": i + 1,
-                    "document": self.documents[idx],
-                    "score": round(similarity_score, 4),
-                    "distance": float(distance)
-                })
+        for rank, (doc_id, entry) in enumerate(ranked, 1):
+            entry["score"] = round(entry["score"], 6)
+            results.append({"rank": rank, "document": self.documents[doc_id], **entry,
+                            "metadata": self.metadata.row(doc_id)})
+        return results, [doc_id for doc_id, _ in ranked]
+    
+    def _index_nbytes(self) -> int:
+        """Approximate resident size of the FAISS index (codes, ids, graph links, centroids)"""
+        import faiss
         
-        return results
+        if self.index is None:
+            return 0
+        ntotal = self.index.ntotal
+        
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            centroids = ivf.quantizer.ntotal * ivf.d * 4
+            return ivf.code_size * ntotal + 8 * ntotal + centroids
+        
+        if hasattr(self.index, "hnsw"):
+            storage = faiss.downcast_index(self.index.storage)
+            links = self.index.hnsw.neighbors.size() * 4 + self.index.hnsw.offsets.size() * 8
+            return storage.code_size * ntotal + links
+        
+        return faiss.downcast_index(self.index).code_size * ntotal
+    
+    def memory_usage(self) -> Dict[str, Any]:
+        """
+        Report approximate memory held by the store.
+        
+        Returns:
+            Dictionary with byte counts per component and per document
+        """
+        count = len(self.documents)
+        vector_buffer = self._vectors._data.nbytes if self._vectors is not None else 0
+        index_bytes = self._index_nbytes()
+        if isinstance(self.documents, _MappedDocuments):
+            text_bytes = self.documents.nbytes
+        else:
+            text_bytes = sys.getsizeof(self.documents) + sum(sys.getsizeof(doc) for doc in self.documents)
+        vector_bytes = vector_buffer + index_bytes
+        dedup_bytes = self._dedup.nbytes if self._dedup is not None else 0
+        
+        return {
+            "documents": count,
+            "dimension": self.dimension,
+            "storage": self.storage,
+            "index_type": self.index_type,
+            "memory_mapped": self.read_only,
+            "vector_buffer_bytes": vector_buffer,
+            "index_bytes": index_bytes,
+            "document_text_bytes": text_bytes,
+            "metadata_bytes": self.metadata.nbytes,
+            "dedup_bytes": dedup_bytes,
+            "total_bytes": vector_bytes + text_bytes + self.metadata.nbytes + dedup_bytes,
+            "vector_bytes_per_document": round(vector_bytes / count, 1) if count else 0.0
+        }
     
     def clear(self) -> None:
         """Clear all documents and reset the index"""
+        self._check_writable()
         self.documents = []
-        self.embeddings = []
+        self.metadata = MetadataTable()
+        if self._dedup is not None:
+            self._dedup = NearDuplicateIndex(self.dedup_threshold)
+        self._vectors = None
+        self._unsaved_vectors = []
         self.index = None
+        if self._bm25 is not None:
+            self._bm25.clear()
         logger.info("Cleared RAG store")
+    
+    def save(self, path: str, incremental: bool = False) -> None:
+        """
+        Persist the store to a directory.
+        
+        Writes the FAISS index, the document texts and the embedding matrix
+        into a temporary sibling directory first and then swaps it into
+        place, so a crash mid-write never leaves a half-written store behind.
+        
+        With incremental=True, when the directory holds this store as it was
+        last saved or loaded, only the documents added since are written, as
+        an append segment that load() replays. The store is rewritten in full
+        instead when its index was replaced in the meantime (created, or
+        trained for IVF) or when the segments outgrow MAX_APPEND_FRACTION of
+        the full save.
+        
+        Args:
+            path: Target directory (created if missing, replaced if present)
+            incremental: Append the new documents to an earlier save when possible
+        """
+        target = Path(path)
+        if incremental and self._save_appended(target):
+            return
+        staging = target.with_name(target.name + ".tmp")
+        backup = target.with_name(target.name + ".old")
+        
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+        
+        _write_documents(staging, self.documents)
+        self.metadata.save(staging)
+        if self._dedup is not None:
+            self._dedup.save(staging)
+        
+        # Compact stores keep their only copy of the embeddings inside the index
+        if self._vectors is not None:
+            np.save(staging / "embeddings.npy", self.embeddings)
+        
+        if self.index is not None:
+            import faiss
+            faiss.write_index(self.index, str(staging / "index.faiss"))
+        
+        self._write_info(staging, [])
+        
+        if backup.exists():
+            shutil.rmtree(backup)
+        if target.exists():
+            target.rename(backup)
+        staging.rename(target)
+        if backup.exists():
+            shutil.rmtree(backup)
+        
+        self._mark_persisted(target, len(self.documents), [])
+        logger.info(f"Saved RAG store with {len(self.documents)} documents to {target}")
+    
+    def _write_info(self, directory: Path, appends: List[str]) -> None:
+        """Write store.json (atomically: the collection cache watches its modification time)"""
+        info = {
+            "format_version": STORE_FORMAT_VERSION,
+            "model": MODEL_NAME,
+            "document_count": len(self.documents),
+            "index": self.index_config(),
+            "attributes": self.attributes
+        }
+        if appends:
+            info["appends"] = appends
+        staging = directory / "store.json.tmp"
+        with open(staging, "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2)
+        os.replace(staging, directory / "store.json")
+    
+    def _mark_persisted(self, directory: Path, snapshot: int, appends: List[str]) -> None:
+        self._persisted = {"path": directory.resolve(), "index": self.index, "snapshot": snapshot,
+                           "count": len(self.documents), "appends": appends}
+        self._unsaved_vectors = []
+    
+    def _save_appended(self, target: Path) -> bool:
+        """
+        Write the documents added since the last save or load as an append segment.
+        
+        Returns:
+            False if the store has to be saved in full instead
+        """
+        persisted = self._persisted
+        if persisted is None or persisted["path"] != target.resolve() or self.index is not persisted["index"]:
+            return False
+        start, count = persisted["count"], len(self.documents)
+        appends = list(persisted["appends"])
+        if count < start or len(appends) >= MAX_APPEND_SEGMENTS or \
+                count - persisted["snapshot"] > MAX_APPEND_FRACTION * persisted["snapshot"]:
+            return False
+        if self.index is not None and self._vectors is None and \
+                sum(len(vectors) for vectors in self._unsaved_vectors) != count - start:
+            return False
+        try:
+            with open(target / "store.json", "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return False
+        # Another process may have saved over it since
+        if info.get("document_count") != start or info.get("appends", []) != appends:
+            return False
+        
+        if count > start:
+            name = f"{start}-{os.getpid()}-{time.time_ns()}"
+            staging = target / "appends" / f"{name}.tmp"
+            staging.mkdir(parents=True)
+            with open(staging / "documents.json", "w", encoding="utf-8") as f:
+                json.dump({"documents": list(self.documents[start:count]),
+                           "metadata": self.metadata.rows(start, count)}, f, ensure_ascii=False)
+            if self.index is not None:
+                vectors = self._vectors.view[start:count] if self._vectors is not None else \
+                    np.concatenate(self._unsaved_vectors)
+                np.save(staging / "vectors.npy", vectors)
+            if self._dedup is not None:
+                np.save(staging / "signatures.npy", self._dedup.signatures(start, count))
+            staging.rename(target / "appends" / name)
+            appends.append(name)
+        
+        self._write_info(target, appends)
+        self._mark_persisted(target, persisted["snapshot"], appends)
+        logger.info(f"Appended {count - start} documents to the RAG store at {target} ({count} in total)")
+        return True
+    
+    def _replay_segment(self, directory: Path) -> None:
+        """Add the documents of an append segment written by _save_appended"""
+        with open(directory / "documents.json", "r", encoding="utf-8") as f:
+            segment = json.load(f)
+        documents, metadata = segment["documents"], segment["metadata"]
+        signatures_file = directory / "signatures.npy"
+        signatures = np.load(signatures_file) if self._dedup is not None and signatures_file.exists() else None
+        if self.retrieval == "sparse":
+            self._add_sparse(documents, metadata, signatures)
+        else:
+            self.add_embeddings(documents, np.load(directory / "vectors.npy"), metadata, signatures)
+    
+    def index_config(self) -> Dict[str, Any]:
+        """Index settings needed to recreate this store"""
+        return {
+            "index_type": self.index_type,
+            "metric": self.metric,
+            "train_threshold": self.train_threshold,
+            "nlist": self.nlist,
+            "pq_m": self.pq_m,
+            "nprobe": self.nprobe,
+            "ef_search": self.ef_search,
+            "hnsw_m": self.hnsw_m,
+            "retrieval": self.retrieval,
+            "rrf_k": self.rrf_k,
+            "storage": self.storage,
+            "backend": self.backend,
+            "dedup_threshold": self.dedup_threshold
+        }
+    
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> "SimpleRAGStore":
+        """
+        Load a store previously written with save().
+        
+        With mmap=True the index, embedding matrix and document texts are
+        memory-mapped read-only instead of copied into memory, so opening is
+        near-instant and worker processes serving the same collection share
+        one copy through the page cache. Such a store can be searched but
+        not modified. The BM25 index of sparse and hybrid stores is still
+        rebuilt in memory.
+        
+        Args:
+            path: Directory the store was saved to
+            mmap: Open the store read-only from memory-mapped files
+            
+        Returns:
+            SimpleRAGStore ready for searching (and appending unless mmap is set)
+        """
+        source = Path(path)
+        if not (source / "store.json").exists():
+            raise FileNotFoundError(f"No RAG store found at: {path}")
+        
+        with open(source / "store.json", "r", encoding="utf-8") as f:
+            info = json.load(f)
+        
+        format_version = info.get("format_version")
+        if format_version not in READABLE_FORMAT_VERSIONS:
+            raise ValueError(
+                f"Unsupported RAG store format {format_version} at {path} "
+                f"(expected {STORE_FORMAT_VERSION})"
+            )
+        appends = info.get("appends", [])
+        if mmap and appends:
+            # Segments are replayed into the index, which needs a writable store
+            logger.info(f"RAG store at {source} has {len(appends)} append segments; "
+                        f"loading it into memory until its next full save")
+            mmap = False
+        
+        store = cls(**info.get("index", {}))
+        store.attributes = info.get("attributes", {})
+        if format_version == 1:
+            with open(source / "documents.json", "r", encoding="utf-8") as f:
+                store.documents = json.load(f)
+        else:
+            documents = _MappedDocuments(source / "documents.bin", source / "document_offsets.npy")
+            store.documents = documents if mmap else list(documents)
+        
+        embeddings_file = source / "embeddings.npy"
+        if embeddings_file.exists() and store.storage == "float32":
+            embeddings = np.load(embeddings_file, mmap_mode='r' if mmap else None)
+            if embeddings.size:
+                if mmap:
+                    store._vectors = _VectorBuffer.wrap(embeddings)
+                else:
+                    store._vectors = _VectorBuffer(embeddings.shape[1], capacity=embeddings.shape[0])
+                    store._vectors.append(embeddings)
+        
+        index_file = source / "index.faiss"
+        if index_file.exists():
+            store.index = _read_index(index_file, mmap)
+        store.metadata = MetadataTable.load(source, len(store.documents), mmap)
+        if store.dedup_threshold is not None:
+            store._dedup = NearDuplicateIndex.load(source, store.dedup_threshold, store.documents, mmap)
+        
+        # The BM25 index is cheap to rebuild, so it is not persisted
+        if store._bm25 is not None:
+            store._bm25.add(store.documents)
+        
+        snapshot = len(store.documents)
+        for name in appends:
+            store._replay_segment(source / "appends" / name)
+        # Version 1 stores are rewritten in the current format on their next save
+        if format_version != 1:
+            store._mark_persisted(source, snapshot, appends)
+        
+        store.read_only = mmap
+        logger.info(f"Loaded RAG store with {len(store.documents)} documents from {source}"
+                    f"{' (memory-mapped)' if mmap else ''}")
+        return store
 
 
-def create_rag_store(documents: List[str]) -> SimpleRAGStore:
+def create_rag_store(documents: List[str], **store_options: Any) -> SimpleRAGStore:
     """
     Factory function to create and populate a RAG store.
     
     Args:
         documents: List of documents to add to store
+        **store_options: Settings passed to SimpleRAGStore (metric, index_type, ...)
         
     Returns:
         Initialized SimpleRAGStore instance
     """
-    store = SimpleRAGStore()
+    store = SimpleRAGStore(**store_options)
     if documents:
         store.add_documents(documents)
     return store
 
 
-def semantic_search(query: str, documents: List[str], top_k: int = 3) -> List[Dict[str, Any]]:
+def semantic_search(query: str, documents: List[str], top_k: int = 3, metric: str = "l2",
+                    min_score: Optional[float] = None,
+                    retrieval: str = "dense",
+                    dedup_threshold: Optional[float] = None,
+                    mmr_lambda: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Perform semantic search on a list of documents.
     
@@ -133,9 +1277,14 @@ def semantic_search(query: str, documents: List[str], top_k: int = 3) -> List[Di
         query: Search query
         documents: List of documents to search
         top_k: Number of results to return
+        metric: 'l2' or 'cosine'
+        min_score: Only return results scoring at least this value
+        retrieval: 'dense', 'sparse' (BM25) or 'hybrid'
+        dedup_threshold: Drop near-duplicate documents before indexing (None keeps all)
+        mmr_lambda: Diversify results with maximal marginal relevance (None disables it)
         
     Returns:
         List of search results
     """
-    store = create_rag_store(documents)
-    return store.search(query, top_k)
+    store = create_rag_store(documents, metric=metric, retrieval=retrieval, dedup_threshold=dedup_threshold)
+    return store.search(query, top_k, min_score=min_score, mmr_lambda=mmr_lambda)